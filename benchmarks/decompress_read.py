@@ -0,0 +1,187 @@
+"""
+Compressed-input benchmark: streaming a compressed csv into the chunked parser, against
+decompressing it to scratch disk first and then reading the plain csv, e.g.
+
+    python benchmarks/decompress_read.py --rows 2000000 --workers 4
+
+zstd inputs are written as multi-frame files (like pzstd output), so their frames are
+decompressed in parallel; zstd is skipped if the zstandard package is not installed.
+"""
+
+import argparse
+import gzip
+import json
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from microplot import loaders  # noqa: E402
+
+# zstd frame size of the multi-frame inputs
+ZSTD_FRAME_BYTES = 8 * 2**20
+
+
+def write_quotes(file_path: str, rows: int, seed: int = 0):
+    """
+    Write a synthetic quote data csv.
+
+    Args:
+        file_path (str): csv file path.
+        rows (int): number of quotes.
+        seed (int): random seed. Default = 0.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = 1672531200 * 10**9 + np.cumsum(rng.integers(1, 10**6, rows))
+    symbols = rng.choice(np.array(["COIN_A", "COIN_B", "COIN_C"]), rows)
+    bid = np.round(100 + np.cumsum(rng.normal(0, 0.01, rows)), 2)
+    ask = bid + 0.01 * rng.integers(1, 4, rows)
+    micro = np.round((bid + ask) / 2, 4)
+    with open(file_path, "w") as file:
+        file.write("timestamp,symbol,bid_price,ask_price,micro_price\n")
+        for start in range(0, rows, 100_000):
+            stop = min(start + 100_000, rows)
+            lines = [
+                f"{t},{s},{b:.2f},{a:.2f},{m:.4f}\n"
+                for t, s, b, a, m in zip(
+                    timestamps[start:stop].tolist(),
+                    symbols[start:stop].tolist(),
+                    bid[start:stop].tolist(),
+                    ask[start:stop].tolist(),
+                    micro[start:stop].tolist(),
+                )
+            ]
+            file.writelines(lines)
+
+
+def compress(file_path: str, codec: str) -> str:
+    """
+    Compress a csv.
+
+    Args:
+        file_path (str): csv file path.
+        codec (str): "gzip", "xz" or "zstd" (multi-frame).
+
+    Returns:
+        str: compressed file path.
+    """
+    extension = {"gzip": ".gz", "xz": ".xz", "zstd": ".zst"}[codec]
+    output_path = file_path + extension
+    with open(file_path, "rb") as source:
+        if codec == "gzip":
+            with gzip.open(output_path, "wb", compresslevel=6) as output:
+                shutil.copyfileobj(source, output)
+        elif codec == "xz":
+            with lzma.open(output_path, "wb", preset=1) as output:
+                shutil.copyfileobj(source, output)
+        else:
+            import zstandard
+
+            compressor = zstandard.ZstdCompressor(level=3)
+            with open(output_path, "wb") as output:
+                # independent frames, so they can be decompressed in parallel
+                for block in iter(lambda: source.read(ZSTD_FRAME_BYTES), b""):
+                    output.write(compressor.compress(block))
+    return output_path
+
+
+def read(file_path: str, workers: int):
+    if loaders._codec(file_path) is not None and workers > 1:
+        return loaders.read_csv_stream(file_path, "quote_data", workers)
+    if workers > 1:
+        return loaders.read_csv_parallel(file_path, "quote_data", workers)
+    return loaders.read_csv(file_path, "quote_data")
+
+
+def measure(compressed_path: str, scratch_dir: str, workers: int, repeat: int) -> dict:
+    """
+    Time both ways of reading a compressed csv.
+
+    Args:
+        compressed_path (str): compressed csv file path.
+        scratch_dir (str): directory for the decompressed copy.
+        workers (int): parser processes (and zstd decompression threads).
+        repeat (int): runs per method (best is kept).
+
+    Returns:
+        dict: seconds per method, and the speedup of streaming.
+    """
+    scratch_path = os.path.join(scratch_dir, "scratch.csv")
+
+    def decompress_then_read():
+        with loaders._open_stream(compressed_path) as stream, open(scratch_path, "wb") as output:
+            shutil.copyfileobj(stream, output, loaders.STREAM_BLOCK_BYTES)
+        rows = len(read(scratch_path, workers)["timestamp"])
+        os.remove(scratch_path)
+        return rows
+
+    def stream():
+        return len(read(compressed_path, workers)["timestamp"])
+
+    results = {}
+    for name, method in [("decompress_then_read", decompress_then_read), ("stream", stream)]:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = method()
+            best = min(best, time.perf_counter() - start)
+        results[name] = round(best, 3)
+    results["rows"] = rows
+    results["speedup"] = round(results["decompress_then_read"] / results["stream"], 2)
+    return results
+
+
+def main(command_args):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000, help="quotes in the synthetic csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parser processes")
+    parser.add_argument("--codecs", default="gzip,zstd,xz", help="comma-separated codecs")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per method (best is kept)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(command_args)
+
+    codecs = args.codecs.split(",")
+    if "zstd" in codecs:
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            print("zstandard is not installed: skipping zstd", file=sys.stderr)
+            codecs.remove("zstd")
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "quote_data.csv")
+        write_quotes(csv_path, args.rows)
+        csv_mb = os.path.getsize(csv_path) / 2**20
+        for codec in codecs:
+            compressed_path = compress(csv_path, codec)
+            result = measure(compressed_path, directory, args.workers, args.repeat)
+            result.update(
+                codec=codec,
+                csv_mb=round(csv_mb, 1),
+                compressed_mb=round(os.path.getsize(compressed_path) / 2**20, 1),
+                stream_mb_s=round(csv_mb / result["stream"], 1),
+                decompress_then_read_mb_s=round(csv_mb / result["decompress_then_read"], 1),
+            )
+            results.append(result)
+            os.remove(compressed_path)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'codec':<6} {'csv MB':>7} {'packed MB':>9} {'stream MB/s':>12} {'decompress+read MB/s':>21} {'speedup':>8}")
+        for result in results:
+            print(
+                f"{result['codec']:<6} {result['csv_mb']:>7} {result['compressed_mb']:>9} "
+                f"{result['stream_mb_s']:>12} {result['decompress_then_read_mb_s']:>21} {result['speedup']:>7}x"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,84 @@
+"""
+Import-time benchmark: data-only modules must import fast and without any GUI toolkit.
+
+Each module is imported in a fresh interpreter. Exits non-zero on a regression, e.g.
+
+    python benchmarks/import_time.py --budget_ms 150
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+# modules that must stay importable without GUI toolkits
+HEADLESS_MODULES = [
+    "microplot.schema",
+    "microplot.frame",
+    "microplot.data",
+    "microplot.datasource",
+    "microplot.loaders",
+    "microplot.scripts.plot_csv",
+]
+
+# top-level packages that must not be imported by HEADLESS_MODULES
+GUI_PACKAGES = ["enable", "traits", "traitsui", "chaco", "pyface", "kiva", "PyQt5", "PySide2"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1e3, "modules": sorted({{name.split(".")[0] for name in sys.modules}})}}))
+"""
+
+
+def measure(module: str, repeat: int) -> dict:
+    """
+    Import a module in fresh interpreters.
+
+    Args:
+        module (str): module name.
+        repeat (int): number of fresh imports (best is kept).
+
+    Returns:
+        dict: best import time (ms) and the GUI packages it pulled in.
+    """
+    best, gui = float("inf"), []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        best = min(best, result["ms"])
+        gui = [name for name in GUI_PACKAGES if name in result["modules"]]
+    return {"module": module, "ms": round(best, 2), "gui_imports": gui}
+
+
+def main(command_args):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget_ms", help="max import time per module", type=float, default=150.0)
+    parser.add_argument("--repeat", help="fresh imports per module", type=int, default=3)
+    parser.add_argument("--json", help="print results as json", action="store_true")
+    args = parser.parse_args(command_args)
+
+    results = [measure(module, args.repeat) for module in HEADLESS_MODULES]
+    failed = [
+        result for result in results if result["gui_imports"] or result["ms"] > args.budget_ms
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            status = "FAIL" if result in failed else "ok"
+            print(f"{result['module']:<32}{result['ms']:>10.2f} ms  {status}  {' '.join(result['gui_imports'])}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,258 @@
+"""
+Render-time benchmark: builds MicroPlotter containers from generated datasets of increasing
+size, renders them offscreen through the Kiva image backend at a fixed size, and scripts a
+sequence of zoom levels and pans on the shared index range, e.g.
+
+    python benchmarks/render_bench.py --sizes 10000,100000,1000000 --json > before.json
+    python benchmarks/render_bench.py --compare before.json
+
+Draw milliseconds are recorded per frame, per subplot and per renderer type, for the
+full-fidelity pass and the decimated preview pass drawn while panning.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+os.environ.setdefault("ETS_TOOLKIT", "null")
+
+import numpy as np  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import chaco.scales_tick_generator  # noqa: E402
+from chaco.api import Plot, PlotGraphicsContext  # noqa: E402
+from kiva.api import Font  # noqa: E402
+from kiva.image import GraphicsContext  # noqa: E402
+
+from microplot.data import PlotterDataClass  # noqa: E402
+from microplot.plotter import MicroPlotter  # noqa: E402
+
+
+def _font_metrics_provider():
+    # the tick labeler measures text on a font-less 1x1 context, which the null toolkit cannot do
+    gc = GraphicsContext((1, 1))
+    gc.set_font(Font("sans-serif", 10))
+    return gc
+
+
+chaco.scales_tick_generator.font_metrics_provider = _font_metrics_provider
+
+
+def make_data(quotes: int, symbols: int, seed: int = 0) -> PlotterDataClass:
+    """
+    Generate a dataset: quotes, and trades, fills, orders and valuations at a fraction of the quote rate.
+
+    Args:
+        quotes (int): number of quotes (over all symbols).
+        symbols (int): number of symbols.
+        seed (int): random seed. Default = 0.
+
+    Returns:
+        PlotterDataClass: dataclass for plotting object.
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array([f"COIN_{i}" for i in range(symbols)])
+    timestamps = 1672531200 * 10**9 + np.cumsum(rng.integers(1, 10**6, quotes))
+    symbol = rng.choice(names, quotes)
+    bid = np.round(100 + np.cumsum(rng.normal(0, 0.01, quotes)), 2)
+    ask = bid + 0.01 * rng.integers(1, 4, quotes)
+
+    def events(every: int) -> dict:
+        rows = np.arange(0, quotes, every)
+        return {
+            "timestamp": timestamps[rows] + 1,
+            "symbol": symbol[rows],
+            "price": np.where(rng.random(len(rows)) < 0.5, bid[rows], ask[rows]),
+            "is_buy": rng.random(len(rows)) < 0.5,
+        }
+
+    fills = events(50)
+    fills["is_aggressive"] = rng.random(len(fills["timestamp"])) < 0.5
+    orders = events(20)
+    flags = rng.integers(0, 5, len(orders["timestamp"]))
+    orders.update(is_new=flags == 0, is_ack=flags % 2 == 1, is_cancel=flags >= 3, is_reject=flags == 4)
+    val_rows = np.arange(0, quotes, 5)
+    return PlotterDataClass.from_arrays(
+        quote_data={
+            "timestamp": timestamps,
+            "symbol": symbol,
+            "bid_price": bid,
+            "ask_price": ask,
+            "micro_price": (bid + ask) / 2,
+        },
+        trade_data=events(10),
+        fill_data_sim=fills,
+        orders=orders,
+        val_data={
+            "timestamp": timestamps[val_rows] + 2,
+            "symbol": symbol[val_rows],
+            "theo_price": (bid[val_rows] + ask[val_rows]) / 2,
+        },
+    )
+
+
+class DrawTimer:
+    """
+    Times the draw calls of every subplot and renderer of a container, by wrapping
+    their layer dispatch (renderers, grids) and overlay (axes, legends) methods.
+    """
+
+    def __init__(self, container):
+        # (kind, name) -> ms in the current frame
+        self.frame = defaultdict(float)
+        for plot in container.components:
+            if not isinstance(plot, Plot):
+                continue
+            self._wrap(plot, "_dispatch_draw", ("subplot", plot.title.strip() or "activity strip"))
+            for renderer in plot.components:
+                self._wrap(renderer, "_dispatch_draw", ("renderer", type(renderer).__name__))
+            for overlay in plot.underlays + plot.overlays:
+                self._wrap(overlay, "overlay", ("renderer", type(overlay).__name__))
+
+    def _wrap(self, component, method: str, key: tuple):
+        draw = getattr(component, method)
+
+        def timed(*args, **kws):
+            start = time.perf_counter()
+            try:
+                return draw(*args, **kws)
+            finally:
+                self.frame[key] += (time.perf_counter() - start) * 1e3
+
+        setattr(component, method, timed)
+
+    def reset(self) -> dict:
+        frame, self.frame = dict(self.frame), defaultdict(float)
+        return frame
+
+
+def script(t0: float, t1: float, zooms: list, pans: int) -> list:
+    """
+    View sequence: at each zoom level (window = span / zoom), centred on the data, then
+    panned right by a tenth of the window per step.
+
+    Returns:
+        list: (zoom, pan, low, high) per frame.
+    """
+    views = []
+    centre = (t0 + t1) / 2
+    for zoom in zooms:
+        width = (t1 - t0) / zoom
+        for pan in range(pans + 1):
+            low = centre - width / 2 + pan * width / 10
+            views.append((zoom, pan, low, low + width))
+    return views
+
+
+def measure(
+    plotter: MicroPlotter, width: int, height: int, zooms: list, pans: int, render_pass: str
+) -> dict:
+    """
+    Draw the scripted views of a plotter, offscreen.
+
+    Returns:
+        dict: per-frame totals, and mean ms per subplot and per renderer type.
+    """
+    container = plotter.container
+    container.outer_bounds = [width, height]
+    container.do_layout(force=True)
+
+    # drive the shared index range directly: the scheduler's timers need a GUI event loop
+    index_range = plotter._top_plot_index_range
+    index_range.observe(plotter._scheduler.range_changed, "updated", remove=True)
+    t0, t1 = index_range.low, index_range.high
+
+    if render_pass == "preview":
+        plotter._scheduler._enter_preview()
+    timer = DrawTimer(container)
+    frames = []
+    totals = defaultdict(float)
+    for zoom, pan, low, high in script(t0, t1, zooms, pans):
+        index_range.set_bounds(low, high)
+        if render_pass == "preview":
+            plotter._scheduler._update_previews()
+        for callback in plotter._scheduler.frame_callbacks:
+            callback()
+        gc = PlotGraphicsContext((width, height))
+        start = time.perf_counter()
+        gc.render_component(container)
+        elapsed = (time.perf_counter() - start) * 1e3
+        frames.append({"zoom": zoom, "pan": pan, "ms": round(elapsed, 3)})
+        for key, ms in timer.reset().items():
+            totals[key] += ms
+    if render_pass == "preview":
+        plotter._scheduler._exit_preview()
+    index_range.set_bounds(t0, t1)
+
+    ms = np.array([frame["ms"] for frame in frames])
+    return {
+        "frames": frames,
+        "mean_ms": round(float(ms.mean()), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "per_subplot_ms": {
+            name: round(total / len(frames), 3) for (kind, name), total in totals.items() if kind == "subplot"
+        },
+        "per_renderer_ms": {
+            name: round(total / len(frames), 3) for (kind, name), total in sorted(totals.items()) if kind == "renderer"
+        },
+    }
+
+
+def main(command_args):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated quote counts")
+    parser.add_argument("--symbols", type=int, default=2, help="symbols (subplots) per dataset")
+    parser.add_argument("--width", type=int, default=1200, help="render width, pixels")
+    parser.add_argument("--height", type=int, default=800, help="render height, pixels")
+    parser.add_argument("--zooms", default="1,10,100,1000,10000", help="comma-separated zoom factors")
+    parser.add_argument("--pans", type=int, default=5, help="pan steps per zoom level")
+    parser.add_argument("--passes", default="full,preview", help="render passes to time")
+    parser.add_argument("--activity", action="store_true", help="add the activity strips")
+    parser.add_argument("--label", default="", help="label stored with the results (e.g. a git revision)")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(command_args)
+
+    zooms = [float(zoom) for zoom in args.zooms.split(",")]
+    results = []
+    for size in [int(size) for size in args.sizes.split(",")]:
+        data = make_data(size, args.symbols)
+        for render_pass in args.passes.split(","):
+            plotter = MicroPlotter(data, show_activity=args.activity)
+            start = time.perf_counter()
+            plotter.container
+            build_ms = (time.perf_counter() - start) * 1e3
+            result = measure(plotter, args.width, args.height, zooms, args.pans, render_pass)
+            result.update(label=args.label, rows=size, render_pass=render_pass, build_ms=round(build_ms, 1))
+            results.append(result)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = {(r["rows"], r["render_pass"]): r for r in json.load(file)}
+
+    print(f"{'rows':>9} {'pass':<8} {'build ms':>9} {'mean ms':>8} {'p95 ms':>8} {'max ms':>8}  slowest renderers")
+    for result in results:
+        slowest = sorted(result["per_renderer_ms"].items(), key=lambda item: -item[1])[:3]
+        line = (
+            f"{result['rows']:>9} {result['render_pass']:<8} {result['build_ms']:>9} {result['mean_ms']:>8} "
+            f"{result['p95_ms']:>8} {result['max_ms']:>8}  "
+            + ", ".join(f"{name} {ms}" for name, ms in slowest)
+        )
+        previous = baseline.get((result["rows"], result["render_pass"]))
+        if previous:
+            line += f"  ({result['mean_ms'] / previous['mean_ms']:.2f}x of {previous['label'] or args.compare})"
+        print(line)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
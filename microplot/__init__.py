@@ -1,3 +1,3 @@
 # pylint: disable=C0111
 
-__all__ = ["scripts","data","plotter","schema"]
+__all__ = ["scripts","activity","binary","clock","data","datasource","derived","export","filters","frame","ladder","loaders","planner","plotter","prepare","renderers","scheduler","server","schema"]
@@ -0,0 +1,148 @@
+"""
+This module contains the event-rate count pyramids behind the activity strips.
+
+Event timestamps are bucketed once, with integer division and bincount over the
+nanosecond timestamps, into a base resolution; coarser levels are built by summing
+bucket pairs. Re-bucketing for a zoom level then only slices one level, so it keeps
+up with panning over a day of data. Windows finer than the base resolution are
+bucketed directly from the (sorted) timestamps in view.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# activity kinds: (name, input series, color)
+ACTIVITY_KINDS = [
+    ("quotes", ["quote_data"], "gray"),
+    ("trades", ["trade_data"], "red"),
+    ("orders", ["orders"], "green"),
+    ("fills", ["fill_data_sim", "fill_data_prod"], "blue"),
+]
+
+# finest base bucket, in ns
+MIN_BUCKET_NS = 10**6
+# buckets in the base level, at most (fewer for symbols with fewer events, see ActivityPyramid)
+MAX_BASE_BUCKETS = 2**18
+
+
+class ActivityPyramid:
+    """
+    Multi-resolution event counts for one symbol: one pyramid per activity kind,
+    level k counting events in buckets of base_ns * 2**k, aligned on origin_ns.
+    """
+
+    def __init__(
+        self,
+        timestamps: Dict[str, np.ndarray],
+        base_ns: Optional[int] = None,
+        max_base_buckets: Optional[int] = None,
+    ):
+        """
+        Args:
+            timestamps (Dict[str, np.ndarray]): activity kind -> sorted int64 ns timestamps.
+            base_ns (Optional[int]): base bucket width, in ns. Default = the finest width
+                (at least MIN_BUCKET_NS) that fits the time span in max_base_buckets.
+            max_base_buckets (Optional[int]): buckets in the base level, at most. Default = the
+                busiest kind's event count rounded up to a power of two, capped at MAX_BASE_BUCKETS
+                (finer windows are bucketed from the timestamps in view anyway).
+        """
+        self._timestamps = {
+            kind: np.asarray(values, dtype=np.int64) for kind, values in timestamps.items()
+        }
+        if max_base_buckets is None:
+            events = max([len(values) for values in self._timestamps.values()], default=0)
+            max_base_buckets = min(MAX_BASE_BUCKETS, 1 << max(events - 1, 0).bit_length())
+        non_empty = [values for values in self._timestamps.values() if len(values)]
+        self.origin_ns = int(min(values[0] for values in non_empty)) if non_empty else 0
+        end_ns = int(max(values[-1] for values in non_empty)) + 1 if non_empty else 1
+
+        if base_ns is None:
+            base_ns = max(MIN_BUCKET_NS, -(-(end_ns - self.origin_ns) // max_base_buckets))
+        self.base_ns = int(base_ns)
+        num_buckets = max(-(-(end_ns - self.origin_ns) // self.base_ns), 1)
+
+        # kind -> levels, finest first
+        self._levels: Dict[str, List[np.ndarray]] = {}
+        for kind, values in self._timestamps.items():
+            counts = np.bincount(
+                (values - self.origin_ns) // self.base_ns, minlength=num_buckets
+            ).astype(np.int32)
+            levels = [counts]
+            while len(levels[-1]) > 1:
+                counts = levels[-1]
+                if len(counts) % 2:
+                    counts = np.append(counts, 0)
+                levels.append(counts[0::2] + counts[1::2])
+            self._levels[kind] = levels
+
+    @property
+    def kinds(self) -> List[str]:
+        """
+        Returns:
+            List[str]: activity kinds counted.
+        """
+        return list(self._levels)
+
+    def counts(
+        self, kind: str, t0_ns: int, t1_ns: int, num_buckets: int
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Event counts of a kind over [t0_ns, t1_ns], in at least num_buckets buckets
+        (at most twice as many, from the nearest pyramid level).
+
+        Args:
+            kind (str): activity kind.
+            t0_ns (int): window start, in ns.
+            t1_ns (int): window end, in ns.
+            num_buckets (int): target number of buckets.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, int]: bucket start times (ns), counts, bucket width (ns).
+        """
+        t0_ns, t1_ns = int(t0_ns), int(max(t1_ns, t0_ns + 1))
+        width = max((t1_ns - t0_ns) // max(num_buckets, 1), 1)
+
+        if width < self.base_ns:
+            # finer than the pyramid: bucket the events in view directly
+            timestamps = self._timestamps[kind]
+            start = t0_ns - (t0_ns - self.origin_ns) % width
+            window = timestamps[
+                np.searchsorted(timestamps, start) : np.searchsorted(timestamps, t1_ns, side="right")
+            ]
+            num = (t1_ns - start) // width + 1
+            counts = np.bincount((window - start) // width, minlength=num)[:num]
+            return start + np.arange(num, dtype=np.int64) * width, counts, width
+
+        levels = self._levels[kind]
+        level = min(int(np.log2(width / self.base_ns)), len(levels) - 1)
+        width = self.base_ns * 2**level
+        counts = levels[level]
+        i0 = min(max((t0_ns - self.origin_ns) // width, 0), len(counts))
+        i1 = min(max((t1_ns - self.origin_ns) // width + 1, i0), len(counts))
+        return self.origin_ns + np.arange(i0, i1, dtype=np.int64) * width, counts[i0:i1], width
+
+    def rates(
+        self, kind: str, t0: float, t1: float, num_buckets: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Event rates of a kind over a window, as step data for a "connectedhold" line.
+
+        Args:
+            kind (str): activity kind.
+            t0 (float): window start, EPOCH seconds.
+            t1 (float): window end, EPOCH seconds.
+            num_buckets (int): target number of buckets.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: bucket edges (seconds) and events per second,
+            with the last rate repeated at the closing edge.
+        """
+        starts, counts, width = self.counts(
+            kind, round(t0 * 1e9), round(t1 * 1e9), num_buckets
+        )
+        if not len(starts):
+            return np.empty(0), np.empty(0)
+        edges = np.append(starts, starts[-1] + width) * 1e-9
+        rates = counts / (width * 1e-9)
+        return edges, np.append(rates, rates[-1])
@@ -0,0 +1,319 @@
+"""
+This module contains the loader for fixed-width binary capture logs.
+
+A small JSON spec file describes the record layout (a NumPy structured dtype), how
+records map onto the PlotterDataClass series, and the symbol id dictionary. The
+capture is memory-mapped, so opening it does not read it: BinaryCapture.columns are
+views onto the mapped records (gathers, for the rows of one record type). Loading a
+PlotterDataClass (BinaryCapture.to_data, load_binary_data) reads and copies the series
+it loads: validation adds float-second timestamps, orders the events in time and scans
+them for duplicates.
+
+Example spec:
+
+    {
+        "header_bytes": 16,
+        "dtype": [["timestamp", "<i8"], ["symbol_id", "<u4"], ["type", "u1"],
+                  ["flags", "u1"], ["pad", "V2"], ["price", "<f8"]],
+        "symbol_field": "symbol_id",
+        "symbols": {"0": "COIN_A", "1": "COIN_B"},
+        "type_field": "type",
+        "series": {
+            "trade_data": {"type": 2, "columns": {"timestamp": "timestamp", "price": "price"}},
+            "fill_data_sim": {
+                "type": 3,
+                "columns": {"timestamp": "timestamp", "price": "price"},
+                "flags": {"field": "flags", "bits": {"is_buy": 0, "is_aggressive": 1}}
+            }
+        }
+    }
+
+"symbols" may instead be "symbols_file": a csv table of "id,symbol" rows (path relative to the spec).
+Without "type_field", every record belongs to each listed series (one series per capture).
+"""
+
+from dataclasses import dataclass, field
+import json
+import logging
+import os.path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from microplot.data import PlotterDataClass
+from microplot.schema import SERIES_COLUMNS
+
+
+@dataclass
+class CaptureSpec:
+    """
+    Record layout of a binary capture, and its mapping onto the PlotterDataClass series.
+
+    dtype (np.dtype): structured dtype of one record.
+    series (Dict[str, Dict[str, Any]]): series name -> {"columns": {column: field},
+        optional "type": record type value, optional "flags": {"field", "bits": {column: bit}}}.
+    symbol_field (str): field holding the symbol id.
+    symbols (Dict[int, str]): symbol id -> symbol.
+    type_field (Optional[str]): field holding the record type (None = no filtering).
+    header_bytes (int): bytes to skip at the start of the capture.
+    """
+
+    dtype: np.dtype
+    series: Dict[str, Dict[str, Any]]
+    symbol_field: str
+    symbols: Dict[int, str] = field(default_factory=dict)
+    type_field: Optional[str] = None
+    header_bytes: int = 0
+
+    @classmethod
+    def from_file(cls, spec_path: str) -> "CaptureSpec":
+        """
+        Read a JSON spec file (see module docstring).
+
+        Args:
+            spec_path (str): spec file path.
+
+        Raises:
+            Exception: invalid spec.
+
+        Returns:
+            CaptureSpec: the spec.
+        """
+        with open(spec_path) as file:
+            spec = json.load(file)
+
+        layout = spec["dtype"]
+        if isinstance(layout, dict):
+            dtype = np.dtype(layout)
+        else:
+            dtype = np.dtype([tuple(item) for item in layout], align=spec.get("align", False))
+
+        if "symbols_file" in spec:
+            symbols_path = os.path.join(os.path.dirname(spec_path), spec["symbols_file"])
+            symbols = read_symbol_table(symbols_path)
+        else:
+            symbols = {int(symbol_id): name for symbol_id, name in spec.get("symbols", {}).items()}
+
+        capture_spec = cls(
+            dtype=dtype,
+            series=spec["series"],
+            symbol_field=spec["symbol_field"],
+            symbols=symbols,
+            type_field=spec.get("type_field"),
+            header_bytes=spec.get("header_bytes", 0),
+        )
+        capture_spec.validate()
+        return capture_spec
+
+    def validate(self):
+        """
+        Check the spec against the record layout and the data schema.
+
+        Raises:
+            Exception: unknown series, missing schema column, or unknown record field.
+        """
+        fields = set(self.dtype.names or [])
+        for name in [self.symbol_field] + ([self.type_field] if self.type_field else []):
+            if name not in fields:
+                raise Exception(f"field:{name} not in record layout")
+        for series, mapping in self.series.items():
+            if series not in SERIES_COLUMNS:
+                raise Exception(f"unknown series: {series}")
+            columns = dict(mapping.get("columns", {}))
+            flags = mapping.get("flags")
+            if flags is not None:
+                columns.update({column: flags["field"] for column in flags["bits"]})
+            for column in SERIES_COLUMNS[series]:
+                if column != "symbol" and column not in columns:
+                    raise Exception(f"column:{column} of {series} not mapped")
+            for column, record_field in columns.items():
+                if record_field not in fields:
+                    raise Exception(f"field:{record_field} (for {series}:{column}) not in record layout")
+
+
+def read_symbol_table(file_path: str) -> Dict[int, str]:
+    """
+    Read a symbol dictionary table: csv rows of "id,symbol" (an optional header row is skipped).
+
+    Args:
+        file_path (str): table file path.
+
+    Returns:
+        Dict[int, str]: symbol id -> symbol.
+    """
+    symbols = {}
+    with open(file_path) as file:
+        for line in file:
+            symbol_id, _, name = line.strip().partition(",")
+            if symbol_id.isdigit():
+                symbols[int(symbol_id)] = name.strip()
+    return symbols
+
+
+class BinaryCapture:
+    """
+    A memory-mapped binary capture log.
+
+    Opening maps the file without reading it. Columns are built on first use:
+    fields are views onto the mapped records (rows of one record type are gathered
+    when a type field is used), flag bits are unpacked to booleans, and symbol ids
+    are resolved to fixed-width strings through the spec's dictionary.
+    """
+
+    def __init__(self, file_path: str, spec: CaptureSpec):
+        """
+        Args:
+            file_path (str): capture file path.
+            spec (CaptureSpec): record layout.
+
+        Raises:
+            Exception: file size is not a whole number of records.
+        """
+        self._spec = spec
+        size = os.path.getsize(file_path) - spec.header_bytes
+        if size < 0 or size % spec.dtype.itemsize:
+            raise Exception(
+                f"{file_path}: {size} bytes after the header is not a whole number "
+                f"of {spec.dtype.itemsize}-byte records"
+            )
+        if size:
+            self._records = np.memmap(
+                file_path, dtype=spec.dtype, mode="r", offset=spec.header_bytes
+            )
+        else:
+            self._records = np.empty(0, dtype=spec.dtype)
+        # series name -> row indices of its record type
+        self._rows = {}
+        # (sorted symbol ids, their symbols), built on first use
+        self._dictionary = None
+
+    @property
+    def records(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: the mapped records (structured, read-only).
+        """
+        return self._records
+
+    @property
+    def series(self) -> List[str]:
+        """
+        Returns:
+            List[str]: series mapped by the spec.
+        """
+        return list(self._spec.series)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _field(self, series: str, name: str) -> np.ndarray:
+        """
+        A record field over the records of a series: a view onto the mapped records,
+        or gathered from the rows of the series' record type.
+        """
+        mapping = self._spec.series[series]
+        if self._spec.type_field is None or "type" not in mapping:
+            return self._records[name]
+        if series not in self._rows:
+            self._rows[series] = np.flatnonzero(
+                self._records[self._spec.type_field] == mapping["type"]
+            )
+        return self._records[name][self._rows[series]]
+
+    def symbols(self, symbol_ids: np.ndarray) -> np.ndarray:
+        """
+        Resolve symbol ids through the dictionary table.
+
+        Args:
+            symbol_ids (np.ndarray): symbol ids.
+
+        Raises:
+            Exception: symbol id missing from the dictionary.
+
+        Returns:
+            np.ndarray: symbols (fixed-width strings).
+        """
+        symbol_ids = np.asarray(symbol_ids)
+        if self._dictionary is None:
+            # sorted ids, and their symbols as a fixed-width string array
+            ids = sorted(self._spec.symbols)
+            self._dictionary = (
+                np.array(ids, dtype=np.int64),
+                np.array([self._spec.symbols[symbol_id] for symbol_id in ids], dtype=str),
+            )
+        ids, names = self._dictionary
+        if not len(symbol_ids):
+            return np.empty(0, dtype=names.dtype)
+        position = np.minimum(np.searchsorted(ids, symbol_ids), max(len(ids) - 1, 0))
+        found = ids[position] == symbol_ids if len(ids) else np.zeros(len(symbol_ids), dtype=bool)
+        if not found.all():
+            missing = np.unique(symbol_ids[~found])
+            raise Exception(f"symbol ids not in dictionary: {missing[:10].tolist()}")
+        return names[position]
+
+    def columns(self, series: str) -> Dict[str, np.ndarray]:
+        """
+        Schema columns of a series (see microplot.schema.SERIES_COLUMNS).
+
+        Args:
+            series (str): name of the series.
+
+        Returns:
+            Dict[str, np.ndarray]: column name -> values.
+        """
+        mapping = self._spec.series[series]
+
+        columns = {}
+        for column, record_field in mapping.get("columns", {}).items():
+            values = self._field(series, record_field)
+            if column.startswith("is_") and values.dtype.itemsize == 1 and values.dtype.kind in "iub":
+                # 0/1 byte fields are reinterpreted in place
+                values = values.view(np.bool_)
+            columns[column] = values
+        flags = mapping.get("flags")
+        if flags is not None:
+            flag_values = self._field(series, flags["field"])
+            for column, bit in flags["bits"].items():
+                columns[column] = (flag_values >> bit) & 1 == 1
+        columns["symbol"] = self.symbols(self._field(series, self._spec.symbol_field))
+        return columns
+
+    def to_data(self, series: Optional[List[str]] = None) -> PlotterDataClass:
+        """
+        Build a PlotterDataClass from the capture, without a text round-trip. The series
+        loaded are read and copied (validated, in time order).
+
+        Args:
+            series (Optional[List[str]]): series to load. Default = all series in the spec.
+
+        Returns:
+            PlotterDataClass: dataclass for plotting object.
+        """
+        return PlotterDataClass.from_arrays(
+            **{name: self.columns(name) for name in (series or self.series)}
+        )
+
+
+def load_binary_data(
+    file_path: str, spec_path: str, logger: Optional[logging.Logger] = None
+) -> PlotterDataClass:
+    """
+    Read a binary capture log into a PlotterDataClass.
+
+    Args:
+        file_path (str): capture file path.
+        spec_path (str): JSON spec file path (see module docstring).
+        logger (Optional[logging.Logger]): progress logger. Default = "microplotter" logger.
+
+    Returns:
+        PlotterDataClass: dataclass for plotting object.
+    """
+    logger = logger or logging.getLogger("microplotter")
+    capture = BinaryCapture(file_path, CaptureSpec.from_file(spec_path))
+    logger.info(f"Mapped {len(capture)} records from {file_path}")
+    data = PlotterDataClass()
+    for series in capture.series:
+        logger.info(f"Reading in {series}....")
+        setattr(data, series, capture.columns(series))
+        logger.info("Done")
+    return data
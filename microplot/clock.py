@@ -0,0 +1,183 @@
+"""
+This module contains the clock corrections: per-source offsets that align timestamps taken
+on different clocks (e.g. exchange-stamped quotes and gateway-stamped orders).
+
+A correction is a constant offset plus, optionally, a piecewise-linear drift table of
+(timestamp, offset) knots, interpolated between knots and held flat outside them. It is
+applied as a transform when timestamps are read (see PlotterDataClass.set_clock_correction):
+the loaded timestamp arrays are never rewritten, so a correction can be changed and
+re-applied instantly. Corrected time must increase with raw time, which keeps every
+series (and symbol) in time order.
+"""
+
+import re
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# duration suffix -> nanoseconds
+DURATION_UNITS = {"ns": 1, "us": 10**3, "ms": 10**6, "s": 10**9}
+
+
+def parse_duration(text: str) -> int:
+    """
+    Parse a signed duration, e.g. "250us", "-1.5ms", "3s" (no unit = nanoseconds).
+
+    Args:
+        text (str): duration.
+
+    Raises:
+        Exception: not a duration.
+
+    Returns:
+        int: nanoseconds.
+    """
+    match = re.fullmatch(r"\s*([+-]?\d+(?:\.\d*)?|[+-]?\.\d+)\s*(ns|us|ms|s)?\s*", text)
+    if match is None:
+        raise Exception(f"invalid duration: {text!r} (e.g. 250us, -1.5ms, 3s)")
+    return round(float(match.group(1)) * DURATION_UNITS[match.group(2) or "ns"])
+
+
+class ClockCorrection:
+    """
+    Offset added to a source's timestamps: constant, plus a piecewise-linear drift.
+    """
+
+    def __init__(self, offset_ns: int = 0, drift: Optional[Tuple[Sequence[int], Sequence[int]]] = None):
+        """
+        Args:
+            offset_ns (int): constant offset, in ns. Default = 0.
+            drift (Optional[Tuple[Sequence[int], Sequence[int]]]): (knot timestamps, offsets at
+                the knots), in ns; knot timestamps increasing. Default = None (no drift).
+
+        Raises:
+            Exception: bad drift table, or one that would reverse time order.
+        """
+        self.offset_ns = int(offset_ns)
+        self._knots = None
+        self._offsets = None
+        if drift is not None:
+            knots, offsets = (np.asarray(values, dtype=np.int64) for values in drift)
+            if knots.ndim != 1 or knots.shape != offsets.shape or not len(knots):
+                raise Exception("drift table needs as many offsets as knot timestamps (at least one)")
+            if np.any(np.diff(knots) <= 0):
+                raise Exception("drift table knot timestamps must be increasing")
+            if np.any(np.diff(knots + offsets) <= 0):
+                raise Exception("drift table would reverse time order (offset falls faster than time)")
+            self._knots, self._offsets = knots, offsets
+
+    @classmethod
+    def from_csv(cls, file_path: str, offset_ns: int = 0) -> "ClockCorrection":
+        """
+        Read a drift table from a csv with "timestamp" and "offset" columns (ns integers).
+
+        Args:
+            file_path (str): file path.
+            offset_ns (int): constant offset, in ns, on top of the table. Default = 0.
+
+        Raises:
+            Exception: missing columns, or a bad drift table.
+
+        Returns:
+            ClockCorrection: the correction.
+        """
+        table = np.genfromtxt(file_path, delimiter=",", names=True, dtype=np.int64, ndmin=1)
+        if table.dtype.names is None or not {"timestamp", "offset"} <= set(table.dtype.names):
+            raise Exception(f"{file_path} needs timestamp and offset columns")
+        return cls(offset_ns, (table["timestamp"], table["offset"]))
+
+    @property
+    def drift(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns:
+            Optional[Tuple[np.ndarray, np.ndarray]]: (knot timestamps, offsets) in ns, if any.
+        """
+        return None if self._knots is None else (self._knots, self._offsets)
+
+    def offsets_ns(self, timestamps_ns: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            timestamps_ns (np.ndarray): raw int64 ns timestamps.
+
+        Returns:
+            np.ndarray: int64 ns offset at each timestamp.
+        """
+        timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+        if self._knots is None:
+            return np.full(timestamps_ns.shape, self.offset_ns, dtype=np.int64)
+        # interpolate relative to the first knot: absolute ns do not fit a float64 exactly
+        origin = self._knots[0]
+        drift = np.interp(
+            (timestamps_ns - origin).astype(np.float64), (self._knots - origin).astype(np.float64), self._offsets
+        )
+        return np.round(drift).astype(np.int64) + self.offset_ns
+
+    def apply_ns(self, timestamps_ns: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            timestamps_ns (np.ndarray): raw int64 ns timestamps.
+
+        Returns:
+            np.ndarray: corrected int64 ns timestamps (a new array).
+        """
+        timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+        if self._knots is None:
+            return timestamps_ns + self.offset_ns
+        return timestamps_ns + self.offsets_ns(timestamps_ns)
+
+    def apply(self, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            timestamps (np.ndarray): raw EPOCH seconds.
+
+        Returns:
+            np.ndarray: corrected EPOCH seconds (a new array).
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if self._knots is None:
+            return timestamps + self.offset_ns * 1e-9
+        drift = np.interp(timestamps, self._knots * 1e-9, self._offsets * 1e-9)
+        return timestamps + (drift + self.offset_ns * 1e-9)
+
+    def invert(self, timestamp: float) -> float:
+        """
+        Raw time whose corrected time is timestamp (to look corrected windows up in raw data).
+
+        Args:
+            timestamp (float): corrected EPOCH seconds.
+
+        Returns:
+            float: raw EPOCH seconds.
+        """
+        timestamp = timestamp - self.offset_ns * 1e-9
+        if self._knots is None:
+            return timestamp
+        knots, offsets = self._knots * 1e-9, self._offsets * 1e-9
+        corrected_knots = knots + offsets
+        if timestamp <= corrected_knots[0]:
+            return timestamp - offsets[0]
+        if timestamp >= corrected_knots[-1]:
+            return timestamp - offsets[-1]
+        return float(np.interp(timestamp, corrected_knots, knots))
+
+    def __repr__(self) -> str:
+        knots = 0 if self._knots is None else len(self._knots)
+        return f"ClockCorrection(offset_ns={self.offset_ns}, drift knots={knots})"
+
+
+def correction_for(
+    corrections: Dict[Tuple[str, Optional[str]], ClockCorrection], series: str, symbol: str
+) -> Optional[ClockCorrection]:
+    """
+    Correction of a symbol's rows of a series: the symbol's own, else the series'.
+
+    Args:
+        corrections (Dict[Tuple[str, Optional[str]], ClockCorrection]): (series, symbol or None) -> correction.
+        series (str): name of the series.
+        symbol (str): The symbol of interest.
+
+    Returns:
+        Optional[ClockCorrection]: the correction (None = timestamps as loaded).
+    """
+    correction = corrections.get((series, symbol))
+    return correction if correction is not None else corrections.get((series, None))
@@ -2,17 +2,107 @@
 This module contains the PlotterDataClass for the plotting object.
 """
 
-from dataclasses import dataclass
-import pandas as pd
-from typing import Tuple, List
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import sys
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Tuple, List, Optional, Union
+from microplot.clock import ClockCorrection, correction_for
+from microplot.derived import DERIVABLE_COLUMNS, DERIVED_SERIES
+from microplot.frame import ColumnFrame
 from microplot.schema import (
     QUOTE_DATA_COLUMNS,
     TRADE_DATA_COLUMNS,
     FILL_DATA_COLUMNS,
     ORDERS_DATA_COLUMNS,
     VAL_DATA_COLUMNS,
+    SERIES_COLUMNS,
 )
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+# accepted series inputs: pandas DataFrame (optional adapter), ColumnFrame,
+# dict of NumPy arrays or NumPy structured array
+SeriesInput = Union["pd.DataFrame", ColumnFrame, Dict[str, np.ndarray], np.ndarray]
+
+# quote columns drawn by the plotter: rows repeating all of them are collapsed
+PLOTTED_QUOTE_COLUMNS = ["bid_price", "ask_price", "micro_price"]
+# series a simulation run carries (market data is shared, see PlotterDataClass.add_sim_run)
+SIM_RUN_SERIES = ["fill_data_sim", "orders", "val_data"]
+
+
+def _is_dataframe(data) -> bool:
+    """
+    Check for a pandas DataFrame without importing pandas.
+
+    Args:
+        data: series input.
+
+    Returns:
+        bool: true if data is a pandas DataFrame.
+    """
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(data, pandas.DataFrame)
+
+
+def _take_rows(data: Union[pd.DataFrame, ColumnFrame], rows: np.ndarray):
+    """
+    Select rows of a series by position.
+
+    Args:
+        data (Union[pd.DataFrame, ColumnFrame]): validated time series.
+        rows (np.ndarray): row positions.
+
+    Returns:
+        Union[pd.DataFrame, ColumnFrame]: the selected rows.
+    """
+    if _is_dataframe(data):
+        return data.iloc[rows].reset_index(drop=True)
+    return data[rows]
+
+
+@dataclass
+class OrderingReport:
+    """
+    Outcome of the timestamp ordering stage for one series.
+
+    rows (int): rows received.
+    unsorted_runs (int): places where a symbol's timestamps went backwards.
+    reordered (int): rows displaced within their symbol: a late or early event (or block of
+        them) counts once, not every row it shifts past.
+    duplicates (int): exact-duplicate events (identical to an earlier row in every column).
+    dropped (int): rows dropped (duplicates, if PlotterDataClass.drop_duplicates).
+    """
+
+    rows: int = 0
+    unsorted_runs: int = 0
+    reordered: int = 0
+    duplicates: int = 0
+    dropped: int = 0
+
+
+@dataclass
+class CollapseReport:
+    """
+    Outcome of the quote run-length collapse (see PlotterDataClass.collapsed_quote_rows).
+
+    rows (int): quote rows.
+    kept (int): rows that change a plotted field (or end a symbol's series).
+    """
+
+    rows: int = 0
+    kept: int = 0
+
+    @property
+    def ratio(self) -> float:
+        """
+        Returns:
+            float: rows per kept row (1.0 = nothing collapsed).
+        """
+        return self.rows / self.kept if self.kept else 1.0
+
 
 @dataclass
 class PlotterDataClass:
@@ -20,6 +110,8 @@ class PlotterDataClass:
     A dataclass to pass data to the microstructure plotter.
 
     NOTE: See required fields in each property setter function or the data schema.
+    Series can be set as pandas DataFrames, or without pandas as dicts of NumPy arrays
+    or NumPy structured arrays (see from_arrays), which are stored as ColumnFrames.
 
     _quote_data (pd.DataFrame): time series of best bid and offer prices and microprice ("weight ave")
     _trade_data (pd.DataFrame): time series of trade prices.
@@ -27,6 +119,8 @@ class PlotterDataClass:
     _fill_data_prod (pd.DataFrame): time series of system fill data (but for prod).
     _orders (pd.DataFrame): time series of exchange order activity. Currently only news, cancels, rejects.
     _val_data (pd.DataFrame): time series of system valuation data-> theoretical price, "bid edge", "ask edge" (if market-making).
+    _sim_runs (Dict[str, PlotterDataClass]): named simulation runs (fills, orders, valuations) over this market data.
+    _clock_corrections (Dict[Tuple[str, Optional[str]], ClockCorrection]): clock corrections per series (and symbol).
     """
 
     _quote_data: pd.DataFrame = None
@@ -35,6 +129,28 @@ class PlotterDataClass:
     _fill_data_prod: pd.DataFrame = None
     _orders: pd.DataFrame = None
     _val_data: pd.DataFrame = None
+    _ordering_reports: Dict[str, OrderingReport] = field(default_factory=dict)
+    # series name -> number of times set; invalidates memoized derived series
+    _versions: Dict[str, int] = field(default_factory=dict)
+    # (series name, version) -> symbol -> timestamp-ordered row indices
+    _symbol_rows: Dict[Tuple[str, int], Dict[str, np.ndarray]] = field(default_factory=dict)
+    # (derived name, symbol) -> (input versions, columns)
+    _derived_cache: Dict[Tuple[str, str], Tuple[tuple, Dict[str, np.ndarray]]] = field(
+        default_factory=dict
+    )
+    # (filter expression, symbol) -> (input versions, mask) of the event filters
+    _filter_cache: Dict[Tuple[str, str], Tuple[tuple, np.ndarray]] = field(default_factory=dict)
+    # (quote_data version, symbol -> kept row indices, report) of the quote collapse
+    _collapsed_quotes: Tuple[int, Dict[str, np.ndarray], CollapseReport] = None
+    # run name -> run dataclass, in the order added
+    _sim_runs: Dict[str, PlotterDataClass] = field(default_factory=dict)
+    # (series name, symbol or None = every symbol) -> clock correction, applied when timestamps are read
+    _clock_corrections: Dict[Tuple[str, Optional[str]], ClockCorrection] = field(default_factory=dict)
+    # series name -> number of times its corrections changed; invalidates memoized results, not the grouping
+    _clock_versions: Dict[str, int] = field(default_factory=dict)
+
+    # drop exact-duplicate events in the ordering stage (they are always counted)
+    drop_duplicates = True
 
     def get_symbols(self) -> List[str]:
         """
@@ -53,57 +169,171 @@ class PlotterDataClass:
             self._val_data,
         ]
         for series in time_series:
-            series_symbols = series["symbol"].ravel() if series is not None else None
-            if series_symbols is not None:
-                for symbol in series_symbols:
-                    symbol_set.add(symbol)
+            if series is not None:
+                symbol_set.update(np.unique(np.asarray(series["symbol"])).tolist())
+        for run in self._sim_runs.values():
+            symbol_set.update(run.get_symbols())
 
         return list(symbol_set)
 
+    def add_sim_run(self, name: str, run: PlotterDataClass):
+        """
+        Attach a named simulation run: its fills (fill_data_sim), orders and valuations,
+        plotted over this dataclass's market data. Only the run's own events are stored,
+        so many runs of a parameter sweep share one loaded copy of the quotes and trades.
+
+        Args:
+            name (str): run name (replaces any run of the same name).
+            run (PlotterDataClass): the run's series, e.g.
+                PlotterDataClass.from_arrays(fill_data_sim=fills, orders=orders, val_data=val).
+
+        Raises:
+            Exception: the run carries other series than SIM_RUN_SERIES, or none of them.
+        """
+        extra = [
+            series
+            for series in SERIES_COLUMNS
+            if series not in SIM_RUN_SERIES and getattr(run, "_" + series) is not None
+        ]
+        if extra:
+            raise Exception(f"sim run:{name} can only set {SIM_RUN_SERIES}, got {extra}")
+        if all(getattr(run, "_" + series) is None for series in SIM_RUN_SERIES):
+            raise Exception(f"sim run:{name} has no series set")
+        self._sim_runs[name] = run
+
+    def remove_sim_run(self, name: str):
+        """
+        Detach a simulation run.
+
+        Args:
+            name (str): run name.
+
+        Raises:
+            Exception: unknown run.
+        """
+        if name not in self._sim_runs:
+            raise Exception(f"unknown sim run: {name}")
+        del self._sim_runs[name]
+
+    def sim_run(self, name: str) -> PlotterDataClass:
+        """
+        Args:
+            name (str): run name.
+
+        Raises:
+            Exception: unknown run.
+
+        Returns:
+            PlotterDataClass: the run's series.
+        """
+        if name not in self._sim_runs:
+            raise Exception(f"unknown sim run: {name}")
+        return self._sim_runs[name]
+
+    @property
+    def sim_runs(self) -> List[str]:
+        """
+        Returns:
+            List[str]: names of the attached simulation runs, in the order added.
+        """
+        return list(self._sim_runs)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        quote_data: SeriesInput = None,
+        trade_data: SeriesInput = None,
+        fill_data_sim: SeriesInput = None,
+        fill_data_prod: SeriesInput = None,
+        orders: SeriesInput = None,
+        val_data: SeriesInput = None,
+    ) -> PlotterDataClass:
+        """
+        Build a PlotterDataClass straight from NumPy data, without pandas.
+
+        Each series is a dict of NumPy arrays or a NumPy structured array,
+        validated against microplot.schema. Input arrays are not modified.
+
+        Returns:
+            PlotterDataClass: dataclass for plotting object.
+        """
+        data = cls()
+        series_inputs = {
+            "quote_data": quote_data,
+            "trade_data": trade_data,
+            "fill_data_sim": fill_data_sim,
+            "fill_data_prod": fill_data_prod,
+            "orders": orders,
+            "val_data": val_data,
+        }
+        for name, series in series_inputs.items():
+            if series is not None:
+                setattr(data, name, series)
+        return data
+
     @staticmethod
-    def _validate_timestamps(timeseries: pd.Series) -> bool:
+    def _validate_timestamps(timeseries: Union[pd.Series, np.ndarray]) -> bool:
         """
         Timestamps should be EPOCH nanosecond precision, integer timestamps.
 
         This equates to 19 digit ints.
 
         Args:
-            ts (pd.Series): pandas Series object containing timestamps.
+            ts (Union[pd.Series, np.ndarray]): Series or array containing timestamps.
 
         Returns:
             bool: true/false indicating whether timestamps are valid.
         """
-        return all(timeseries.apply(lambda x: len(list(str(x))) == 19)) == True
+        values = np.asarray(timeseries)
+        if not np.issubdtype(values.dtype, np.integer) or values.dtype.itemsize < 8:
+            return len(values) == 0
+        return bool(np.all(values >= 10**18) and np.all(values // 10 < 10**18))
 
     @staticmethod
-    def _convert_timestamps(timeseries: pd.Series) -> pd.Series:
+    def _convert_timestamps(
+        timeseries: Union[pd.Series, np.ndarray]
+    ) -> Union[pd.Series, np.ndarray]:
         """
         Convert timestamps from nanosecond ints -> second-level floats.
 
         Args:
-            ts (pd.Series): pandas Series object containing timestamps.
+            ts (Union[pd.Series, np.ndarray]): Series or array containing timestamps.
 
         Returns:
-            pd.Series: converted timeseries.
+            Union[pd.Series, np.ndarray]: converted timeseries.
         """
-        return timeseries.apply(lambda x: x * 1e-9)
+        return timeseries * 1e-9
 
     @classmethod
-    def _check_columns(cls, columns: List[str], data: pd.DataFrame, name: str):
+    def _check_columns(
+        cls, columns: List[str], data: SeriesInput, name: str
+    ) -> Union[pd.DataFrame, ColumnFrame]:
         """
-        Checks a pandas dataframe timeseries that it contains the required fields
+        Checks a timeseries that it contains the required fields
         prior to setting the value. Also sanity-checks the timestamps are valid.
 
+        pandas dataframes are converted in place (as before); NumPy inputs are
+        wrapped in a ColumnFrame without copying, and only the timestamp column is replaced.
+
         Args:
             columns (List[str]): Names of required columns for data schema.
-            data (pd.DataFrame): Pandas dataframe containing time series.
+            data (SeriesInput): DataFrame, ColumnFrame, dict of arrays or structured array.
             name (str): Name of time series to be set.
 
         Raises:
             Exception: Required column not found.
+
+        Returns:
+            Union[pd.DataFrame, ColumnFrame]: the validated time series.
         """
 
-        assert type(data) is pd.DataFrame
+        if not _is_dataframe(data):
+            data = ColumnFrame.from_arrays(data)
+
+        # derive missing required columns from optional ones (e.g. micro_price from sizes)
+        for column, (function, inputs) in DERIVABLE_COLUMNS.get(name, {}).items():
+            if column not in data.columns and all(i in data.columns for i in inputs):
+                data[column] = function(*[np.asarray(data[i]) for i in inputs])
 
         for column in columns:
             if column not in data.columns:
@@ -113,8 +343,400 @@ class PlotterDataClass:
 
         assert cls._validate_timestamps(data["timestamp"])
 
+        # keep the exact nanosecond timestamps alongside the converted ones
+        data["timestamp_ns"] = np.asarray(data["timestamp"]).astype(np.int64, copy=False)
         data["timestamp"] = cls._convert_timestamps(data["timestamp"])
 
+        return data
+
+    @staticmethod
+    def _duplicate_rows(data: Union[pd.DataFrame, ColumnFrame]) -> np.ndarray:
+        """
+        Flag exact-duplicate events in a timestamp-sorted series.
+
+        Only rows sharing a timestamp with a neighbour can be duplicates, so just those
+        are grouped by (timestamp, symbol) and compared to their predecessor in every column.
+
+        Args:
+            data (Union[pd.DataFrame, ColumnFrame]): timestamp-sorted series.
+
+        Returns:
+            np.ndarray: boolean mask of rows identical to an earlier row.
+        """
+        timestamps = np.asarray(data["timestamp_ns"])
+        duplicates = np.zeros(len(timestamps), dtype=bool)
+        tied = np.zeros(len(timestamps), dtype=bool)
+        same_time = timestamps[1:] == timestamps[:-1]
+        tied[1:] |= same_time
+        tied[:-1] |= same_time
+        rows = np.flatnonzero(tied)
+        if len(rows) == 0:
+            return duplicates
+
+        _, symbol_codes = np.unique(np.asarray(data["symbol"])[rows], return_inverse=True)
+        rows = rows[np.lexsort((rows, symbol_codes, timestamps[rows]))]
+        identical = np.ones(len(rows) - 1, dtype=bool)
+        for column in data.columns:
+            values = np.asarray(data[column])[rows]
+            identical &= values[1:] == values[:-1]
+        duplicates[rows[1:][identical]] = True
+        return duplicates
+
+    @classmethod
+    def _order_events(
+        cls, data: Union[pd.DataFrame, ColumnFrame], drop_duplicates: bool = True
+    ) -> Tuple[Union[pd.DataFrame, ColumnFrame], OrderingReport]:
+        """
+        Ordering stage: guarantee timestamps are sorted (and so sorted per symbol).
+
+        Sorted input is detected in one vectorized pass and left untouched. Otherwise
+        the series is repaired with a stable sort, which merges the existing sorted runs
+        rather than re-sorting (nearly sorted input costs close to a linear pass), and
+        keeps the arrival order of events sharing a timestamp.
+
+        Args:
+            data (Union[pd.DataFrame, ColumnFrame]): validated time series.
+            drop_duplicates (bool): drop exact-duplicate events. Default = True.
+
+        Returns:
+            Tuple[Union[pd.DataFrame, ColumnFrame], OrderingReport]: ordered series, report.
+        """
+        timestamps = np.asarray(data["timestamp_ns"])
+        report = OrderingReport(rows=len(timestamps))
+
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind="stable")
+
+            # measure the disorder per symbol, over the rows the sort moves only: the
+            # rows before them are the earliest events and the rows after the latest
+            moved = np.flatnonzero(order != np.arange(len(order)))
+            region = slice(moved[0], moved[-1] + 1)
+            region_timestamps = timestamps[region]
+            _, symbol_codes = np.unique(np.asarray(data["symbol"])[region], return_inverse=True)
+            region_order = order[region] - moved[0]
+            before = np.argsort(symbol_codes, kind="stable")
+            after = region_order[np.argsort(symbol_codes[region_order], kind="stable")]
+            same_symbol = symbol_codes[before][1:] == symbol_codes[before][:-1]
+            report.unsorted_runs = int(
+                np.count_nonzero(
+                    same_symbol & (region_timestamps[before][1:] < region_timestamps[before][:-1])
+                )
+            )
+            # position of each row in time order, by symbol then arrival. The rows split
+            # into stretches wherever every row so far belongs before every row after;
+            # within a stretch a row is late if an earlier arrival is after it in time,
+            # early if a later one is before it, and the fewer of the two were displaced
+            position = np.empty(len(after), dtype=np.int64)
+            position[after] = np.arange(len(after))
+            position = position[before]
+            reach = np.maximum.accumulate(position)
+            late = position < reach
+            early = position > np.minimum.accumulate(position[::-1])[::-1]
+            stretch = np.concatenate([[0], np.cumsum(reach[:-1] == np.arange(len(reach) - 1))])
+            report.reordered = int(
+                np.minimum(np.bincount(stretch, weights=late), np.bincount(stretch, weights=early)).sum()
+            )
+
+            data = _take_rows(data, order)
+
+        duplicates = cls._duplicate_rows(data)
+        report.duplicates = int(np.count_nonzero(duplicates))
+        if report.duplicates and drop_duplicates:
+            report.dropped = report.duplicates
+            data = _take_rows(data, np.flatnonzero(~duplicates))
+
+        return data, report
+
+    def _prepare_series(
+        self, columns: List[str], data: SeriesInput, name: str
+    ) -> Union[pd.DataFrame, ColumnFrame]:
+        """
+        Validate a series (see _check_columns) and run the ordering stage on it.
+
+        Args:
+            columns (List[str]): Names of required columns for data schema.
+            data (SeriesInput): DataFrame, ColumnFrame, dict of arrays or structured array.
+            name (str): Name of time series to be set.
+
+        Returns:
+            Union[pd.DataFrame, ColumnFrame]: the validated, ordered time series.
+        """
+        data = self._check_columns(columns, data, name)
+        data, self._ordering_reports[name] = self._order_events(data, self.drop_duplicates)
+        self._versions[name] = self._versions.get(name, 0) + 1
+        return data
+
+    def take_series(self, other: PlotterDataClass, name: str):
+        """
+        Set a series from another dataclass, where it was validated and ordered already
+        (e.g. on a loading thread): the series is not copied, and its symbol grouping is
+        kept if built.
+
+        Args:
+            other (PlotterDataClass): dataclass holding the series.
+            name (str): Name of time series to be set.
+
+        Raises:
+            Exception: the series is not set in other.
+        """
+        series = getattr(other, "_" + name)
+        if series is None:
+            raise Exception(f"{name} is not set")
+        setattr(self, "_" + name, series)
+        self._ordering_reports[name] = other._ordering_reports[name]
+        self._versions[name] = self._versions.get(name, 0) + 1
+        for stale in [key for key in self._symbol_rows if key[0] == name]:
+            del self._symbol_rows[stale]
+        grouping = other._symbol_rows.get((name, other._versions.get(name, 0)))
+        if grouping is not None:
+            self._symbol_rows[(name, self._versions[name])] = grouping
+
+    def set_clock_correction(
+        self, series: str, correction: Optional[ClockCorrection], symbol: Optional[str] = None
+    ):
+        """
+        Correct the clock of a series (or of one symbol's rows of it): its timestamps are read
+        through the correction from now on (plots, queries, derived series, filters, the
+        order ladder, exports). The loaded timestamps are not rewritten, so this is instant
+        and can be changed any time; the series need not be set yet.
+
+        Args:
+            series (str): Name of time series.
+            correction (Optional[ClockCorrection]): correction (None = remove it).
+            symbol (Optional[str]): only this symbol's rows (overrides the series' correction).
+                Default = every symbol.
+
+        Raises:
+            Exception: unknown series.
+        """
+        if series not in SERIES_COLUMNS:
+            raise Exception(f"unknown series: {series}")
+        if correction is None:
+            self._clock_corrections.pop((series, symbol), None)
+        else:
+            self._clock_corrections[(series, symbol)] = correction
+        self._clock_versions[series] = self._clock_versions.get(series, 0) + 1
+
+    def clock_correction(self, series: str, symbol: str) -> Optional[ClockCorrection]:
+        """
+        Args:
+            series (str): Name of time series.
+            symbol (str): The symbol of interest.
+
+        Returns:
+            Optional[ClockCorrection]: the correction of the symbol's rows (None = as loaded).
+        """
+        return correction_for(self._clock_corrections, series, symbol)
+
+    def _clock_corrected(self, name: str) -> bool:
+        """
+        Args:
+            name (str): Name of time series.
+
+        Returns:
+            bool: some rows of the series have a clock correction.
+        """
+        return any(series == name for series, _ in self._clock_corrections)
+
+    def _timestamps(self, name: str, symbol: str, rows: np.ndarray, ns: bool = False) -> np.ndarray:
+        """
+        Clock-corrected timestamps of rows of a symbol within a series.
+
+        Args:
+            name (str): Name of time series.
+            symbol (str): The symbol of interest.
+            rows (np.ndarray): row indices (rows of the symbol).
+            ns (bool): int64 ns timestamps instead of EPOCH seconds. Default = False.
+
+        Returns:
+            np.ndarray: timestamps.
+        """
+        timestamps = np.asarray(getattr(self, "_" + name)["timestamp_ns" if ns else "timestamp"])[rows]
+        correction = self.clock_correction(name, symbol)
+        if correction is None:
+            return timestamps
+        return correction.apply_ns(timestamps) if ns else correction.apply(timestamps)
+
+    def _input_versions(self, names: List[str]) -> tuple:
+        """
+        Versions of input series (data and clock corrections), to invalidate memoized results.
+
+        Args:
+            names (List[str]): Names of time series.
+
+        Returns:
+            tuple: (version, clock version) per series.
+        """
+        return tuple((self._versions.get(name, 0), self._clock_versions.get(name, 0)) for name in names)
+
+    @property
+    def ordering_reports(self) -> Dict[str, OrderingReport]:
+        """
+        Ordering stage reports property getter.
+
+        Returns:
+            Dict[str, OrderingReport]: series name -> ordering report.
+        """
+        return self._ordering_reports
+
+    def _rows(self, name: str, symbol: str) -> np.ndarray:
+        """
+        Row indices of a symbol within a series, in timestamp order.
+        Grouped once per series version.
+
+        Args:
+            name (str): Name of time series.
+            symbol (str): The symbol of interest.
+
+        Returns:
+            np.ndarray: row indices.
+        """
+        key = (name, self._versions.get(name, 0))
+        if key not in self._symbol_rows:
+            # drop groupings of older versions
+            for stale in [k for k in self._symbol_rows if k[0] == name]:
+                del self._symbol_rows[stale]
+            symbols, codes = np.unique(
+                np.asarray(getattr(self, "_" + name)["symbol"]), return_inverse=True
+            )
+            # series are timestamp-sorted, so a stable sort by symbol keeps time order
+            rows = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[rows], np.arange(len(symbols) + 1))
+            self._symbol_rows[key] = {
+                symbol: rows[bounds[code] : bounds[code + 1]]
+                for code, symbol in enumerate(symbols)
+            }
+        return self._symbol_rows[key].get(symbol, np.empty(0, dtype=np.int64))
+
+    def _collapse_quotes(self) -> Tuple[Dict[str, np.ndarray], CollapseReport]:
+        """
+        Run-length collapse of the quote series, for every symbol in one vectorized pass.
+        Memoized per quote_data version.
+        """
+        version = self._versions.get("quote_data", 0)
+        if self._collapsed_quotes is None or self._collapsed_quotes[0] != version:
+            frame = self._quote_data
+            symbols, codes = np.unique(np.asarray(frame["symbol"]), return_inverse=True)
+            # series are timestamp-sorted, so a stable sort by symbol keeps time order
+            rows = np.argsort(codes, kind="stable")
+            codes = codes[rows]
+
+            # a row starts a run if it is a symbol's first row, or a plotted field changed
+            starts = np.ones(len(rows), dtype=bool)
+            same = codes[1:] == codes[:-1]
+            for column in PLOTTED_QUOTE_COLUMNS:
+                values = np.asarray(frame[column])[rows]
+                unchanged = values[1:] == values[:-1]
+                if values.dtype.kind == "f":
+                    unchanged |= np.isnan(values[1:]) & np.isnan(values[:-1])
+                same &= unchanged
+            starts[1:] = ~same
+            # a symbol's last row is kept too, so its final hold keeps its extent
+            ends = np.ones(len(rows), dtype=bool)
+            ends[:-1] = codes[1:] != codes[:-1]
+            kept = np.flatnonzero(starts | ends)
+
+            bounds = np.searchsorted(codes[kept], np.arange(len(symbols) + 1))
+            collapsed = {
+                symbol: rows[kept[bounds[code] : bounds[code + 1]]]
+                for code, symbol in enumerate(symbols)
+            }
+            self._collapsed_quotes = (version, collapsed, CollapseReport(len(rows), len(kept)))
+        return self._collapsed_quotes[1], self._collapsed_quotes[2]
+
+    def collapsed_quote_rows(self, symbol: str) -> np.ndarray:
+        """
+        Quote rows of a symbol that change a plotted field (bid, ask or micro price): the
+        first row of each run of identical rows, and the symbol's last row. Drawing only
+        these with "connectedhold" lines gives the exact same steps as drawing every row.
+
+        The result maps the collapsed rows back to rows of the quote series, for export
+        and inspection.
+
+        Args:
+            symbol (str): The symbol of interest.
+
+        Raises:
+            Exception: quote_data is not set.
+
+        Returns:
+            np.ndarray: row indices, in timestamp order.
+        """
+        if self._quote_data is None:
+            raise Exception("quote_data is not set")
+        collapsed, _ = self._collapse_quotes()
+        return collapsed.get(symbol, np.empty(0, dtype=np.int64))
+
+    @property
+    def collapse_report(self) -> CollapseReport:
+        """
+        Quote run-length collapse report.
+
+        Raises:
+            Exception: quote_data is not set.
+
+        Returns:
+            CollapseReport: rows, rows kept and reduction ratio.
+        """
+        if self._quote_data is None:
+            raise Exception("quote_data is not set")
+        return self._collapse_quotes()[1]
+
+    def derived_series(self) -> List[str]:
+        """
+        Names of the registered derived series whose inputs are set (see microplot.derived).
+
+        Returns:
+            List[str]: available derived series.
+        """
+        available = []
+        for name, spec in DERIVED_SERIES.items():
+            frames = [getattr(self, "_" + series) for series in spec.inputs]
+            if all(
+                frame is not None and all(column in frame.columns for column in columns)
+                for frame, columns in zip(frames, spec.inputs.values())
+            ):
+                available.append(name)
+        return available
+
+    def derived(self, name: str, symbol: str) -> Dict[str, np.ndarray]:
+        """
+        Compute a derived series for one symbol (see microplot.derived).
+
+        Results are memoized, and recomputed only once one of the input series is set again
+        (or its clock correction changes).
+
+        Args:
+            name (str): derived series name.
+            symbol (str): The symbol of interest.
+
+        Raises:
+            Exception: unknown derived series, or its inputs are not set.
+
+        Returns:
+            Dict[str, np.ndarray]: "timestamp" and "value" (or "low" / "high" for bands) columns.
+        """
+        if name not in DERIVED_SERIES:
+            raise Exception(f"unknown derived series: {name}")
+        if name not in self.derived_series():
+            raise Exception(f"inputs of derived series:{name} are not set")
+        spec = DERIVED_SERIES[name]
+
+        versions = self._input_versions(list(spec.inputs))
+        cached = self._derived_cache.get((name, symbol))
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+
+        inputs = {}
+        for series, columns in spec.inputs.items():
+            frame = getattr(self, "_" + series)
+            rows = self._rows(series, symbol)
+            inputs[series] = {column: np.asarray(frame[column])[rows] for column in columns}
+            inputs[series]["timestamp"] = self._timestamps(series, symbol, rows)
+        result = spec.compute(inputs)
+        self._derived_cache[(name, symbol)] = (versions, result)
+        return result
+
     @property
     def quote_data(self) -> pd.DataFrame:
         """
@@ -126,17 +748,17 @@ class PlotterDataClass:
         return self._quote_data
 
     @quote_data.setter
-    def quote_data(self, data: pd.DataFrame):
+    def quote_data(self, data: SeriesInput):
         """
         Quote data property setter.
 
         Args:
-            data (pd.DataFrame): Quote data.
+            data (SeriesInput): Quote data.
         """
         # timestamp, symbol, bid_price, ask_price, micro_price
+        # optional: bid_size, ask_size (micro_price is derived from them when absent)
 
-        self._check_columns(QUOTE_DATA_COLUMNS, data, "quote_data")
-        self._quote_data = data
+        self._quote_data = self._prepare_series(QUOTE_DATA_COLUMNS, data, "quote_data")
 
     @property
     def trade_data(self) -> pd.DataFrame:
@@ -149,17 +771,16 @@ class PlotterDataClass:
         return self._trade_data
 
     @trade_data.setter
-    def trade_data(self, data: pd.DataFrame):
+    def trade_data(self, data: SeriesInput):
         """
         Trade data property setter.
 
         Args:
-            data (pd.DataFrame): Trade data.
+            data (SeriesInput): Trade data.
         """
         # timestamp, symbol, price
 
-        self._check_columns(TRADE_DATA_COLUMNS, data, "trade_data")
-        self._trade_data = data
+        self._trade_data = self._prepare_series(TRADE_DATA_COLUMNS, data, "trade_data")
 
     @property
     def fill_data_sim(
@@ -197,17 +818,16 @@ class PlotterDataClass:
         )
 
     @fill_data_sim.setter
-    def fill_data_sim(self, data: pd.DataFrame):
+    def fill_data_sim(self, data: SeriesInput):
         """
         Fill data property setter.
 
         Args:
-            data (pd.DataFrame): Fill data.
+            data (SeriesInput): Fill data.
         """
         # timestamp, symbol, price, is_buy, is_aggressive
 
-        self._check_columns(FILL_DATA_COLUMNS, data, "fill_data_sim")
-        self._fill_data_sim = data
+        self._fill_data_sim = self._prepare_series(FILL_DATA_COLUMNS, data, "fill_data_sim")
 
     @property
     def fill_data_prod(
@@ -245,17 +865,16 @@ class PlotterDataClass:
 
 
     @fill_data_prod.setter
-    def fill_data_prod(self, data: pd.DataFrame):
+    def fill_data_prod(self, data: SeriesInput):
         """
         Fill data property setter.
 
         Args:
-            data (pd.DataFrame): Fill data.
+            data (SeriesInput): Fill data.
         """
         # timestamp, symbol, price, is_buy, is_aggressive
 
-        self._check_columns(FILL_DATA_COLUMNS, data, "fill_data_prod")
-        self._fill_data_prod = data
+        self._fill_data_prod = self._prepare_series(FILL_DATA_COLUMNS, data, "fill_data_prod")
 
     @property
     def orders(
@@ -283,17 +902,16 @@ class PlotterDataClass:
         return new_orders, new_order_acks, cancel_orders, cancel_orders_acks, rejects
 
     @orders.setter
-    def orders(self, data: pd.DataFrame):
+    def orders(self, data: SeriesInput):
         """
         Order data property setter.
 
         Args:
-            data (pd.DataFrame): Order data.
+            data (SeriesInput): Order data.
         """
         # timestamp, symbol, price, is_new, is_cancel, is_reject, is_ack
 
-        self._check_columns(ORDERS_DATA_COLUMNS, data, "orders")
-        self._orders = data
+        self._orders = self._prepare_series(ORDERS_DATA_COLUMNS, data, "orders")
 
     @property
     def val_data(self) -> pd.DataFrame:
@@ -307,14 +925,14 @@ class PlotterDataClass:
 
 
     @val_data.setter
-    def val_data(self, data: pd.DataFrame):
+    def val_data(self, data: SeriesInput):
         """
         Valuation data property setter.
 
         Args:
-            data (pd.DataFrame): Val data.
+            data (SeriesInput): Val data.
         """
         # timestamp, symbol, theo_price
+        # optional: bid_edge, ask_edge
 
-        self._check_columns(VAL_DATA_COLUMNS, data, "val_data")
-        self._val_data = data
\ No newline at end of file
+        self._val_data = self._prepare_series(VAL_DATA_COLUMNS, data, "val_data")
\ No newline at end of file
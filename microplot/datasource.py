@@ -0,0 +1,567 @@
+"""
+This module contains the DataSource protocol used by the plotter to run range queries,
+along with its backends (in-memory, memory-mapped columnar, sqlite) and an async query runner.
+
+NOTE: All timestamps crossing this interface are EPOCH second-level floats,
+the same units PlotterDataClass converts to and the plotter draws in.
+"""
+
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os.path
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from microplot.data import PlotterDataClass
+from microplot.schema import SERIES_COLUMNS
+
+
+def _value_columns(series: str) -> List[str]:
+    """
+    Columns returned by a query for a series (everything but the symbol).
+
+    Args:
+        series (str): name of the series.
+
+    Returns:
+        List[str]: column names.
+    """
+    return [column for column in SERIES_COLUMNS[series] if column != "symbol"]
+
+
+def _window(timestamps: np.ndarray, t0: Optional[float], t1: Optional[float]) -> slice:
+    """
+    Find the row slice of a sorted timestamp array covering [t0, t1].
+
+    The last row before t0 is included so "hold" style renderers
+    start the window with the correct value.
+
+    Args:
+        timestamps (np.ndarray): sorted timestamps.
+        t0 (Optional[float]): window start (None = unbounded).
+        t1 (Optional[float]): window end (None = unbounded).
+
+    Returns:
+        slice: slice into the timestamp array.
+    """
+    start = 0 if t0 is None else max(np.searchsorted(timestamps, t0, side="left") - 1, 0)
+    stop = len(timestamps) if t1 is None else np.searchsorted(timestamps, t1, side="right")
+    return slice(start, stop)
+
+
+def _decimate(columns: Dict[str, np.ndarray], max_points: Optional[int]) -> Dict[str, np.ndarray]:
+    """
+    Stride-decimate query columns down to at most max_points rows.
+    The first and last rows are always kept.
+
+    Args:
+        columns (Dict[str, np.ndarray]): query result.
+        max_points (Optional[int]): maximum number of rows (None = no limit).
+
+    Returns:
+        Dict[str, np.ndarray]: decimated query result.
+    """
+    num_rows = len(columns["timestamp"])
+    if max_points is None or num_rows <= max_points:
+        return columns
+    rows = np.unique(np.linspace(0, num_rows - 1, max_points).astype(np.int64))
+    return {name: values[rows] for name, values in columns.items()}
+
+
+class DataSource(ABC):
+    """
+    Range-query protocol the plotter calls on demand as the view changes.
+
+    Series names follow the PlotterDataClass properties (see microplot.schema.SERIES_COLUMNS).
+    """
+
+    # default row cap per query; None means full fidelity
+    default_max_points: Optional[int] = None
+
+    @abstractmethod
+    def series(self) -> List[str]:
+        """
+        Returns:
+            List[str]: names of the series available in this source.
+        """
+
+    @abstractmethod
+    def symbols(self) -> List[str]:
+        """
+        Returns:
+            List[str]: list of symbols found across all data series.
+        """
+
+    @abstractmethod
+    def time_bounds(self) -> Tuple[float, float]:
+        """
+        Returns:
+            Tuple[float, float]: (first, last) timestamp across all data series.
+        """
+
+    @abstractmethod
+    def query(
+        self,
+        series: str,
+        symbol: str,
+        t0: Optional[float] = None,
+        t1: Optional[float] = None,
+        max_points: Optional[int] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Query the rows of a series for one symbol, sorted by timestamp.
+
+        Args:
+            series (str): name of the series.
+            symbol (str): The symbol of interest.
+            t0 (Optional[float]): window start (None = unbounded).
+            t1 (Optional[float]): window end (None = unbounded).
+            max_points (Optional[int]): maximum number of rows returned (None = no limit).
+
+        Returns:
+            Dict[str, np.ndarray]: column name -> values (symbol column omitted).
+        """
+
+
+class DataFrameDataSource(DataSource):
+    """
+    DataSource over the in-memory series of a PlotterDataClass.
+    """
+
+    def __init__(self, data: PlotterDataClass, collapse_quotes: bool = False):
+        """
+        Args:
+            data (PlotterDataClass): dataclass for plotting object.
+            collapse_quotes (bool): return only the quote rows that change a plotted field
+                (see PlotterDataClass.collapsed_quote_rows). Default = False.
+        """
+        self._data = data
+        self._collapse_quotes = collapse_quotes
+
+    @property
+    def data(self) -> PlotterDataClass:
+        """
+        Returns:
+            PlotterDataClass: the wrapped dataclass.
+        """
+        return self._data
+
+    def _frame(self, series: str):
+        return getattr(self._data, "_" + series)
+
+    def series(self) -> List[str]:
+        return [series for series in SERIES_COLUMNS if self._frame(series) is not None]
+
+    def symbols(self) -> List[str]:
+        return self._data.get_symbols()
+
+    def time_bounds(self) -> Tuple[float, float]:
+        lows, highs = [], []
+        for series in self.series():
+            timestamps = np.asarray(self._frame(series)["timestamp"])
+            if not self._data._clock_corrected(series):
+                if len(timestamps):
+                    lows.append(timestamps.min())
+                    highs.append(timestamps.max())
+                continue
+            # clock-corrected: first and last row of each symbol
+            for symbol in self.symbols():
+                rows = self._rows(series, symbol)
+                if len(rows):
+                    ends = self._data._timestamps(series, symbol, rows[[0, -1]])
+                    lows.append(ends[0])
+                    highs.append(ends[1])
+        return min(lows), max(highs)
+
+    def _rows(self, series: str, symbol: str) -> np.ndarray:
+        """
+        Row indices of a symbol within a series, ordered by timestamp.
+        Series are timestamp-ordered when set, so this is the dataclass's own grouping
+        (built once per series version, possibly on the thread that loaded it).
+        """
+        return self._data._rows(series, symbol)
+
+    def query(self, series, symbol, t0=None, t1=None, max_points=None):
+        frame = self._frame(series)
+        if series == "quote_data" and self._collapse_quotes:
+            rows = self._data.collapsed_quote_rows(symbol)
+        else:
+            rows = self._rows(series, symbol)
+        correction = self._data.clock_correction(series, symbol)
+        if correction is not None:
+            # window the raw timestamps on the raw bounds: only the rows returned are corrected
+            t0 = None if t0 is None else correction.invert(t0)
+            t1 = None if t1 is None else correction.invert(t1)
+        window = _window(np.asarray(frame["timestamp"])[rows], t0, t1)
+        rows = rows[window]
+        columns = {
+            column: np.asarray(frame[column])[rows] for column in _value_columns(series)
+        }
+        columns = _decimate(columns, max_points)
+        if correction is not None:
+            columns["timestamp"] = correction.apply(columns["timestamp"])
+        return columns
+
+
+class MemmapDataSource(DataSource):
+    """
+    DataSource over a memory-mapped columnar store on disk.
+
+    Layout: <directory>/<series>/<column>.npy with rows sorted by (symbol, timestamp),
+    and <directory>/<series>/symbols.json mapping symbol -> [start, stop) row offsets.
+    Timestamps are stored as EPOCH nanosecond ints, and converted to seconds on query.
+    """
+
+    default_max_points = 20000
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory (str): root directory of the store.
+
+        Raises:
+            Exception: directory is not a columnar store.
+        """
+        if not os.path.isdir(directory):
+            raise Exception(f"{directory} is not a columnar store directory.")
+
+        self._columns = {}
+        self._offsets = {}
+        for series in SERIES_COLUMNS:
+            series_dir = os.path.join(directory, series)
+            if not os.path.isdir(series_dir):
+                continue
+            with open(os.path.join(series_dir, "symbols.json")) as file:
+                self._offsets[series] = json.load(file)
+            self._columns[series] = {
+                column: np.load(os.path.join(series_dir, column + ".npy"), mmap_mode="r")
+                for column in _value_columns(series)
+            }
+
+    @staticmethod
+    def write(data: PlotterDataClass, directory: str) -> "MemmapDataSource":
+        """
+        Write the series of a PlotterDataClass into a columnar store.
+
+        Args:
+            data (PlotterDataClass): dataclass for plotting object.
+            directory (str): root directory of the store.
+
+        Returns:
+            MemmapDataSource: source opened over the new store.
+        """
+        for series in SERIES_COLUMNS:
+            frame = getattr(data, "_" + series)
+            if frame is None:
+                continue
+            series_dir = os.path.join(directory, series)
+            os.makedirs(series_dir, exist_ok=True)
+
+            symbols, codes = np.unique(np.asarray(frame["symbol"]), return_inverse=True)
+            timestamps = np.asarray(frame["timestamp_ns"])
+            rows = np.lexsort((timestamps, codes))
+            bounds = np.searchsorted(codes[rows], np.arange(len(symbols) + 1))
+            offsets = {
+                str(symbol): [int(bounds[code]), int(bounds[code + 1])]
+                for code, symbol in enumerate(symbols)
+            }
+            with open(os.path.join(series_dir, "symbols.json"), "w") as file:
+                json.dump(offsets, file)
+            for column in _value_columns(series):
+                # the exact ns ints, not the float seconds (only ~100ns precise at current epochs)
+                values = timestamps if column == "timestamp" else np.asarray(frame[column])
+                np.save(os.path.join(series_dir, column + ".npy"), values[rows])
+
+        return MemmapDataSource(directory)
+
+    def series(self) -> List[str]:
+        return list(self._columns)
+
+    def symbols(self) -> List[str]:
+        symbol_set = set()
+        for offsets in self._offsets.values():
+            symbol_set.update(offsets)
+        return list(symbol_set)
+
+    def time_bounds(self) -> Tuple[float, float]:
+        lows, highs = [], []
+        for series, offsets in self._offsets.items():
+            timestamps = self._columns[series]["timestamp"]
+            for start, stop in offsets.values():
+                if stop > start:
+                    lows.append(int(timestamps[start]))
+                    highs.append(int(timestamps[stop - 1]))
+        return min(lows) * 1e-9, max(highs) * 1e-9
+
+    def query(self, series, symbol, t0=None, t1=None, max_points=None):
+        start, stop = self._offsets[series].get(symbol, (0, 0))
+        columns = self._columns[series]
+        window = _window(
+            columns["timestamp"][start:stop],
+            None if t0 is None else int(t0 * 1e9),
+            None if t1 is None else int(t1 * 1e9),
+        )
+        rows = slice(start + window.start, start + window.stop)
+        result = {column: values[rows] for column, values in columns.items()}
+        # only the (decimated) window is read from disk
+        result = {column: np.array(values) for column, values in _decimate(result, max_points).items()}
+        result["timestamp"] = result["timestamp"] * 1e-9
+        return result
+
+
+class SQLiteDataSource(DataSource):
+    """
+    DataSource over a local sqlite database, one table per series,
+    indexed on (symbol, timestamp). Timestamps are stored as EPOCH nanosecond ints.
+    """
+
+    default_max_points = 20000
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): sqlite database file.
+
+        Raises:
+            Exception: database file does not exist.
+        """
+        if not os.path.isfile(path):
+            raise Exception(f"{path} does not exist.")
+        self._path = path
+        with self._connect() as connection:
+            tables = {
+                row[0]
+                for row in connection.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            }
+        self._series = [series for series in SERIES_COLUMNS if series in tables]
+
+    def _connect(self) -> sqlite3.Connection:
+        # one connection per call: queries run on worker threads
+        return sqlite3.connect(self._path)
+
+    @staticmethod
+    def write(data: PlotterDataClass, path: str) -> "SQLiteDataSource":
+        """
+        Write the series of a PlotterDataClass into a sqlite database.
+
+        Args:
+            data (PlotterDataClass): dataclass for plotting object.
+            path (str): sqlite database file.
+
+        Returns:
+            SQLiteDataSource: source opened over the new database.
+        """
+        connection = sqlite3.connect(path)
+        with connection:
+            for series in SERIES_COLUMNS:
+                frame = getattr(data, "_" + series)
+                if frame is not None:
+                    SQLiteDataSource.append(connection, series, frame)
+            SQLiteDataSource.create_indexes(connection)
+        connection.close()
+        return SQLiteDataSource(path)
+
+    @staticmethod
+    def append(connection: sqlite3.Connection, series: str, frame):
+        """
+        Append the rows of a (validated) series frame to its table, creating it if needed.
+
+        Args:
+            connection (sqlite3.Connection): open database connection.
+            series (str): name of the series.
+            frame: validated series frame (see PlotterDataClass).
+        """
+        columns = SERIES_COLUMNS[series]
+        column_defs = ", ".join(
+            f"{column} {'INTEGER' if column == 'timestamp' or column.startswith('is_') else 'TEXT' if column == 'symbol' else 'REAL'}"
+            for column in columns
+        )
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {series} ({column_defs})")
+
+        values = []
+        for column in columns:
+            # the exact ns ints, not the float seconds (only ~100ns precise at current epochs)
+            column_values = np.asarray(frame["timestamp_ns" if column == "timestamp" else column])
+            values.append(column_values.tolist())
+        connection.executemany(
+            f"INSERT INTO {series} VALUES ({', '.join('?' * len(columns))})",
+            zip(*values),
+        )
+
+    @staticmethod
+    def create_indexes(connection: sqlite3.Connection):
+        """
+        Create the (symbol, timestamp) index on every series table.
+
+        Args:
+            connection (sqlite3.Connection): open database connection.
+        """
+        for (table,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ).fetchall():
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_symbol_timestamp ON {table} (symbol, timestamp)"
+            )
+
+    def series(self) -> List[str]:
+        return list(self._series)
+
+    def symbols(self) -> List[str]:
+        symbol_set = set()
+        with self._connect() as connection:
+            for series in self._series:
+                symbol_set.update(
+                    row[0] for row in connection.execute(f"SELECT DISTINCT symbol FROM {series}")
+                )
+        return list(symbol_set)
+
+    def time_bounds(self) -> Tuple[float, float]:
+        lows, highs = [], []
+        with self._connect() as connection:
+            for series in self._series:
+                low, high = connection.execute(
+                    f"SELECT MIN(timestamp), MAX(timestamp) FROM {series}"
+                ).fetchone()
+                if low is not None:
+                    lows.append(low)
+                    highs.append(high)
+        return min(lows) * 1e-9, max(highs) * 1e-9
+
+    def query(self, series, symbol, t0=None, t1=None, max_points=None):
+        columns = _value_columns(series)
+        select = ", ".join(columns)
+        lower = -(2 ** 63) if t0 is None else int(t0 * 1e9)
+        upper = 2 ** 63 - 1 if t1 is None else int(t1 * 1e9)
+        window = "symbol = ? AND timestamp BETWEEN ? AND ?"
+
+        connection = self._connect()
+        try:
+            # last row before the window, then the window itself
+            rows = connection.execute(
+                f"SELECT {select} FROM {series} WHERE symbol = ? AND timestamp < ? "
+                "ORDER BY timestamp DESC LIMIT 1",
+                (symbol, lower),
+            ).fetchall()
+            (num_rows,) = connection.execute(
+                f"SELECT COUNT(*) FROM {series} WHERE {window}", (symbol, lower, upper)
+            ).fetchone()
+            if max_points is None or num_rows <= max_points:
+                rows += connection.execute(
+                    f"SELECT {select} FROM {series} WHERE {window} ORDER BY timestamp",
+                    (symbol, lower, upper),
+                ).fetchall()
+            else:
+                # stride-decimate in sqlite: the rows are numbered off the (symbol, timestamp)
+                # index, and only every stride-th row (and the last) is read and returned
+                stride = -(-(num_rows - 1) // max(max_points - 1, 1))
+                rows += connection.execute(
+                    f"SELECT {select} FROM {series} WHERE rowid IN ("
+                    "SELECT rowid FROM ("
+                    f"SELECT rowid, ROW_NUMBER() OVER (ORDER BY timestamp) - 1 AS row_number FROM {series} WHERE {window}"
+                    ") WHERE row_number % ? = 0 OR row_number = ?"
+                    ") ORDER BY timestamp",
+                    (symbol, lower, upper, stride, num_rows - 1),
+                ).fetchall()
+        finally:
+            connection.close()
+
+        dtypes = [
+            (column, np.int64 if column == "timestamp" else bool if column.startswith("is_") else np.float64)
+            for column in columns
+        ]
+        table = np.array(rows, dtype=dtypes)
+        result = {column: table[column] for column in columns}
+        result["timestamp"] = result["timestamp"] * 1e-9
+        # the row before the window can still push the count over max_points
+        return _decimate(result, max_points)
+
+
+class AsyncQueryRunner:
+    """
+    Runs DataSource queries on a thread pool, off the UI thread.
+
+    Each submit() starts a new generation and cancels the previous one:
+    queued queries are dropped, and results of in-flight queries are discarded.
+    """
+
+    def __init__(self, source: DataSource, max_workers: int = 4):
+        """
+        Args:
+            source (DataSource): source to query.
+            max_workers (int): number of query threads.
+        """
+        self._source = source
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._futures = []
+
+    @property
+    def generation(self) -> int:
+        """
+        Returns:
+            int: the current (most recently submitted) generation.
+        """
+        return self._generation
+
+    def cancel(self):
+        """
+        Cancel every outstanding query.
+        """
+        with self._lock:
+            self._generation += 1
+            for future in self._futures:
+                future.cancel()
+            self._futures = []
+
+    def submit(
+        self,
+        requests: List[Tuple[str, str]],
+        t0: Optional[float],
+        t1: Optional[float],
+        max_points: Optional[int],
+        callback: Callable[[int, str, str, Dict[str, np.ndarray]], None],
+    ) -> int:
+        """
+        Submit a batch of queries for the same window, cancelling any previous batch.
+
+        Args:
+            requests (List[Tuple[str, str]]): (series, symbol) pairs to query.
+            t0 (Optional[float]): window start.
+            t1 (Optional[float]): window end.
+            max_points (Optional[int]): maximum number of rows per query.
+            callback (Callable): called from a worker thread as
+                callback(generation, series, symbol, columns) for each current result.
+
+        Returns:
+            int: generation of the batch.
+        """
+        self.cancel()
+        with self._lock:
+            generation = self._generation
+            self._futures = [
+                self._executor.submit(
+                    self._run, generation, series, symbol, t0, t1, max_points, callback
+                )
+                for series, symbol in requests
+            ]
+        return generation
+
+    def _run(self, generation, series, symbol, t0, t1, max_points, callback):
+        if generation != self._generation:
+            return
+        columns = self._source.query(series, symbol, t0, t1, max_points)
+        if generation != self._generation:
+            return
+        callback(generation, series, symbol, columns)
+
+    def shutdown(self):
+        """
+        Cancel outstanding queries and stop the worker threads.
+        """
+        self.cancel()
+        self._executor.shutdown(wait=False)
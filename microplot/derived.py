@@ -0,0 +1,187 @@
+"""
+This module contains the derived-series registry: extra series computed from the inputs
+of a PlotterDataClass (spread, mid, imbalance, edge bands, ...).
+
+Derived series are computed per symbol, vectorized, on first use. PlotterDataClass.derived
+memoizes the results and recomputes them only when one of their input series is set again.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+# derived series styles
+LINE = "line"  # line on the price axis
+OFFSET = "offset"  # line on a secondary axis (differences, ratios)
+BAND = "band"  # filled step region between "low" and "high" on the price axis
+
+
+@dataclass
+class DerivedSeries:
+    """
+    Declaration of a derived series.
+
+    name (str): series name, also its legend name on the subplots.
+    inputs (Dict[str, Tuple[str, ...]]): input series name -> columns used.
+    compute (Callable): vectorized function of one symbol's inputs (series name -> column -> values,
+        sorted by timestamp). Returns {"timestamp", "value"} columns, or {"timestamp", "low", "high"} for bands.
+    style (str): LINE, OFFSET or BAND. Default = LINE.
+    color (str): line or fill color. Default = "gray".
+    """
+
+    name: str
+    inputs: Dict[str, Tuple[str, ...]]
+    compute: Callable[[Dict[str, Dict[str, np.ndarray]]], Dict[str, np.ndarray]]
+    style: str = LINE
+    color: str = "gray"
+
+
+# registered derived series, by name
+DERIVED_SERIES: Dict[str, DerivedSeries] = {}
+
+
+def register(series: DerivedSeries) -> DerivedSeries:
+    """
+    Register a derived series (replacing any series of the same name).
+
+    Args:
+        series (DerivedSeries): the declaration.
+
+    Raises:
+        Exception: unknown style.
+
+    Returns:
+        DerivedSeries: the declaration.
+    """
+    if series.style not in (LINE, OFFSET, BAND):
+        raise Exception(f"unknown derived series style: {series.style}")
+    DERIVED_SERIES[series.name] = series
+    return series
+
+
+def size_weighted_micro_price(
+    bid_price: np.ndarray, ask_price: np.ndarray, bid_size: np.ndarray, ask_size: np.ndarray
+) -> np.ndarray:
+    """
+    Size-weighted microprice: (bid * ask_size + ask * bid_size) / (bid_size + ask_size).
+    Falls back to the mid where both sizes are zero.
+
+    Args:
+        bid_price (np.ndarray): best bid prices.
+        ask_price (np.ndarray): best ask prices.
+        bid_size (np.ndarray): best bid sizes.
+        ask_size (np.ndarray): best ask sizes.
+
+    Returns:
+        np.ndarray: microprices.
+    """
+    bid_price = np.asarray(bid_price, dtype=np.float64)
+    ask_price = np.asarray(ask_price, dtype=np.float64)
+    bid_size = np.asarray(bid_size, dtype=np.float64)
+    ask_size = np.asarray(ask_size, dtype=np.float64)
+    total = bid_size + ask_size
+    weighted = bid_price * ask_size + ask_price * bid_size
+    mid = (bid_price + ask_price) / 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, weighted / np.where(total > 0, total, 1), mid)
+
+
+# required columns that are derived when absent: series -> column -> (function, input columns)
+DERIVABLE_COLUMNS: Dict[str, Dict[str, Tuple[Callable, List[str]]]] = {
+    "quote_data": {
+        "micro_price": (
+            size_weighted_micro_price,
+            ["bid_price", "ask_price", "bid_size", "ask_size"],
+        ),
+    },
+}
+
+
+def _asof(timestamps: np.ndarray, at: np.ndarray) -> np.ndarray:
+    """
+    Index of the last row at or before each time (-1 if none).
+    """
+    return np.searchsorted(timestamps, at, side="right") - 1
+
+
+def _spread(inputs):
+    quote = inputs["quote_data"]
+    return {"timestamp": quote["timestamp"], "value": quote["ask_price"] - quote["bid_price"]}
+
+
+def _mid_price(inputs):
+    quote = inputs["quote_data"]
+    return {"timestamp": quote["timestamp"], "value": (quote["bid_price"] + quote["ask_price"]) / 2}
+
+
+def _imbalance(inputs):
+    quote = inputs["quote_data"]
+    bid_size = np.asarray(quote["bid_size"], dtype=np.float64)
+    ask_size = np.asarray(quote["ask_size"], dtype=np.float64)
+    total = bid_size + ask_size
+    with np.errstate(invalid="ignore", divide="ignore"):
+        value = np.where(total > 0, (bid_size - ask_size) / np.where(total > 0, total, 1), 0.0)
+    return {"timestamp": quote["timestamp"], "value": value}
+
+
+def _size_micro_price(inputs):
+    quote = inputs["quote_data"]
+    return {
+        "timestamp": quote["timestamp"],
+        "value": size_weighted_micro_price(
+            quote["bid_price"], quote["ask_price"], quote["bid_size"], quote["ask_size"]
+        ),
+    }
+
+
+def _theo_minus_micro(inputs):
+    # at each valuation, against the prevailing quote
+    val, quote = inputs["val_data"], inputs["quote_data"]
+    rows = _asof(quote["timestamp"], val["timestamp"])
+    valid = rows >= 0
+    return {
+        "timestamp": val["timestamp"][valid],
+        "value": val["theo_price"][valid] - quote["micro_price"][rows[valid]],
+    }
+
+
+def _edge_band(inputs):
+    val = inputs["val_data"]
+    return {
+        "timestamp": val["timestamp"],
+        "low": val["theo_price"] - val["bid_edge"],
+        "high": val["theo_price"] + val["ask_edge"],
+    }
+
+
+register(DerivedSeries("spread", {"quote_data": ("bid_price", "ask_price")}, _spread, OFFSET, "orange"))
+register(DerivedSeries("mid_price", {"quote_data": ("bid_price", "ask_price")}, _mid_price, LINE, "gray"))
+register(DerivedSeries("imbalance", {"quote_data": ("bid_size", "ask_size")}, _imbalance, OFFSET, "purple"))
+register(
+    DerivedSeries(
+        "size_micro_price",
+        {"quote_data": ("bid_price", "ask_price", "bid_size", "ask_size")},
+        _size_micro_price,
+        LINE,
+        "cyan",
+    )
+)
+register(
+    DerivedSeries(
+        "theo_minus_micro",
+        {"val_data": ("theo_price",), "quote_data": ("micro_price",)},
+        _theo_minus_micro,
+        OFFSET,
+        "darkgreen",
+    )
+)
+register(
+    DerivedSeries(
+        "edge_band",
+        {"val_data": ("theo_price", "bid_edge", "ask_edge")},
+        _edge_band,
+        BAND,
+        "green",
+    )
+)
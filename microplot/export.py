@@ -0,0 +1,171 @@
+"""
+This module contains the window export: the rows of every series inside a time window
+(and set of symbols), written out as CSV or Parquet for a notebook or a colleague.
+
+Series are timestamp-sorted, so a window is one binary search per bound; only the rows
+inside it are copied. Exported files carry the original nanosecond timestamps, in the
+same layout as the input csv files (see docs/schema). Series with a clock correction are
+windowed on their corrected timestamps, exported in an extra corrected_timestamp column.
+"""
+
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from microplot.data import PlotterDataClass
+from microplot.schema import SERIES_COLUMNS
+
+# export format -> file extension
+EXPORT_FORMATS = {"csv": ".csv", "parquet": ".parquet"}
+
+
+def _pyarrow():
+    """
+    Import pyarrow, needed for Parquet export only.
+
+    Raises:
+        Exception: pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise Exception("pyarrow is required to export Parquet files (pip install pyarrow)") from None
+    return pyarrow
+
+
+def window_rows(
+    data: PlotterDataClass, series: str, t0: float, t1: float, symbols: Optional[List[str]] = None
+) -> np.ndarray:
+    """
+    Rows of a series inside [t0, t1] (clock-corrected time), for a set of symbols.
+
+    Args:
+        data (PlotterDataClass): dataclass for plotting object.
+        series (str): name of the series.
+        t0 (float): window start, EPOCH seconds.
+        t1 (float): window end, EPOCH seconds.
+        symbols (Optional[List[str]]): symbols to keep. Default = all symbols.
+
+    Returns:
+        np.ndarray: row positions, in timestamp order.
+    """
+    frame = getattr(data, "_" + series)
+    if data._clock_corrected(series):
+        # corrections can differ per symbol: window each symbol's corrected timestamps
+        windows = []
+        for symbol in symbols if symbols is not None else data.get_symbols():
+            rows = data._rows(series, symbol)
+            timestamps = data._timestamps(series, symbol, rows, ns=True)
+            start = np.searchsorted(timestamps, round(t0 * 1e9), side="left")
+            stop = np.searchsorted(timestamps, round(t1 * 1e9), side="right")
+            windows.append(rows[start:stop])
+        return np.sort(np.concatenate(windows)) if windows else np.empty(0, dtype=np.int64)
+    timestamps = np.asarray(frame["timestamp_ns"])
+    start = np.searchsorted(timestamps, round(t0 * 1e9), side="left")
+    stop = np.searchsorted(timestamps, round(t1 * 1e9), side="right")
+    rows = np.arange(start, stop)
+    if symbols is not None:
+        rows = rows[np.isin(np.asarray(frame["symbol"])[start:stop], symbols)]
+    return rows
+
+
+def window_columns(
+    data: PlotterDataClass, series: str, t0: float, t1: float, symbols: Optional[List[str]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Columns of a series inside [t0, t1], with the original nanosecond timestamps restored.
+
+    Args:
+        data (PlotterDataClass): dataclass for plotting object.
+        series (str): name of the series.
+        t0 (float): window start, EPOCH seconds.
+        t1 (float): window end, EPOCH seconds.
+        symbols (Optional[List[str]]): symbols to keep. Default = all symbols.
+
+    Returns:
+        Dict[str, np.ndarray]: column name -> values; schema columns first.
+    """
+    frame = getattr(data, "_" + series)
+    rows = window_rows(data, series, t0, t1, symbols)
+    names = [column for column in SERIES_COLUMNS[series] if column in frame.columns]
+    names += [column for column in frame.columns if column not in names + ["timestamp_ns"]]
+    columns = {name: np.asarray(frame[name])[rows] for name in names}
+    columns["timestamp"] = np.asarray(frame["timestamp_ns"])[rows]
+    if data._clock_corrected(series):
+        corrected = columns["timestamp"].copy()
+        for symbol in np.unique(columns["symbol"]):
+            correction = data.clock_correction(series, symbol)
+            if correction is not None:
+                mask = columns["symbol"] == symbol
+                corrected[mask] = correction.apply_ns(corrected[mask])
+        columns["corrected_timestamp"] = corrected
+    return columns
+
+
+def write_columns(columns: Dict[str, np.ndarray], file_path: str, fmt: str = "csv"):
+    """
+    Write columns to a file in one batched write.
+
+    Args:
+        columns (Dict[str, np.ndarray]): column name -> values.
+        file_path (str): output file path.
+        fmt (str): "csv" or "parquet". Default = "csv".
+
+    Raises:
+        Exception: unknown format, or pyarrow missing for Parquet.
+    """
+    if fmt == "parquet":
+        pyarrow = _pyarrow()
+        pyarrow.parquet.write_table(pyarrow.table(columns), file_path)
+    elif fmt == "csv":
+        import pandas as pd
+
+        pd.DataFrame(columns).to_csv(file_path, index=False)
+    else:
+        raise Exception(f"unknown export format: {fmt} (expected one of {list(EXPORT_FORMATS)})")
+
+
+def export_window(
+    data: PlotterDataClass,
+    directory: str,
+    t0: float,
+    t1: float,
+    symbols: Optional[List[str]] = None,
+    fmt: str = "csv",
+    logger: Optional[logging.Logger] = None,
+) -> Dict[str, str]:
+    """
+    Export the rows of every series set inside [t0, t1]: one file per series, named after it.
+
+    Args:
+        data (PlotterDataClass): dataclass for plotting object.
+        directory (str): output directory (created if needed).
+        t0 (float): window start, EPOCH seconds.
+        t1 (float): window end, EPOCH seconds.
+        symbols (Optional[List[str]]): symbols to keep. Default = all symbols.
+        fmt (str): "csv" or "parquet". Default = "csv".
+        logger (Optional[logging.Logger]): progress logger. Default = "microplotter" logger.
+
+    Raises:
+        Exception: unknown format.
+
+    Returns:
+        Dict[str, str]: series name -> written file path.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise Exception(f"unknown export format: {fmt} (expected one of {list(EXPORT_FORMATS)})")
+    logger = logger or logging.getLogger("microplotter")
+    os.makedirs(directory, exist_ok=True)
+
+    paths = {}
+    for series in SERIES_COLUMNS:
+        if getattr(data, "_" + series) is None:
+            continue
+        columns = window_columns(data, series, t0, t1, symbols)
+        paths[series] = os.path.join(directory, series + EXPORT_FORMATS[fmt])
+        write_columns(columns, paths[series], fmt)
+        logger.info(f"Exported {len(columns['timestamp'])} {series} rows to {paths[series]}")
+    return paths
@@ -0,0 +1,310 @@
+"""
+This module contains the event filter expressions used to highlight events on the plots.
+
+A filter names a target series and a boolean expression over its columns:
+
+    orders: is_reject & (price > quote.ask_price)
+    fill_data_sim: is_aggressive & where(is_buy, asof(quote.micro_price, 0.001) < quote.micro_price,
+                                                asof(quote.micro_price, 0.001) > quote.micro_price)
+
+Bare names are columns of the target series. "<series>.<column>" is the prevailing value of
+another series' column at each event (as-of join on the same symbol); "derived.<name>" the
+prevailing value of a derived series (see microplot.derived). asof(reference, dt) shifts
+the as-of time by dt seconds. Expressions are parsed once, checked against a whitelist of
+syntax and functions, and evaluated vectorized per symbol (no Python per row).
+"""
+
+import ast
+from functools import lru_cache
+from typing import Callable, Dict, List, Set
+
+import numpy as np
+
+from microplot.derived import DERIVED_SERIES
+from microplot.schema import SERIES_COLUMNS
+
+# short names of the series in expressions
+SERIES_ALIASES = {
+    "quote": "quote_data",
+    "trade": "trade_data",
+    "fill_sim": "fill_data_sim",
+    "fill_prod": "fill_data_prod",
+    "order": "orders",
+    "val": "val_data",
+    **{series: series for series in SERIES_COLUMNS},
+}
+
+# column giving the price of a matched event, for the highlight overlay
+EVENT_PRICE_COLUMNS = {
+    "quote_data": "micro_price",
+    "trade_data": "price",
+    "fill_data_sim": "price",
+    "fill_data_prod": "price",
+    "orders": "price",
+    "val_data": "theo_price",
+}
+
+# functions callable in expressions (asof is handled by the evaluator)
+FUNCTIONS: Dict[str, Callable] = {
+    "where": np.where,
+    "abs": np.abs,
+    "isnan": np.isnan,
+    "minimum": np.minimum,
+    "maximum": np.maximum,
+}
+
+_BINARY_OPERATORS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+    ast.BitAnd: np.logical_and,
+    ast.BitOr: np.logical_or,
+    ast.BitXor: np.logical_xor,
+}
+_UNARY_OPERATORS = {
+    ast.Not: np.logical_not,
+    ast.Invert: np.logical_not,
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+}
+_COMPARISONS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+
+
+def _dotted(node: ast.AST) -> List[str]:
+    """
+    Flatten a Name / Attribute chain ("quote.ask_price") into its parts.
+
+    Raises:
+        Exception: not a (dotted) name.
+    """
+    if isinstance(node, ast.Name):
+        return [node.id]
+    if isinstance(node, ast.Attribute):
+        return _dotted(node.value) + [node.attr]
+    raise Exception(f"unsupported syntax in filter: {ast.dump(node)}")
+
+
+class EventFilter:
+    """
+    A compiled filter expression. Results are memoized on the dataclass per symbol, and
+    recomputed only once one of the series the expression reads is set again (or re-clocked).
+    """
+
+    def __init__(self, expression: str):
+        """
+        Args:
+            expression (str): "<series>: <boolean expression>" (see module docstring).
+
+        Raises:
+            Exception: unknown series, or unsupported syntax, function or column.
+        """
+        self.expression = expression
+        target, separator, body = expression.partition(":")
+        if not separator or target.strip() not in SERIES_ALIASES:
+            raise Exception(f"filter must start with '<series>:', got: {expression}")
+        self.series = SERIES_ALIASES[target.strip()]
+        self._tree = ast.parse(body.strip(), mode="eval")
+
+        # series read by the expression (for cache invalidation)
+        self._inputs: Set[str] = {self.series}
+        self._check(self._tree.body)
+
+    def __repr__(self) -> str:
+        return f"EventFilter({self.expression!r})"
+
+    def _check(self, node: ast.AST):
+        """
+        Check an expression node against the whitelist, and collect the series it reads.
+        """
+        if isinstance(node, ast.BoolOp):
+            for value in node.values:
+                self._check(value)
+        elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            self._check(node.left)
+            self._check(node.right)
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            self._check(node.operand)
+        elif isinstance(node, ast.Compare) and all(type(op) in _COMPARISONS for op in node.ops):
+            for value in [node.left, *node.comparators]:
+                self._check(value)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, (bool, int, float)):
+            pass
+        elif isinstance(node, (ast.Name, ast.Attribute)):
+            self._check_reference(_dotted(node))
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name = node.func.id
+            if name == "asof":
+                if len(node.args) != 2 or not isinstance(node.args[0], (ast.Name, ast.Attribute)):
+                    raise Exception("asof takes a column reference and a time shift (seconds)")
+                self._check_reference(_dotted(node.args[0]))
+                self._check(node.args[1])
+            elif name in FUNCTIONS:
+                for argument in node.args:
+                    self._check(argument)
+            else:
+                raise Exception(f"unknown function in filter: {name}")
+        else:
+            raise Exception(f"unsupported syntax in filter: {ast.dump(node)}")
+
+    def _check_reference(self, parts: List[str]):
+        if parts[0] == "derived":
+            if len(parts) not in (2, 3) or parts[1] not in DERIVED_SERIES:
+                raise Exception(f"unknown derived series in filter: {'.'.join(parts)}")
+            self._inputs.update(DERIVED_SERIES[parts[1]].inputs)
+        elif len(parts) == 2:
+            if parts[0] not in SERIES_ALIASES:
+                raise Exception(f"unknown series in filter: {parts[0]}")
+            self._inputs.add(SERIES_ALIASES[parts[0]])
+        elif len(parts) != 1:
+            raise Exception(f"unsupported reference in filter: {'.'.join(parts)}")
+
+    def evaluate(self, data, symbol: str) -> np.ndarray:
+        """
+        Evaluate the filter on the target series rows of one symbol.
+
+        Args:
+            data (PlotterDataClass): dataclass for plotting object.
+            symbol (str): The symbol of interest.
+
+        Raises:
+            Exception: a series or column the expression reads is not set.
+
+        Returns:
+            np.ndarray: boolean mask over the symbol's rows (timestamp order).
+        """
+        versions = data._input_versions(sorted(self._inputs))
+        cached = data._filter_cache.get((self.expression, symbol))
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+
+        frame = getattr(data, "_" + self.series)
+        if frame is None:
+            raise Exception(f"{self.series} is not set")
+        rows = data._rows(self.series, symbol)
+        context = _Context(data, symbol, self.series, data._timestamps(self.series, symbol, rows))
+        mask = np.broadcast_to(
+            np.asarray(context.evaluate(self._tree.body), dtype=bool), (len(rows),)
+        ).copy()
+
+        data._filter_cache[(self.expression, symbol)] = (versions, mask)
+        return mask
+
+    def events(self, data, symbol: str) -> Dict[str, np.ndarray]:
+        """
+        Timestamps and prices of the matching events of one symbol.
+
+        Args:
+            data (PlotterDataClass): dataclass for plotting object.
+            symbol (str): The symbol of interest.
+
+        Returns:
+            Dict[str, np.ndarray]: "timestamp" and "price" of the matches.
+        """
+        mask = self.evaluate(data, symbol)
+        frame = getattr(data, "_" + self.series)
+        rows = data._rows(self.series, symbol)[mask]
+        return {
+            "timestamp": data._timestamps(self.series, symbol, rows),
+            "price": np.asarray(frame[EVENT_PRICE_COLUMNS[self.series]])[rows],
+        }
+
+
+class _Context:
+    """
+    Vectorized evaluation of an expression tree for one symbol.
+    """
+
+    def __init__(self, data, symbol: str, series: str, timestamps: np.ndarray):
+        self._data = data
+        self._symbol = symbol
+        self._series = series
+        self._timestamps = timestamps
+
+    def evaluate(self, node: ast.AST):
+        if isinstance(node, ast.BoolOp):
+            function = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            values = [self.evaluate(value) for value in node.values]
+            result = values[0]
+            for value in values[1:]:
+                result = function(result, value)
+            return result
+        if isinstance(node, ast.BinOp):
+            return _BINARY_OPERATORS[type(node.op)](self.evaluate(node.left), self.evaluate(node.right))
+        if isinstance(node, ast.UnaryOp):
+            return _UNARY_OPERATORS[type(node.op)](self.evaluate(node.operand))
+        if isinstance(node, ast.Compare):
+            # chained comparisons: a < b < c -> (a < b) & (b < c)
+            left, result = self.evaluate(node.left), True
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self.evaluate(comparator)
+                result = np.logical_and(result, _COMPARISONS[type(op)](left, right))
+                left = right
+            return result
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, (ast.Name, ast.Attribute)):
+            return self.reference(_dotted(node), 0.0)
+        if isinstance(node, ast.Call):
+            if node.func.id == "asof":
+                return self.reference(_dotted(node.args[0]), float(self.evaluate(node.args[1])))
+            return FUNCTIONS[node.func.id](*[self.evaluate(argument) for argument in node.args])
+        raise Exception(f"unsupported syntax in filter: {ast.dump(node)}")
+
+    def reference(self, parts: List[str], shift: float) -> np.ndarray:
+        """
+        Values of a column reference at each event time (+ shift seconds).
+        """
+        if parts[0] == "derived":
+            columns = self._data.derived(parts[1], self._symbol)
+            column = parts[2] if len(parts) == 3 else "value"
+            if column not in columns:
+                raise Exception(f"derived series:{parts[1]} has no column {column}")
+            return self._asof(columns["timestamp"], columns[column], shift)
+
+        series = self._series if len(parts) == 1 else SERIES_ALIASES[parts[0]]
+        column = parts[-1]
+        frame = getattr(self._data, "_" + series)
+        if frame is None:
+            raise Exception(f"{series} is not set")
+        if column not in frame.columns:
+            raise Exception(f"column:{column} not in {series}")
+        rows = self._data._rows(series, self._symbol)
+        values = np.asarray(frame[column])[rows]
+        if series == self._series and shift == 0:
+            return values
+        return self._asof(self._data._timestamps(series, self._symbol, rows), values, shift)
+
+    def _asof(self, timestamps: np.ndarray, values: np.ndarray, shift: float) -> np.ndarray:
+        """
+        Prevailing value at each event time (+ shift): NaN (False for booleans) before the first row.
+        """
+        rows = np.searchsorted(timestamps, self._timestamps + shift, side="right") - 1
+        valid = rows >= 0
+        result = values[np.maximum(rows, 0)] if len(values) else np.zeros(len(rows), values.dtype)
+        if values.dtype == bool:
+            return result & valid
+        result = result.astype(np.float64, copy=True)
+        result[~valid] = np.nan
+        return result
+
+
+@lru_cache(maxsize=128)
+def compile_filter(expression: str) -> EventFilter:
+    """
+    Compile a filter expression; compiled filters are cached by expression.
+
+    Args:
+        expression (str): "<series>: <boolean expression>" (see module docstring).
+
+    Returns:
+        EventFilter: the compiled filter.
+    """
+    return EventFilter(expression)
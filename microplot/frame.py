@@ -0,0 +1,115 @@
+"""
+This module contains ColumnFrame, a minimal pandas-free columnar table used by PlotterDataClass.
+"""
+
+from typing import Dict, List, Union
+
+import numpy as np
+
+
+class ColumnFrame:
+    """
+    A minimal columnar table: a dict of equal-length NumPy arrays.
+
+    Supports the subset of the DataFrame interface the plotter relies on:
+    frame["column"], frame.column, frame[boolean_mask], frame.columns, frame.empty.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        """
+        Args:
+            columns (Dict[str, np.ndarray]): column name -> values.
+
+        Raises:
+            Exception: columns have different lengths.
+        """
+        self.__dict__["_columns"] = {
+            name: np.asarray(values) for name, values in columns.items()
+        }
+        lengths = {len(values) for values in self._columns.values()}
+        if len(lengths) > 1:
+            raise Exception(f"columns have different lengths: {sorted(lengths)}")
+
+    @classmethod
+    def from_arrays(
+        cls, data: Union["ColumnFrame", Dict[str, np.ndarray], np.ndarray]
+    ) -> "ColumnFrame":
+        """
+        Build a ColumnFrame from a dict of arrays or a NumPy structured array.
+        Structured array fields are taken as views, not copies.
+
+        Args:
+            data (Union[ColumnFrame, Dict[str, np.ndarray], np.ndarray]): input columns.
+
+        Raises:
+            Exception: unsupported input type.
+
+        Returns:
+            ColumnFrame: the table.
+        """
+        if isinstance(data, ColumnFrame):
+            return cls(data._columns)
+        if isinstance(data, dict):
+            return cls(data)
+        if isinstance(data, np.ndarray) and data.dtype.names is not None:
+            return cls({name: data[name] for name in data.dtype.names})
+        raise Exception(f"unsupported input type: {type(data)}")
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        Returns:
+            List[str]: column names.
+        """
+        return list(self._columns)
+
+    @property
+    def empty(self) -> bool:
+        """
+        Returns:
+            bool: true if the table has no rows.
+        """
+        return len(self) == 0
+
+    def __len__(self) -> int:
+        for values in self._columns.values():
+            return len(values)
+        return 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._columns[key]
+        # row selection: boolean mask, index array or slice
+        return ColumnFrame({name: values[key] for name, values in self._columns.items()})
+
+    def __setitem__(self, name: str, values: np.ndarray):
+        values = np.asarray(values)
+        if self._columns and len(values) != len(self):
+            raise Exception(f"column:{name} has {len(values)} rows, expected {len(self)}")
+        self._columns[name] = values
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        try:
+            return self.__dict__["_columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, values: np.ndarray):
+        self[name] = values
+
+    def __repr__(self) -> str:
+        return f"ColumnFrame(rows={len(self)}, columns={self.columns})"
+
+    def to_pandas(self):
+        """
+        Convert to a pandas DataFrame (requires pandas).
+
+        Returns:
+            pd.DataFrame: the table as a DataFrame.
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self._columns)
@@ -0,0 +1,203 @@
+"""
+This module contains the working-order ladder: the order event stream turned into the
+intervals over which each order rested in the book.
+
+An order is working from its new-order ack until its cancel ack: a partial fill does not
+end it. Fills carry no leaves quantity, so an order that is never cancel-acked is taken to
+be filled out at its last fill (fills are matched on order_id, from the fill series that
+carry one); orders with neither are still working at the end of the data. Reconstruction
+needs the optional order_id column of orders; is_buy (optional) gives the side.
+
+Intervals are built per symbol, vectorized: one factorization of order_id over the
+symbol's order and fill rows, and first/last-event lookups via np.unique; no Python
+per order.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from microplot.data import PlotterDataClass
+
+# series the intervals are built from
+LADDER_INPUTS = ["orders", "fill_data_sim", "fill_data_prod"]
+
+# why an interval ended
+OPEN = 0
+CANCELLED = 1
+FILLED = 2
+
+
+def _first(keys: np.ndarray, rows: np.ndarray, last: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First (or last) row per key, for rows in time order.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: sorted unique keys, and their row.
+    """
+    if last:
+        keys, rows = keys[::-1], rows[::-1]
+    unique, index = np.unique(keys, return_index=True)
+    return unique, rows[index]
+
+
+def _lookup(keys: np.ndarray, table_keys: np.ndarray, table_values: np.ndarray, default) -> np.ndarray:
+    """
+    table_values at keys, where present in the (sorted) table_keys; default elsewhere.
+    """
+    result = np.full(len(keys), default, dtype=np.result_type(table_values, type(default)))
+    if len(table_keys):
+        position = np.minimum(np.searchsorted(table_keys, keys), len(table_keys) - 1)
+        found = table_keys[position] == keys
+        result[found] = table_values[position[found]]
+    return result
+
+
+def order_intervals(data: PlotterDataClass, symbol: str) -> Dict[str, np.ndarray]:
+    """
+    Reconstruct the working interval of every acked order of a symbol.
+
+    Args:
+        data (PlotterDataClass): dataclass for plotting object.
+        symbol (str): The symbol of interest.
+
+    Raises:
+        Exception: orders not set, or without an order_id column.
+
+    Returns:
+        Dict[str, np.ndarray]: columns "order_id", "price", "is_buy", "start", "end" (EPOCH
+        seconds; inf while still working) and "end_reason" (OPEN, CANCELLED, FILLED), sorted
+        by start.
+    """
+    orders = data._orders
+    if orders is None:
+        raise Exception("orders is not set")
+    if "order_id" not in orders.columns:
+        raise Exception("the order ladder needs an order_id column in orders")
+
+    # event tables of the symbol: orders first, then the fills carrying an order_id
+    tables = [("orders", orders)] + [
+        (name, frame)
+        for name, frame in (("fill_data_sim", data._fill_data_sim), ("fill_data_prod", data._fill_data_prod))
+        if frame is not None and "order_id" in frame.columns
+    ]
+    rows = [data._rows(name, symbol) for name, _ in tables]
+    order_ids = [np.asarray(frame["order_id"])[table_rows] for (_, frame), table_rows in zip(tables, rows)]
+    if len({ids.dtype.kind for ids in order_ids}) > 1:
+        # mixed id types (e.g. ints in orders, strings in fills) are matched as strings
+        order_ids = [ids.astype(str) for ids in order_ids]
+
+    # one factorization of order_id over every table
+    _, keys = np.unique(np.concatenate(order_ids), return_inverse=True)
+    bounds = np.cumsum([0] + [len(table_rows) for table_rows in rows])
+    order_keys = keys[: bounds[1]]
+
+    order_rows = rows[0]
+    timestamps = data._timestamps("orders", symbol, order_rows, ns=True)
+    is_new, is_cancel, is_ack = (
+        np.asarray(orders[column], dtype=bool)[order_rows] for column in ("is_new", "is_cancel", "is_ack")
+    )
+
+    # start: first new-order ack
+    acks = np.flatnonzero(is_new & is_ack)
+    start_keys, start_rows = _first(order_keys[acks], acks)
+    start = timestamps[start_rows]
+
+    # end: first cancel ack; the last fill only for orders never cancel-acked
+    never = np.iinfo(np.int64).max
+    cancels = np.flatnonzero(is_cancel & is_ack)
+    cancel_keys, cancel_rows = _first(order_keys[cancels], cancels)
+    cancel_end = _lookup(start_keys, cancel_keys, timestamps[cancel_rows], never)
+    fill_end = np.full(len(start_keys), never, dtype=np.int64)
+    if len(tables) > 1:
+        fill_keys = keys[bounds[1] :]
+        fill_times = np.concatenate(
+            [data._timestamps(name, symbol, table_rows, ns=True) for (name, _), table_rows in zip(tables[1:], rows[1:])]
+        )
+        # fills of different series interleave: order them in time first
+        by_time = np.argsort(fill_times, kind="stable")
+        last_keys, last_rows = _first(fill_keys[by_time], by_time, last=True)
+        fill_end = _lookup(start_keys, last_keys, fill_times[last_rows], never)
+    cancelled = cancel_end != never
+    end = np.maximum(np.where(cancelled, cancel_end, fill_end), start)
+    reason = np.where(cancelled, CANCELLED, np.where(end == never, OPEN, FILLED))
+
+    # by start (new-order acks are in time order already, keys are not)
+    by_start = np.argsort(start_rows, kind="stable")
+    start_rows, start, end, reason = start_rows[by_start], start[by_start], end[by_start], reason[by_start]
+    if "is_buy" in orders.columns:
+        is_buy = np.asarray(orders["is_buy"], dtype=bool)[order_rows][start_rows]
+    else:
+        is_buy = np.zeros(len(start_rows), dtype=bool)
+    return {
+        "order_id": order_ids[0][start_rows],
+        "price": np.asarray(orders["price"], dtype=np.float64)[order_rows][start_rows],
+        "is_buy": is_buy,
+        "start": start * 1e-9,
+        "end": np.where(reason == OPEN, np.inf, end * 1e-9),
+        "end_reason": reason,
+    }
+
+
+class OrderLadder:
+    """
+    Working-order intervals of a PlotterDataClass, built per symbol on first use and
+    rebuilt only once one of the series they come from is set again (or re-clocked).
+    """
+
+    def __init__(self, data: PlotterDataClass):
+        """
+        Args:
+            data (PlotterDataClass): dataclass for plotting object.
+        """
+        self._data = data
+        self._versions = None
+        # symbol -> interval columns
+        self._intervals = {}
+        # symbol -> (finite ends, their running max, rows of the open orders), for working()
+        self._reach = {}
+
+    def intervals(self, symbol: str) -> Dict[str, np.ndarray]:
+        """
+        Working intervals of a symbol's orders (see order_intervals).
+
+        Args:
+            symbol (str): The symbol of interest.
+
+        Returns:
+            Dict[str, np.ndarray]: interval columns, sorted by start.
+        """
+        versions = self._data._input_versions(LADDER_INPUTS)
+        if versions != self._versions:
+            self._intervals = {}
+            self._reach = {}
+            self._versions = versions
+        if symbol not in self._intervals:
+            self._intervals[symbol] = order_intervals(self._data, symbol)
+        return self._intervals[symbol]
+
+    def working(self, symbol: str, t: float) -> Dict[str, np.ndarray]:
+        """
+        Orders of a symbol working at time t (start <= t < end).
+
+        Args:
+            symbol (str): The symbol of interest.
+            t (float): EPOCH seconds.
+
+        Returns:
+            Dict[str, np.ndarray]: interval columns of the working orders, sorted by start.
+        """
+        intervals = self.intervals(symbol)
+        if symbol not in self._reach:
+            is_open = intervals["end_reason"] == OPEN
+            end = np.where(is_open, -np.inf, intervals["end"])
+            self._reach[symbol] = (end, np.maximum.accumulate(end), np.flatnonzero(is_open))
+        end, reach, open_rows = self._reach[symbol]
+
+        # only orders started by t can be working, and none of the closed ones before
+        # the first whose end (or an earlier one's) reaches past t
+        started = np.searchsorted(intervals["start"], t, side="right")
+        first = np.searchsorted(reach[:started], t, side="right")
+        closed = first + np.flatnonzero(end[first:started] > t)
+        rows = np.sort(np.concatenate([open_rows[: np.searchsorted(open_rows, started)], closed]))
+        return {name: values[rows] for name, values in intervals.items()}
@@ -0,0 +1,767 @@
+"""
+This module contains the loaders that read input files into a PlotterDataClass.
+
+NOTE: No GUI toolkit is imported here; pandas is imported only when a csv is read.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+import gzip
+import io
+import itertools
+import logging
+import lzma
+import mmap
+from multiprocessing import resource_tracker, shared_memory
+import os
+import os.path
+import struct
+import time
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from microplot.data import PlotterDataClass
+from microplot.frame import ColumnFrame
+from microplot.derived import DERIVABLE_COLUMNS
+from microplot.schema import OPTIONAL_COLUMNS, SERIES_COLUMNS
+
+# files below this size are parsed with a single read_csv call
+PARALLEL_MIN_BYTES = 64 * 2**20
+# compressed files below this size are parsed with a single read_csv call
+PARALLEL_MIN_COMPRESSED_BYTES = 8 * 2**20
+# target size of each byte range parsed by a worker
+RANGE_BYTES = 256 * 2**20
+# decompressed block size read from a compressed stream
+STREAM_BLOCK_BYTES = 16 * 2**20
+
+# compressed csv extension -> codec (zstd requires the optional zstandard package)
+COMPRESSED_EXTENSIONS = {".csv.gz": "gzip", ".csv.zst": "zstd", ".csv.xz": "xz"}
+
+# file name (without extension) of each series in a simulation run directory, as in the examples
+SIM_RUN_FILES = {"fill_data_sim": "fill_data", "orders": "order_data", "val_data": "val_data"}
+
+# series loaded before the plot window opens, with progressive loading (see ProgressiveLoader)
+PROGRESSIVE_FIRST_SERIES = ["quote_data"]
+
+# log name of each series
+SERIES_LABELS = {
+    "quote_data": "quote data",
+    "trade_data": "trade data",
+    "fill_data_sim": "fill data sim",
+    "fill_data_prod": "fill data prod",
+    "orders": "orders data",
+    "val_data": "valuation data",
+}
+
+
+def _check_file_path(file_path: str) -> bool:
+    """
+    Check the file_path before trying to open.
+
+    Args:
+        file_path (str): file path.
+
+    Returns:
+        bool: Boolean whether file path is valid.
+    """
+
+    if not (file_path.endswith(".csv") or _codec(file_path) is not None):
+        return False
+
+    return os.path.isfile(file_path)
+
+
+def _check(file_path: str):
+    """
+    Red-face test the file.
+
+    Args:
+        file_path (str): file path.
+
+    Raises:
+        Exception: file path either does not exist or is not a (compressed) csv.
+    """
+
+    if not _check_file_path(file_path):
+        raise Exception(
+            f"{file_path} either does not exist or is not a csv file "
+            f"(or {', '.join(COMPRESSED_EXTENSIONS)})."
+        )
+
+
+def _codec(file_path: str) -> Optional[str]:
+    """
+    Args:
+        file_path (str): file path.
+
+    Returns:
+        Optional[str]: compression codec of the file (None = plain csv).
+    """
+    for extension, codec in COMPRESSED_EXTENSIONS.items():
+        if file_path.endswith(extension):
+            return codec
+    return None
+
+
+def _zstandard():
+    """
+    Import the optional zstandard package.
+
+    Raises:
+        Exception: zstandard is not installed.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        raise Exception("reading .csv.zst files requires the zstandard package") from None
+    return zstandard
+
+
+def _open_stream(file_path: str) -> BinaryIO:
+    """
+    Open a (compressed) csv as a decompressed binary stream.
+
+    Args:
+        file_path (str): file path.
+
+    Returns:
+        BinaryIO: decompressed stream.
+    """
+    codec = _codec(file_path)
+    if codec == "gzip":
+        return gzip.open(file_path, "rb")
+    if codec == "xz":
+        return lzma.open(file_path, "rb")
+    if codec == "zstd":
+        reader = _zstandard().ZstdDecompressor().stream_reader(
+            open(file_path, "rb"), read_across_frames=True, closefd=True
+        )
+        return io.BufferedReader(reader, STREAM_BLOCK_BYTES)
+    return open(file_path, "rb")
+
+
+def _zstd_frames(file_path: str) -> List[Tuple[int, int]]:
+    """
+    Locate the frames of a zstd file by walking frame and block headers, without decompressing.
+    Skippable frames (e.g. pzstd size hints) are left out.
+
+    Args:
+        file_path (str): file path.
+
+    Raises:
+        Exception: not a zstd file.
+
+    Returns:
+        List[Tuple[int, int]]: (offset, size) of each data frame.
+    """
+    frames = []
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offset, end = 0, len(data)
+        while offset < end:
+            (magic,) = struct.unpack_from("<I", data, offset)
+            if magic & 0xFFFFFFF0 == 0x184D2A50:
+                (size,) = struct.unpack_from("<I", data, offset + 4)
+                offset += 8 + size
+                continue
+            if magic != 0xFD2FB528:
+                raise Exception(f"{file_path} is not a zstd file (bad frame magic at byte {offset})")
+            descriptor = data[offset + 4]
+            single_segment = descriptor >> 5 & 1
+            content_size_bytes = (single_segment, 2, 4, 8)[descriptor >> 6]
+            header = 1 + (not single_segment) + (0, 1, 2, 4)[descriptor & 3] + content_size_bytes
+            position = offset + 4 + header
+            last = False
+            while not last:
+                block = int.from_bytes(data[position : position + 3], "little")
+                last = bool(block & 1)
+                # RLE blocks store a single byte
+                position += 3 + (1 if (block >> 1) & 3 == 1 else block >> 3)
+            if descriptor >> 2 & 1:
+                # content checksum
+                position += 4
+            frames.append((offset, position - offset))
+            offset = position
+    return frames
+
+
+def _iter_zstd_frames(file_path: str, frames: List[Tuple[int, int]], workers: int) -> Iterator[bytes]:
+    """
+    Decompress the frames of a multi-frame zstd file in a thread pool
+    (zstandard releases the GIL), yielding them in file order.
+
+    Args:
+        file_path (str): file path.
+        frames (List[Tuple[int, int]]): (offset, size) of each frame (see _zstd_frames).
+        workers (int): decompression threads.
+
+    Yields:
+        bytes: decompressed frames.
+    """
+    zstandard = _zstandard()
+
+    def decompress(frame):
+        offset, size = frame
+        with open(file_path, "rb") as file:
+            file.seek(offset)
+            compressed = file.read(size)
+        return zstandard.ZstdDecompressor().decompressobj().decompress(compressed)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # bounded lookahead keeps memory flat
+        pending = deque()
+        for frame in frames:
+            pending.append(executor.submit(decompress, frame))
+            if len(pending) > 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _iter_blocks(file_path: str, workers: int = 1) -> Iterator[bytes]:
+    """
+    Decompressed contents of a (compressed) csv, as a stream of blocks.
+    Multi-frame zstd files are decompressed in parallel.
+
+    Args:
+        file_path (str): file path.
+        workers (int): decompression threads (multi-frame zstd only). Default = 1.
+
+    Yields:
+        bytes: decompressed blocks, in file order.
+    """
+    if _codec(file_path) == "zstd" and workers > 1:
+        frames = _zstd_frames(file_path)
+        if len(frames) > 1:
+            yield from _iter_zstd_frames(file_path, frames, workers)
+            return
+    with _open_stream(file_path) as stream:
+        while True:
+            block = stream.read(STREAM_BLOCK_BYTES)
+            if not block:
+                return
+            yield block
+
+
+def _iter_chunks(blocks: Iterator[bytes], chunk_bytes: int) -> Iterator[bytes]:
+    """
+    Re-cut a stream of blocks into newline-aligned chunks of about chunk_bytes.
+
+    Args:
+        blocks (Iterator[bytes]): stream of blocks.
+        chunk_bytes (int): target chunk size.
+
+    Yields:
+        bytes: chunks of whole lines.
+    """
+    buffer = bytearray()
+    for block in blocks:
+        buffer += block
+        if len(buffer) >= chunk_bytes:
+            cut = buffer.rfind(b"\n") + 1
+            if cut:
+                yield bytes(buffer[:cut])
+                del buffer[:cut]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _series_columns(series: str, header_columns: List[str]) -> List[str]:
+    """
+    Columns of a series to read from a file: the required columns, and the optional
+    columns present. Required columns derived from optional ones may be absent.
+
+    Args:
+        series (str): name of the series (see microplot.schema.SERIES_COLUMNS).
+        header_columns (List[str]): columns of the file.
+
+    Returns:
+        List[str]: columns to read.
+    """
+    derivable = DERIVABLE_COLUMNS.get(series, {})
+    columns = [
+        column
+        for column in SERIES_COLUMNS[series]
+        if column in header_columns
+        or column not in derivable
+        or not all(i in header_columns for i in derivable[column][1])
+    ]
+    columns += [column for column in OPTIONAL_COLUMNS.get(series, []) if column in header_columns]
+    return columns
+
+
+def _header_columns(header: bytes) -> List[str]:
+    return [column.strip().strip('"') for column in header.decode().strip().split(",")]
+
+
+def _frame_columns(frame, columns: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Columns of a parsed pandas frame as NumPy arrays, strings as fixed-width numpy strings
+    (so every reader returns the same column types, whatever the file size or parser).
+
+    Args:
+        frame (pd.DataFrame): parsed csv.
+        columns (List[str]): columns to take.
+
+    Returns:
+        Dict[str, np.ndarray]: column -> values.
+    """
+    arrays = {}
+    for column in columns:
+        values = frame[column].to_numpy()
+        arrays[column] = values.astype(str) if values.dtype == object else values
+    return arrays
+
+
+def read_csv(file_path: str, series: str) -> ColumnFrame:
+    """
+    Read the required (and optional) columns of a series from a csv, with a single parser call.
+
+    Args:
+        file_path (str): file path.
+        series (str): name of the series (see microplot.schema.SERIES_COLUMNS).
+
+    Returns:
+        ColumnFrame: the series (the same column types as read_csv_parallel and read_csv_stream).
+    """
+    import pandas as pd
+
+    _check(file_path)
+    with _open_stream(file_path) as stream:
+        columns = _series_columns(series, _header_columns(stream.readline()))
+    with _open_stream(file_path) as stream:
+        return ColumnFrame(_frame_columns(pd.read_csv(stream, usecols=columns), columns))
+
+
+def _byte_ranges(file_path: str, range_bytes: int) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    Split a csv into newline-aligned byte ranges, skipping the header line.
+
+    Args:
+        file_path (str): file path.
+        range_bytes (int): target size of each range.
+
+    Returns:
+        Tuple[bytes, List[Tuple[int, int]]]: header line, and [start, stop) byte offsets.
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as file:
+        header = file.readline()
+        boundaries = [file.tell()]
+        while boundaries[-1] < file_size:
+            file.seek(min(boundaries[-1] + range_bytes, file_size))
+            # move the boundary to the start of the next line
+            file.readline()
+            boundaries.append(min(file.tell(), file_size))
+    return header, list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _parse_range(
+    file_path: str, header: bytes, start: int, stop: int, columns: List[str]
+) -> Dict[str, Tuple[str, str, int]]:
+    """
+    Worker: parse one byte range of a csv into shared-memory column buffers.
+
+    Args:
+        file_path (str): file path.
+        header (bytes): csv header line.
+        start (int): range start offset.
+        stop (int): range end offset.
+        columns (List[str]): columns to parse.
+
+    Returns:
+        Dict[str, Tuple[str, str, int]]: column -> (shared memory name, dtype, rows).
+    """
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        chunk = file.read(stop - start)
+    return _parse_chunk(header, chunk, columns)
+
+
+def _parse_chunk(header: bytes, chunk: bytes, columns: List[str]) -> Dict[str, Tuple[str, str, int]]:
+    """
+    Worker: parse a chunk of whole csv lines into shared-memory column buffers.
+
+    Args:
+        header (bytes): csv header line.
+        chunk (bytes): csv lines.
+        columns (List[str]): columns to parse.
+
+    Returns:
+        Dict[str, Tuple[str, str, int]]: column -> (shared memory name, dtype, rows).
+    """
+    import pandas as pd
+
+    frame = pd.read_csv(io.BytesIO(header + chunk), usecols=columns)
+
+    buffers = {}
+    try:
+        for column, values in _frame_columns(frame, columns).items():
+            memory = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            buffers[column] = (memory.name, values.dtype.str, len(values))
+            np.ndarray(values.shape, dtype=values.dtype, buffer=memory.buf)[:] = values
+            memory.close()
+            # the parent unlinks the buffer once copied; don't let this worker's tracker do it
+            resource_tracker.unregister(memory._name, "shared_memory")
+    except BaseException:
+        # not handed back: the parent cannot unlink them
+        _unlink_buffers(buffers)
+        raise
+    return buffers
+
+
+def _unlink_buffers(buffers: Dict[str, Tuple[str, str, int]]):
+    """
+    Unlink the shared-memory column buffers of a parsed part (see _parse_chunk).
+
+    Args:
+        buffers (Dict[str, Tuple[str, str, int]]): column -> (shared memory name, dtype, rows).
+    """
+    for name, _, _ in buffers.values():
+        try:
+            memory = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            continue
+        memory.close()
+        memory.unlink()
+
+
+def _unlink_parts(futures: List[Future]):
+    """
+    Unlink the shared-memory column buffers of every part parsed, collected or not
+    (e.g. when another part failed).
+
+    Args:
+        futures (List[Future]): _parse_range / _parse_chunk futures.
+    """
+    for future in futures:
+        if future.done() and not future.cancelled() and future.exception() is None:
+            _unlink_buffers(future.result())
+
+
+def read_csv_parallel(
+    file_path: str, series: str, workers: int, range_bytes: int = RANGE_BYTES
+) -> ColumnFrame:
+    """
+    Read the required (and optional) columns of a series from a csv, parsing newline-aligned
+    byte ranges in a process pool. Workers hand back columns in shared memory,
+    which are copied once into the concatenated result, in file order.
+
+    Args:
+        file_path (str): file path.
+        series (str): name of the series (see microplot.schema.SERIES_COLUMNS).
+        workers (int): number of worker processes.
+        range_bytes (int): target size of each byte range. Default = RANGE_BYTES.
+
+    Returns:
+        ColumnFrame: the series (the same column types as read_csv).
+    """
+    _check(file_path)
+    header, ranges = _byte_ranges(file_path, range_bytes)
+    columns = _series_columns(series, _header_columns(header))
+    if not ranges:
+        return read_csv(file_path, series)
+
+    futures = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_parse_range, file_path, header, start, stop, columns)
+                for start, stop in ranges
+            ]
+        # every range is parsed (or failed) once the pool shuts down; raises the first failure
+        return _collect_parts([future.result() for future in futures], columns)
+    finally:
+        _unlink_parts(futures)
+
+
+def read_csv_stream(
+    file_path: str, series: str, workers: int, chunk_bytes: int = RANGE_BYTES
+) -> ColumnFrame:
+    """
+    Read the required (and optional) columns of a series from a compressed csv without
+    decompressing to disk: the decompressed stream is cut into newline-aligned chunks
+    that are parsed in a process pool while decompression continues. Multi-frame zstd
+    files are also decompressed in parallel.
+
+    Args:
+        file_path (str): file path.
+        series (str): name of the series (see microplot.schema.SERIES_COLUMNS).
+        workers (int): number of worker processes (and decompression threads).
+        chunk_bytes (int): target size of each parsed chunk. Default = RANGE_BYTES.
+
+    Returns:
+        ColumnFrame: the series (the same column types as read_csv).
+    """
+    _check(file_path)
+    chunks = _iter_chunks(_iter_blocks(file_path, workers), chunk_bytes)
+    first = next(chunks, b"")
+    header, _, first = first.partition(b"\n")
+    header += b"\n"
+    columns = _series_columns(series, _header_columns(header))
+
+    futures = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # bounded number of chunks in flight keeps memory flat
+            for chunk in itertools.chain([first] if first else [], chunks):
+                futures.append(executor.submit(_parse_chunk, header, chunk, columns))
+                if len(futures) > 2 * workers:
+                    futures[-2 * workers - 1].result()
+        if not futures:
+            return ColumnFrame({column: np.empty(0) for column in columns})
+        return _collect_parts([future.result() for future in futures], columns)
+    finally:
+        _unlink_parts(futures)
+
+
+def _collect_parts(parts: List[Dict[str, Tuple[str, str, int]]], columns: List[str]) -> ColumnFrame:
+    """
+    Copy the shared-memory column buffers of parsed parts, in order, into one table
+    (the caller unlinks the buffers, see _unlink_parts).
+
+    Args:
+        parts (List[Dict[str, Tuple[str, str, int]]]): column buffers per part (see _parse_chunk).
+        columns (List[str]): columns parsed.
+
+    Returns:
+        ColumnFrame: the concatenated table.
+    """
+    result = {}
+    for column in columns:
+        descriptors = [part[column] for part in parts]
+        dtype = np.result_type(*[np.dtype(dtype) for _, dtype, _ in descriptors])
+        values = np.empty(sum(rows for _, _, rows in descriptors), dtype=dtype)
+        offset = 0
+        for name, part_dtype, rows in descriptors:
+            memory = shared_memory.SharedMemory(name=name)
+            values[offset : offset + rows] = np.ndarray(
+                (rows,), dtype=part_dtype, buffer=memory.buf
+            )
+            memory.close()
+            offset += rows
+        result[column] = values
+
+    return ColumnFrame(result)
+
+
+def load_csv_data(
+    file_paths: Dict[str, Optional[str]],
+    logger: Optional[logging.Logger] = None,
+    workers: int = 1,
+) -> PlotterDataClass:
+    """
+    Read csv files into a PlotterDataClass.
+
+    Args:
+        file_paths (Dict[str, Optional[str]]): series name -> csv (or .csv.gz/.zst/.xz) file path (None = skip).
+        logger (Optional[logging.Logger]): progress logger. Default = "microplotter" logger.
+        workers (int): worker processes for parsing large csvs (see read_csv_parallel, read_csv_stream). Default = 1.
+
+    Returns:
+        PlotterDataClass: dataclass for plotting object.
+    """
+    logger = logger or logging.getLogger("microplotter")
+
+    # data class
+    data = PlotterDataClass()
+
+    for series in SERIES_COLUMNS:
+        file_path = file_paths.get(series)
+        if file_path is None:
+            continue
+        _check(file_path)
+        logger.info(f"Reading in {SERIES_LABELS[series]}....")
+        compressed = _codec(file_path) is not None
+        if compressed and workers > 1 and os.path.getsize(file_path) >= PARALLEL_MIN_COMPRESSED_BYTES:
+            setattr(data, series, read_csv_stream(file_path, series, workers))
+        elif not compressed and workers > 1 and os.path.getsize(file_path) >= PARALLEL_MIN_BYTES:
+            setattr(data, series, read_csv_parallel(file_path, series, workers))
+        else:
+            setattr(data, series, read_csv(file_path, series))
+        report = data.ordering_reports[series]
+        if report.unsorted_runs or report.duplicates:
+            logger.info(
+                f"Repaired {SERIES_LABELS[series]} ordering: {report.reordered} rows reordered, "
+                f"{report.duplicates} duplicates, {report.dropped} rows dropped"
+            )
+        logger.info("Done")
+
+    return data
+
+
+def load_sim_run(
+    directory: str,
+    logger: Optional[logging.Logger] = None,
+    workers: int = 1,
+) -> PlotterDataClass:
+    """
+    Read a simulation run directory (fill_data, order_data and val_data csvs, any of them,
+    plain or compressed; see SIM_RUN_FILES) into a run dataclass for
+    PlotterDataClass.add_sim_run.
+
+    Args:
+        directory (str): run directory.
+        logger (Optional[logging.Logger]): progress logger. Default = "microplotter" logger.
+        workers (int): worker processes for parsing large csvs. Default = 1.
+
+    Raises:
+        Exception: no run file in the directory.
+
+    Returns:
+        PlotterDataClass: the run's series.
+    """
+    file_paths = {}
+    for series, name in SIM_RUN_FILES.items():
+        for extension in [".csv", *COMPRESSED_EXTENSIONS]:
+            file_path = os.path.join(directory, name + extension)
+            if os.path.isfile(file_path):
+                file_paths[series] = file_path
+                break
+    if not file_paths:
+        raise Exception(
+            f"{directory} has none of the sim run files: {', '.join(name + '.csv' for name in SIM_RUN_FILES.values())}"
+        )
+    return load_csv_data(file_paths, logger, workers)
+
+
+@dataclass
+class SeriesProgress:
+    """
+    Loading state of one series of a ProgressiveLoader.
+
+    series (str): name of the series.
+    state (str): "queued", "reading", "ready" or "failed".
+    rows (int): rows loaded (once ready).
+    seconds (float): time spent reading (once ready or failed).
+    error (Optional[str]): why reading failed.
+    """
+
+    series: str
+    state: str = "queued"
+    rows: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+class ProgressiveLoader:
+    """
+    Reads the quote data first (see load_first), and the other series afterwards on a
+    background thread, one at a time, handing each over as soon as it is read: the plot
+    window can open on the quotes while trades, fills, orders and valuations load.
+    """
+
+    def __init__(
+        self,
+        file_paths: Dict[str, Optional[str]],
+        logger: Optional[logging.Logger] = None,
+        workers: int = 1,
+    ):
+        """
+        Args:
+            file_paths (Dict[str, Optional[str]]): series name -> csv (or .csv.gz/.zst/.xz) file path (None = skip).
+            logger (Optional[logging.Logger]): progress logger. Default = "microplotter" logger.
+            workers (int): worker processes for parsing large csvs (see load_csv_data). Default = 1.
+
+        Raises:
+            Exception: no quote data file, or a file path either does not exist or is not a csv.
+        """
+        self._file_paths = {series: path for series, path in file_paths.items() if path is not None}
+        if "quote_data" not in self._file_paths:
+            raise Exception("quote data file is required")
+        # fail before the window opens, not on the loading thread
+        for file_path in self._file_paths.values():
+            _check(file_path)
+        self._logger = logger or logging.getLogger("microplotter")
+        self._workers = workers
+        # series -> loading state, in load order
+        self._progress = {
+            series: SeriesProgress(series)
+            for series in SERIES_COLUMNS
+            if series in self._file_paths and series not in PROGRESSIVE_FIRST_SERIES
+        }
+        self._executor = None
+        self._cancelled = False
+
+    def load_first(self) -> PlotterDataClass:
+        """
+        Read the series needed before the window opens (PROGRESSIVE_FIRST_SERIES).
+
+        Returns:
+            PlotterDataClass: dataclass for plotting object.
+        """
+        return load_csv_data(
+            {series: self._file_paths.get(series) for series in PROGRESSIVE_FIRST_SERIES},
+            self._logger,
+            self._workers,
+        )
+
+    @property
+    def progress(self) -> List[SeriesProgress]:
+        """
+        Returns:
+            List[SeriesProgress]: loading state of each background series, in load order.
+        """
+        return [replace(progress) for progress in self._progress.values()]
+
+    @property
+    def pending(self) -> List[str]:
+        """
+        Returns:
+            List[str]: series queued or being read.
+        """
+        return [series for series, progress in self._progress.items() if progress.state in ("queued", "reading")]
+
+    def start(
+        self,
+        on_loaded: Callable[[str, PlotterDataClass], None],
+        on_progress: Optional[Callable[[SeriesProgress], None]] = None,
+    ):
+        """
+        Start reading the other series on a background thread.
+
+        Args:
+            on_loaded (Callable[[str, PlotterDataClass], None]): called from the loading thread as
+                on_loaded(series, part) once a series is read, ordered and grouped by symbol:
+                part holds only that series (see PlotterDataClass.take_series).
+            on_progress (Optional[Callable[[SeriesProgress], None]]): called from the loading
+                thread on every state change, with a copy of the series' state.
+        """
+        if self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        for series in self._progress:
+            self._executor.submit(self._load, series, on_loaded, on_progress or (lambda progress: None))
+
+    def _load(self, series: str, on_loaded: Callable, on_progress: Callable):
+        if self._cancelled:
+            return
+        progress = self._progress[series]
+        progress.state = "reading"
+        on_progress(replace(progress))
+        start = time.perf_counter()
+        try:
+            part = load_csv_data({series: self._file_paths[series]}, self._logger, self._workers)
+            # group by symbol here, not on the thread the part is handed to
+            part._rows(series, "")
+        except Exception as error:
+            progress.state, progress.error = "failed", str(error)
+            progress.seconds = time.perf_counter() - start
+            self._logger.error(f"Reading in {SERIES_LABELS[series]} failed: {error}")
+            on_progress(replace(progress))
+            return
+        if self._cancelled:
+            return
+        on_loaded(series, part)
+        progress.state, progress.rows = "ready", len(getattr(part, "_" + series))
+        progress.seconds = time.perf_counter() - start
+        on_progress(replace(progress))
+
+    def cancel(self):
+        """
+        Stop loading: queued series are dropped, and a series being read is not handed over.
+        """
+        self._cancelled = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
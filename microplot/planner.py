@@ -0,0 +1,357 @@
+"""
+This module contains the memory planner: it estimates the footprint of a set of input files
+before they are read, and picks the loading strategy that fits a memory budget.
+
+Strategies, cheapest first to use:
+
+    in_memory     every row is loaded, and every row is drawn (current behaviour).
+    overview      every row is loaded, but each view draws a decimated window of at most
+                  max_points per series and symbol, re-queried as the view changes.
+    out_of_core   series are loaded one at a time into a memory-mapped columnar store on
+                  disk (see MemmapDataSource); views read their window from it.
+
+Estimates come from the file sizes and a sample read from the head of each file (row width
+in bytes on disk and once parsed, symbols seen). They are approximate by design: the plan
+and its estimate are logged next to the actual peak memory, to keep them honest.
+"""
+
+from dataclasses import dataclass, field
+import gzip
+import io
+import logging
+import lzma
+import os
+import sys
+import tempfile
+from typing import Dict, Optional, Tuple, Union
+
+from microplot.data import PlotterDataClass
+from microplot.datasource import DataSource, MemmapDataSource
+from microplot.loaders import (
+    SERIES_LABELS,
+    _check,
+    _codec,
+    _header_columns,
+    _series_columns,
+    _zstandard,
+    load_csv_data,
+)
+from microplot.schema import SERIES_COLUMNS
+
+IN_MEMORY = "in_memory"
+OVERVIEW = "overview"
+OUT_OF_CORE = "out_of_core"
+
+# decompressed bytes sampled from the head of each file
+SAMPLE_BYTES = 2**20
+# rows per series and symbol drawn per view, in the overview and out-of-core strategies
+OVERVIEW_MAX_POINTS = 20000
+# approximate plot-side bytes per drawn row: ArrayPlotData copies and renderer screen caches
+PLOT_BYTES_PER_ROW = {
+    "quote_data": 96,
+    "trade_data": 48,
+    "fill_data_sim": 48,
+    "fill_data_prod": 48,
+    "orders": 48,
+    "val_data": 32,
+}
+# row index bytes per loaded row (PlotterDataClass and DataFrameDataSource symbol groupings)
+INDEX_BYTES_PER_ROW = 16
+# transient parse copies, as a multiple of the loaded size of the series being read
+PARSE_PEAK_FACTOR = 1.0
+# fixed cost per subplot (Plot objects, axes, backbuffers)
+SUBPLOT_BYTES = 8 * 2**20
+
+
+@dataclass
+class SeriesEstimate:
+    """
+    Footprint estimate of one input file.
+
+    file_bytes (int): size on disk.
+    text_bytes (int): decompressed csv size (= file_bytes for plain csvs).
+    rows (int): estimated rows.
+    row_bytes (int): estimated in-memory bytes per row once loaded.
+    symbols (int): symbols seen in the sample (a lower bound).
+    """
+
+    file_bytes: int
+    text_bytes: int
+    rows: int
+    row_bytes: int
+    symbols: int
+
+    @property
+    def loaded_bytes(self) -> int:
+        return self.rows * self.row_bytes
+
+
+@dataclass
+class MemoryPlan:
+    """
+    The loading strategy picked for a memory budget.
+
+    strategy (str): IN_MEMORY, OVERVIEW or OUT_OF_CORE.
+    budget_bytes (int): the memory budget.
+    estimated_bytes (int): estimated peak footprint of the strategy.
+    max_points (Optional[int]): rows per series and symbol drawn per view (None = all).
+    estimates (Dict[str, SeriesEstimate]): series name -> estimate.
+    footprints (Dict[str, int]): strategy -> estimated peak footprint.
+    """
+
+    strategy: str
+    budget_bytes: int
+    estimated_bytes: int
+    max_points: Optional[int] = None
+    estimates: Dict[str, SeriesEstimate] = field(default_factory=dict)
+    footprints: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def fits(self) -> bool:
+        return self.estimated_bytes <= self.budget_bytes
+
+    def describe(self) -> str:
+        return (
+            f"{self.strategy} (estimated {format_bytes(self.estimated_bytes)} "
+            f"of a {format_bytes(self.budget_bytes)} budget"
+            + ("" if self.fits else ", over budget: no cheaper strategy left")
+            + ")"
+        )
+
+
+def parse_bytes(text: Union[str, int]) -> int:
+    """
+    Parse a memory size: bytes, or a number with a K/M/G/T suffix (powers of 1024), e.g. "8G".
+
+    Args:
+        text (Union[str, int]): memory size.
+
+    Raises:
+        Exception: unreadable size.
+
+    Returns:
+        int: size in bytes.
+    """
+    if isinstance(text, int):
+        return text
+    units = {"K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+    value = text.strip().upper().rstrip("IB").rstrip("B")
+    try:
+        if value and value[-1] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+        return int(float(value))
+    except ValueError:
+        raise Exception(f"unreadable memory size: {text}") from None
+
+
+def format_bytes(size: int) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Returns:
+        Optional[int]: peak resident memory of this process so far (None = unavailable).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _sample(file_path: str, sample_bytes: int) -> Tuple[bytes, int]:
+    """
+    Read the decompressed head of a (compressed) csv.
+
+    Returns:
+        Tuple[bytes, int]: the sample, and the bytes of the file it was decompressed from.
+    """
+    with open(file_path, "rb") as raw:
+        codec = _codec(file_path)
+        if codec == "gzip":
+            stream = gzip.GzipFile(fileobj=raw)
+        elif codec == "xz":
+            stream = lzma.LZMAFile(raw)
+        elif codec == "zstd":
+            stream = _zstandard().ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        else:
+            stream = raw
+        sample = stream.read(sample_bytes)
+        return sample, raw.tell()
+
+
+def estimate_series(file_path: str, series: str, sample_bytes: int = SAMPLE_BYTES) -> SeriesEstimate:
+    """
+    Estimate the footprint of one input file from its size and a sample of its head.
+
+    Args:
+        file_path (str): csv (or .csv.gz/.zst/.xz) file path.
+        series (str): name of the series (see microplot.schema.SERIES_COLUMNS).
+        sample_bytes (int): decompressed bytes to sample. Default = SAMPLE_BYTES.
+
+    Returns:
+        SeriesEstimate: the estimate.
+    """
+    import pandas as pd
+
+    _check(file_path)
+    file_bytes = os.path.getsize(file_path)
+    sample, consumed = _sample(file_path, sample_bytes)
+    if len(sample) < sample_bytes:
+        # the whole file was read
+        text_bytes = len(sample)
+    else:
+        text_bytes = int(file_bytes * len(sample) / max(consumed, 1))
+        sample = sample[: sample.rfind(b"\n") + 1]
+
+    header, _, body = sample.partition(b"\n")
+    columns = _series_columns(series, _header_columns(header))
+    frame = pd.read_csv(io.BytesIO(header + b"\n" + body), usecols=columns)
+    sample_rows = max(len(frame), 1)
+    rows = int((text_bytes - len(header) - 1) * sample_rows / max(len(body), 1))
+
+    # every reader parses strings into fixed-width numpy strings
+    row_bytes = 8  # timestamp_ns, kept alongside the float seconds
+    for column in columns:
+        values = frame[column].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        row_bytes += values.dtype.itemsize
+    symbols = int(frame["symbol"].nunique()) if "symbol" in frame else 1
+    return SeriesEstimate(file_bytes, text_bytes, rows, row_bytes, symbols)
+
+
+def plan_memory(
+    file_paths: Dict[str, Optional[str]],
+    budget_bytes: Union[str, int],
+    max_points: int = OVERVIEW_MAX_POINTS,
+    sample_bytes: int = SAMPLE_BYTES,
+) -> MemoryPlan:
+    """
+    Estimate the footprint of each loading strategy, and pick the first one (in_memory,
+    overview, out_of_core) that fits the budget. out_of_core is picked when none fits.
+
+    Args:
+        file_paths (Dict[str, Optional[str]]): series name -> csv file path (None = skip).
+        budget_bytes (Union[str, int]): memory budget, in bytes or e.g. "8G".
+        max_points (int): rows per series and symbol drawn per view, when decimating. Default = OVERVIEW_MAX_POINTS.
+        sample_bytes (int): decompressed bytes sampled per file. Default = SAMPLE_BYTES.
+
+    Returns:
+        MemoryPlan: the plan.
+    """
+    budget_bytes = parse_bytes(budget_bytes)
+    estimates = {
+        series: estimate_series(file_path, series, sample_bytes)
+        for series, file_path in file_paths.items()
+        if file_path is not None
+    }
+    if not estimates:
+        return MemoryPlan(IN_MEMORY, budget_bytes, 0)
+
+    symbols = max(estimate.symbols for estimate in estimates.values())
+    loaded = sum(
+        estimate.rows * (estimate.row_bytes + INDEX_BYTES_PER_ROW) for estimate in estimates.values()
+    )
+    parse_peak = max(int(estimate.loaded_bytes * PARSE_PEAK_FACTOR) for estimate in estimates.values())
+    subplots = symbols * SUBPLOT_BYTES
+
+    def drawn(series: str, estimate: SeriesEstimate, cap: Optional[int]) -> int:
+        rows = estimate.rows if cap is None else min(estimate.rows, cap * estimate.symbols)
+        return rows * PLOT_BYTES_PER_ROW[series]
+
+    footprints = {
+        IN_MEMORY: loaded
+        + parse_peak
+        + subplots
+        + sum(drawn(series, estimate, None) for series, estimate in estimates.items()),
+        OVERVIEW: loaded
+        + parse_peak
+        + subplots
+        + sum(drawn(series, estimate, max_points) for series, estimate in estimates.items()),
+        # one series in memory at a time, while it is written to the store
+        OUT_OF_CORE: max(
+            int(estimate.loaded_bytes * (1 + PARSE_PEAK_FACTOR)) for estimate in estimates.values()
+        )
+        + subplots
+        + sum(drawn(series, estimate, max_points) for series, estimate in estimates.items()),
+    }
+
+    strategy = next(
+        (name for name, footprint in footprints.items() if footprint <= budget_bytes), OUT_OF_CORE
+    )
+    return MemoryPlan(
+        strategy=strategy,
+        budget_bytes=budget_bytes,
+        estimated_bytes=footprints[strategy],
+        max_points=None if strategy == IN_MEMORY else max_points,
+        estimates=estimates,
+        footprints=footprints,
+    )
+
+
+def load_planned(
+    file_paths: Dict[str, Optional[str]],
+    plan: MemoryPlan,
+    logger: Optional[logging.Logger] = None,
+    workers: int = 1,
+    store_dir: Optional[str] = None,
+) -> Union[PlotterDataClass, DataSource]:
+    """
+    Load the input files the way a plan says. Pass plan.max_points on to MicroPlotter.
+
+    Args:
+        file_paths (Dict[str, Optional[str]]): series name -> csv file path (None = skip).
+        plan (MemoryPlan): the plan (see plan_memory).
+        logger (Optional[logging.Logger]): progress logger. Default = "microplotter" logger.
+        workers (int): worker processes for parsing large csvs. Default = 1.
+        store_dir (Optional[str]): columnar store directory, for out_of_core. Default = a new temporary directory.
+
+    Returns:
+        Union[PlotterDataClass, DataSource]: the loaded data, or a DataSource over the on-disk store.
+    """
+    logger = logger or logging.getLogger("microplotter")
+    logger.info(f"Memory plan: {plan.describe()}")
+    if plan.strategy != OUT_OF_CORE:
+        return load_csv_data(file_paths, logger, workers=workers)
+
+    store_dir = store_dir or tempfile.mkdtemp(prefix="microplot_store_")
+    logger.info(f"Writing columnar store to {store_dir}")
+    for series in SERIES_COLUMNS:
+        if file_paths.get(series) is None:
+            continue
+        # one series in memory at a time
+        data = load_csv_data({series: file_paths[series]}, logger, workers=workers)
+        MemmapDataSource.write(data, store_dir)
+        logger.info(f"Stored {SERIES_LABELS[series]}")
+        del data
+    return MemmapDataSource(store_dir)
+
+
+def log_actual(plan: MemoryPlan, logger: Optional[logging.Logger] = None, baseline_bytes: int = 0):
+    """
+    Log the peak memory used so far against the plan's estimate.
+
+    Args:
+        plan (MemoryPlan): the plan.
+        logger (Optional[logging.Logger]): logger. Default = "microplotter" logger.
+        baseline_bytes (int): peak memory before loading (interpreter, imports). Default = 0.
+    """
+    logger = logger or logging.getLogger("microplotter")
+    peak = peak_rss_bytes()
+    if peak is None:
+        logger.info(f"Memory plan {plan.strategy}: estimated {format_bytes(plan.estimated_bytes)}, actual unavailable")
+        return
+    actual = max(peak - baseline_bytes, 0)
+    logger.info(
+        f"Memory plan {plan.strategy}: estimated {format_bytes(plan.estimated_bytes)}, "
+        f"actual {format_bytes(actual)} (peak RSS {format_bytes(peak)}, "
+        f"{actual / max(plan.estimated_bytes, 1):.2f}x of estimate)"
+    )
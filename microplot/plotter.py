@@ -2,16 +2,65 @@
 This module contains the microstructure plotter.
 """
 
+import importlib.util
+import logging
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
 from enable.api import ComponentEditor
-from traits.api import HasTraits, Instance
-from traitsui.api import Handler, Item, View
+from pyface.api import GUI
+from traits.api import HasTraits, Instance, Str
+from traitsui.api import Action, Handler, Item, View
 
 from chaco.scales.api import CalendarScaleSystem
 from chaco.scales_tick_generator import ScalesTickGenerator
 from chaco.tools.api import PanTool, ZoomTool
-from chaco.api import ArrayPlotData, Plot, PlotAxis, PlotGrid, VPlotContainer
-
+from chaco.api import (
+    ArrayPlotData,
+    DataRange1D,
+    LinePlot,
+    LinearMapper,
+    Plot,
+    PlotAxis,
+    PlotGrid,
+    ScatterPlot,
+    VPlotContainer,
+)
+
+from microplot.activity import ACTIVITY_KINDS, ActivityPyramid
+from microplot.clock import ClockCorrection
 from microplot.data import PlotterDataClass
+from microplot.datasource import AsyncQueryRunner, DataFrameDataSource, DataSource
+from microplot.derived import BAND, DERIVED_SERIES, OFFSET
+from microplot.export import export_window
+from microplot.filters import EventFilter, compile_filter
+from microplot.ladder import LADDER_INPUTS, OrderLadder
+from microplot.loaders import SERIES_LABELS, ProgressiveLoader, SeriesProgress
+from microplot.prepare import event_fields, prepare_subplots, series_fields, use_pool
+from microplot.renderers import (
+    EVENT_CATEGORIES,
+    SIM_RUN_COLORS,
+    EventCategory,
+    EventScatterPlot,
+    OrderLadderPlot,
+    StepBandPlot,
+)
+from microplot.scheduler import FrameStats, RedrawScheduler, TimedVPlotContainer
+
+
+# activity strip height (pixels) and target buckets per view
+ACTIVITY_STRIP_HEIGHT = 60
+ACTIVITY_BUCKETS = 400
+
+
+def _rate_label(rate: float) -> str:
+    """
+    Compact tick label for event rates (events/s).
+    """
+    for scale, suffix in ((1e6, "M"), (1e3, "k")):
+        if abs(rate) >= scale:
+            return f"{rate / scale:g}{suffix}"
+    return f"{rate:g}"
 
 
 class DummyPlotterHandler(Handler):
@@ -20,9 +69,33 @@ class DummyPlotterHandler(Handler):
     This forces a silent close of the plotter.
     """
 
+    def init(self, info):
+        # the window is up: start loading the remaining series
+        info.object._start_loading()
+        return True
+
     def closed(self, info, is_ok):
+        # report frame times on the way out
+        plotter = info.object
+        if plotter._loader is not None:
+            plotter._loader.cancel()
+        if plotter._scheduler is not None:
+            logger = logging.getLogger("microplotter")
+            for render_pass, stats in plotter.frame_stats.items():
+                logger.info(
+                    f"{render_pass} frames: {stats.frames}, mean {stats.mean_ms:.1f} ms, max {stats.max_ms:.1f} ms"
+                )
         return
 
+    def on_export_view(self, info):
+        # export the visible window to a chosen directory
+        from pyface.api import OK, DirectoryDialog
+
+        dialog = DirectoryDialog(parent=info.ui.control, new_directory=True)
+        if dialog.open() == OK:
+            fmt = "parquet" if importlib.util.find_spec("pyarrow") else "csv"
+            info.object.export_view(dialog.path, fmt=fmt)
+
 
 class MicroPlotter(HasTraits):
     """
@@ -30,29 +103,94 @@ class MicroPlotter(HasTraits):
     """
 
     container = Instance(VPlotContainer)
+    # per-series progress of a progressive load (empty once every series is in)
+    load_status = Str()
 
     traits_view = View(
         Item("container", editor=ComponentEditor(), show_label=False),
+        Item("load_status", style="readonly", show_label=False, visible_when="load_status"),
         width=900,
         height=500,
         resizable=True,
         title="Microstructure Plotter",
         handler=DummyPlotterHandler,
+        buttons=[Action(name="Export view", action="on_export_view")],
     )
 
-    def __init__(self, data: PlotterDataClass, show_legend: bool = False):
+    def __init__(
+        self,
+        data: Union[PlotterDataClass, DataSource],
+        show_legend: bool = False,
+        max_points: Optional[int] = None,
+        show_activity: bool = False,
+        collapse_quotes: bool = True,
+        workers: int = 1,
+        loader: Optional[ProgressiveLoader] = None,
+    ):
         """
         Args:
-            data (PlotterDataClass): dataclass for plotting object.
+            data (Union[PlotterDataClass, DataSource]): dataclass for plotting object, or a DataSource to query on demand.
             show_legend (bool): flag to show legend on plots. Crowded image. Default = False.
+            max_points (Optional[int]): max points per series and view. When set, the visible window
+                is re-queried as the view changes. Default = the DataSource's default_max_points.
+            show_activity (bool): flag to show an event-rate strip under each subplot. Default = False.
+            collapse_quotes (bool): draw only the quote rows that change the bid, ask or micro price
+                (the steps drawn are identical). Default = True.
+            workers (int): worker processes preparing the subplots' data of large datasets (see
+                microplot.prepare.use_pool). Default = 1 (serially, in this process).
+            loader (Optional[ProgressiveLoader]): loader of the series not in data yet (see
+                ProgressiveLoader.load_first): they are read in the background once the window
+                is open, and attached to the subplots as they arrive. Default = None.
         """
 
-        # plotterdataclass ingested from datasource
-        self._data = data
+        # plotterdataclass ingested from datasource (None for out-of-core sources)
+        self._data = data if isinstance(data, PlotterDataClass) else None
+        # range-query source the subplots are filled from
+        self._source = (
+            data if isinstance(data, DataSource) else DataFrameDataSource(data, collapse_quotes)
+        )
+        self._collapse_quotes = collapse_quotes
+        # subplot data prepared in a process pool, while the subplots are built
+        self._workers = workers
+        self._prepared = None
+        # row cap per series and view (None = full fidelity, no re-query)
+        self._max_points = (
+            max_points if max_points is not None else self._source.default_max_points
+        )
         # flag to show legend in plots (warning: crowds screen)
         self._show_legend = show_legend
+        # flag to show activity strips; symbol -> (count pyramid, strip plot data)
+        self._show_activity = show_activity
+        self._activity = {}
         # find union of symbols across time series
-        self._symbols = data.get_symbols()
+        self._symbols = self._source.symbols()
+
+        # ArrayPlotData per symbol, updated by on-demand queries
+        self._plot_data = {}
+        # subplot per symbol
+        self._symbol_plots = {}
+        # secondary-axis mapper per symbol, for OFFSET derived series
+        self._offset_mappers = {}
+        # highlight filters: expression -> (compiled filter, legend name, plot data field prefix); filters added so far
+        self._filters = {}
+        self._filter_count = 0
+        # working-order intervals, built on first use
+        self._ladder = None
+        # sim run name -> (DataSource over the run, plot data field prefix, color, visible)
+        self._sim_runs = {}
+        # (sim run name, symbol) -> renderers drawn
+        self._sim_run_renderers = {}
+        self._sim_run_count = 0
+        self._query_runner = None
+        self._query_bounds = None
+        # redraw scheduler, set once the container is built
+        self._scheduler = None
+        # progressive load: loader, series -> loading state, callbacks once every series is in
+        if loader is not None and self._data is None:
+            raise Exception("progressive loading requires a PlotterDataClass")
+        self._loader = loader
+        self._load_progress = {progress.series: progress for progress in loader.progress} if loader else {}
+        self._loaded_callbacks = []
 
         # to cache Plot objects
         self._subplots = []
@@ -62,6 +200,7 @@ class MicroPlotter(HasTraits):
         self._top_plot_bottom_axis = None
 
         super().__init__()
+        self.load_status = self._format_load_status()
 
     def plot(self, *args, **kws):
         """
@@ -78,6 +217,16 @@ class MicroPlotter(HasTraits):
         except:
             raise Exception("Unable to configure traits.")
 
+    @property
+    def frame_stats(self) -> Dict[str, FrameStats]:
+        """
+        Frame-time counters of the plot window, per render pass ("preview", "full").
+
+        Returns:
+            Dict[str, FrameStats]: render pass -> frame-time counters.
+        """
+        return self.container.frame_stats
+
     def _container_default(self) -> VPlotContainer:
         """
         Required method for HasTraits class to return a
@@ -101,13 +250,28 @@ class MicroPlotter(HasTraits):
             the subplots of interest.
         """
 
+        # prepare every symbol's arrays in parallel; derived series too, so toggling them is instant
+        if self._data is not None and use_pool(self._data, self._symbols, self._workers):
+            self._prepared = prepare_subplots(
+                self._data,
+                self._symbols,
+                self._workers,
+                max_points=self._max_points,
+                collapse_quotes=self._collapse_quotes,
+                activity=self._show_activity,
+                derived=self._data.derived_series(),
+            )
+
         # run through each symbol, instantiate subplots
         for symbol in self._symbols:
             plot = self._generate_subplot(symbol)
             self._link_subplot(plot)
+            if self._show_activity:
+                # stacked bottom to top: the strip goes under its subplot
+                self._subplots.insert(-1, self._generate_activity_strip(symbol))
 
         # instantiate a container to hold all the plots
-        container = VPlotContainer(bgcolor="transparent")
+        container = TimedVPlotContainer(bgcolor="transparent")
 
         # add all the linked sub-plots to the VPlotContainer
         for plot in self._subplots:
@@ -115,6 +279,28 @@ class MicroPlotter(HasTraits):
         # clear cache
         self._subplots = []
 
+        if self._collapse_quotes and self._data is not None and self._data.quote_data is not None:
+            if self._prepared is not None:
+                report = self._prepared.collapse_report
+            else:
+                report = self._data.collapse_report
+            logging.getLogger("microplotter").info(
+                f"Collapsed quote updates: {report.kept} of {report.rows} rows plotted ({report.ratio:.1f}x fewer)"
+            )
+        # the subplots hold the prepared views now
+        self._prepared = None
+
+        # coalesce range changes: preview pass while panning/zooming, full pass once idle.
+        # on-demand sources already cap points per view, and re-query once idle instead.
+        self._scheduler = RedrawScheduler(container, preview=self._max_points is None)
+        if self._max_points is not None:
+            self._query_runner = AsyncQueryRunner(self._source)
+            self._scheduler.idle_callbacks.append(self._on_index_range_updated)
+        if self._activity:
+            self._scheduler.frame_callbacks.append(self._rebucket_activity)
+        if self._top_plot_index_range is not None:
+            self._top_plot_index_range.observe(self._scheduler.range_changed, "updated")
+
         return container
 
     def _generate_subplot(self, symbol: str) -> Plot:
@@ -137,12 +323,118 @@ class MicroPlotter(HasTraits):
 
         # render plots
         self._render_plots(plot, plot_attributes)
+        if self._data is not None:
+            for name in self._data.sim_runs:
+                self._render_sim_run(plot, symbol, name)
 
         # setup plot stuff
         self._setup_plot(plot, symbol)
 
+        self._symbol_plots[symbol] = plot
+
         return plot
 
+    def _generate_activity_strip(self, symbol: str) -> Plot:
+        """
+        For a given symbol, instantiate the activity strip: event rates per
+        time bucket (quotes, trades, orders, fills) on the shared time axis.
+
+        Args:
+            symbol (str): The symbol of interest.
+
+        Returns:
+            Plot: The activity strip Plot object.
+        """
+        if self._prepared is not None:
+            pyramid = self._prepared.pyramids[symbol]
+        else:
+            pyramid = ActivityPyramid(self._activity_timestamps(symbol))
+        strip_data = ArrayPlotData()
+        strip = Plot(strip_data, auto_grid=False, auto_axis=False)
+        strip.resizable = "h"
+        strip.height = ACTIVITY_STRIP_HEIGHT
+        strip.padding_top = 5
+        strip.padding_bottom = 20
+        strip.legend.visible = self._show_legend
+
+        # rates share one value axis, starting at 0
+        value_mapper = LinearMapper(range=DataRange1D(low_setting=0))
+        for kind, series_names, color in ACTIVITY_KINDS:
+            # kinds of series still loading get their (empty) line now
+            if kind not in pyramid.kinds and not set(series_names) & set(self._loading_series):
+                continue
+            strip_data.set_data(kind + "_edges", np.empty(0))
+            strip_data.set_data(kind + "_rate", np.empty(0))
+            value = strip._get_or_create_datasource(kind + "_rate")
+            value_mapper.range.add(value)
+            # bucket edges stay out of the shared index range: re-bucketing must not re-range it
+            renderer = LinePlot(
+                index=strip._get_or_create_datasource(kind + "_edges"),
+                value=value,
+                index_mapper=LinearMapper(range=self._top_plot_index_range),
+                value_mapper=value_mapper,
+                color=color,
+                line_width=1,
+                render_style="connectedhold",
+                orientation=strip.orientation,
+                origin=strip.default_origin,
+            )
+            strip.add(renderer)
+            strip.plots[kind] = [renderer]
+        strip.overlays.append(
+            PlotAxis(strip, orientation="left", mapper=value_mapper, tick_label_formatter=_rate_label)
+        )
+
+        self._activity[symbol] = (pyramid, strip_data)
+        self._rebucket_activity(symbol)
+
+        return strip
+
+    def _activity_timestamps(self, symbol: str) -> Dict[str, np.ndarray]:
+        """
+        Sorted nanosecond event timestamps of a symbol, per activity kind.
+
+        Args:
+            symbol (str): The symbol of interest.
+
+        Returns:
+            Dict[str, np.ndarray]: activity kind -> int64 ns timestamps.
+        """
+        series_set = self._source.series()
+        timestamps = {}
+        for kind, series_names, _ in ACTIVITY_KINDS:
+            values = []
+            for series in series_names:
+                if series not in series_set:
+                    continue
+                if self._data is not None:
+                    rows = self._data._rows(series, symbol)
+                    values.append(self._data._timestamps(series, symbol, rows, ns=True))
+                else:
+                    seconds = self._source.query(series, symbol)["timestamp"]
+                    values.append(np.round(seconds * 1e9).astype(np.int64))
+            if values:
+                timestamps[kind] = np.sort(np.concatenate(values), kind="stable")
+        return timestamps
+
+    def _rebucket_activity(self, symbol: Optional[str] = None):
+        """
+        Re-bucket the activity strips for the current time window.
+
+        Args:
+            symbol (Optional[str]): The symbol of interest. Default = all symbols.
+        """
+        t0, t1 = self._top_plot_index_range.low, self._top_plot_index_range.high
+        symbols = [symbol] if symbol is not None else list(self._activity)
+        for symbol in symbols:
+            pyramid, strip_data = self._activity[symbol]
+            fields = {}
+            for kind in pyramid.kinds:
+                fields[kind + "_edges"], fields[kind + "_rate"] = pyramid.rates(
+                    kind, t0, t1, ACTIVITY_BUCKETS
+                )
+            strip_data.update_data(fields)
+
     def _setup_plot(self, plot: Plot, symbol: str):
         """
         Setup Plot attributes (zooming, etc).
@@ -212,377 +504,859 @@ class MicroPlotter(HasTraits):
                 render_style="connectedhold",
             )
 
-        # trade_data
-        if "trade_timestamp" in plot_attributes:
-            plot.plot(
-                ("trade_timestamp", "trade_price"),
-                type="scatter",
-                marker="circle",
-                name="trade_price",
-                color="red",
-                marker_size=8,
-                render_style="hold",
-            )
+        # trade, fill and order events: one batched renderer
+        if "event_timestamp" in plot_attributes:
+            self._render_events(plot, plot_attributes)
 
-        # aggr_buy_sim
-        if "sim_aggr_buy_timestamp" in plot_attributes:
+        # val_data
+        if "val_data_timestamp" in plot_attributes:
             plot.plot(
-                ("sim_aggr_buy_timestamp", "sim_aggr_buy_price"),
-                type="scatter",
-                marker="triangle",
-                name="sim_aggr_buy_price",
-                color="blue",
-                marker_size=12,
-                render_style="hold",
+                ("val_data_timestamp", "val_data_price"),
+                color="green",
+                line_style="solid",
+                name="val_data_price",
+                line_width=1,
+                render_style="connectedhold",
             )
 
-        # pass_buy_sim
-        if "sim_pass_buy_timestamp" in plot_attributes:
-            plot.plot(
-                ("sim_pass_buy_timestamp", "sim_pass_buy_price"),
-                type="scatter",
-                marker="circle",
-                name="sim_pass_buy_price",
-                color="blue",
-                marker_size=12,
-                render_style="hold",
-            )
+    @staticmethod
+    def _render_events(plot: Plot, plot_attributes: set):
+        """
+        Render trade, fill and order events with a single batched scatter renderer.
+        Each event category gets a legend entry under its own name.
 
-        # aggr_sell_sim
-        if "sim_aggr_sell_timestamp" in plot_attributes:
-            plot.plot(
-                ("sim_aggr_sell_timestamp", "sim_aggr_sell_price"),
-                type="scatter",
-                marker="triangle",
-                name="sim_aggr_sell_price",
-                color="gold",
-                marker_size=12,
-                render_style="hold",
-            )
+        Args:
+            plot (Plot): The Plot class (for a given symbol).
+            plot_attributes (set): plot attributes set in data_array object.
+        """
+        categories = [
+            EventCategory(name=name, marker=marker, color=color, marker_size=marker_size)
+            for name, _, marker, color, marker_size in EVENT_CATEGORIES
+        ]
+        index = plot._get_or_create_datasource("event_timestamp")
+        plot.index_range.add(index)
+        value = plot._get_or_create_datasource("event_price")
+        plot.value_range.add(value)
+        renderer = EventScatterPlot(
+            index=index,
+            value=value,
+            category=plot._get_or_create_datasource("event_category"),
+            categories=categories,
+            index_mapper=LinearMapper(range=plot.index_range),
+            value_mapper=LinearMapper(range=plot.value_range),
+            orientation=plot.orientation,
+            origin=plot.default_origin,
+        )
+        plot.add(renderer)
 
-        # pass_sell_sim
-        if "sim_pass_sell_timestamp" in plot_attributes:
-            plot.plot(
-                ("sim_pass_sell_timestamp", "sim_pass_sell_price"),
-                type="scatter",
-                marker="circle",
-                name="sim_pass_sell_price",
-                color="gold",
-                marker_size=12,
-                render_style="hold",
-            )
+        # legend entries for the categories present
+        for category, (_, prefix, _, _, _) in zip(categories, EVENT_CATEGORIES):
+            category.renderer = renderer
+            if prefix + "_timestamp" in plot_attributes:
+                plot.plots[category.name] = [category]
 
-        # aggr_buy_prod
-        if "prod_aggr_buy_timestamp" in plot_attributes:
-            plot.plot(
-                ("prod_aggr_buy_timestamp", "prod_aggr_buy_price"),
-                type="scatter",
-                marker="triangle",
-                name="prod_aggr_buy_price",
-                color="purple",
-                marker_size=12,
-                render_style="hold",
-            )
+    @staticmethod
+    def _set_event_data(array_plot_data: ArrayPlotData):
+        """
+        Merge the event categories set in the data array into the single
+        timestamp-sorted (timestamp, price, category code) arrays of the batched renderer.
 
-        # pass_buy_prod
-        if "prod_pass_buy_timestamp" in plot_attributes:
-            plot.plot(
-                ("prod_pass_buy_timestamp", "prod_pass_buy_price"),
-                type="scatter",
-                marker="circle",
-                name="prod_pass_buy_price",
-                color="purple",
-                marker_size=12,
-                render_style="hold",
-            )
+        Args:
+            array_plot_data (ArrayPlotData): The array plot data class for a symbol.
+        """
+        fields = event_fields(
+            array_plot_data.arrays, [prefix for _, prefix, _, _, _ in EVENT_CATEGORIES]
+        )
+        if fields:
+            array_plot_data.update_data(fields)
 
-        # aggr_sell_prod
-        if "prod_aggr_sell_timestamp" in plot_attributes:
-            plot.plot(
-                ("prod_aggr_sell_timestamp", "prod_aggr_sell_price"),
-                type="scatter",
-                marker="triangle",
-                name="prod_aggr_sell_price",
-                color="green",
-                marker_size=12,
-                render_style="hold",
-            )
+    def _set_plot_data_array(self, symbol: str) -> ArrayPlotData:
+        """
+        Instantiate ArrayPlotData class for Plot object.
 
-        # pass_sell_prod
-        if "prod_pass_sell_timestamp" in plot_attributes:
-            plot.plot(
-                ("prod_pass_sell_timestamp", "prod_pass_sell_price"),
-                type="scatter",
-                marker="circle",
-                name="prod_pass_sell_price",
-                color="green",
-                marker_size=12,
-                render_style="hold",
-            )
+        Args:
+            symbol (str): The symbol of interest.
 
-        # new_orders
-        if "new_order_timestamp" in plot_attributes:
-            plot.plot(
-                ("new_order_timestamp", "new_order_price"),
-                type="scatter",
-                marker="diamond",
-                name="new_order_price",
-                color="green",
-                marker_size=6,
-                render_style="hold",
-            )
+        Returns:
+            ArrayPlotData: The array plot data class with required data fields set.
+        """
 
-        # new_order_acks
-        if "new_order_ack_timestamp" in plot_attributes:
-            plot.plot(
-                ("new_order_ack_timestamp", "new_order_ack_price"),
-                type="scatter",
-                marker="diamond",
-                name="new_order_ack_price",
-                color="lightgreen",
-                marker_size=6,
-                render_style="hold",
-            )
+        array_plot_data = ArrayPlotData()
 
-        # cancel_orders
-        if "cancel_order_timestamp" in plot_attributes:
-            plot.plot(
-                ("cancel_order_timestamp", "cancel_order_price"),
-                type="scatter",
-                marker="diamond",
-                name="cancel_order_price",
-                color="red",
-                marker_size=6,
-                render_style="hold",
-            )
+        if self._prepared is not None:
+            array_plot_data.update_data(self._prepared.fields[symbol])
+        else:
+            for series in self._source.series():
+                columns = self._source.query(series, symbol, max_points=self._max_points)
+                self._set_series_data(array_plot_data, series, columns)
+            self._set_event_data(array_plot_data)
 
-        # cancel_order_acks
-        if "cancel_order_ack_timestamp" in plot_attributes:
-            plot.plot(
-                ("cancel_order_ack_timestamp", "cancel_order_ack_price"),
-                type="scatter",
-                marker="diamond",
-                name="cancel_order_ack_price",
-                color="pink",
-                marker_size=6,
-                render_style="hold",
-            )
+        # cache for on-demand updates
+        self._plot_data[symbol] = array_plot_data
 
-        # rejects
-        if "reject_orders_timestamp" in plot_attributes:
-            plot.plot(
-                ("reject_orders_timestamp", "reject_orders_price"),
-                type="scatter",
-                marker="diamond",
-                name="reject_orders_price",
-                color="black",
-                marker_size=6,
-                render_style="hold",
-            )
+        return array_plot_data
 
-        # val_data
-        if "val_data_timestamp" in plot_attributes:
-            plot.plot(
-                ("val_data_timestamp", "val_data_price"),
-                color="green",
-                line_style="solid",
-                name="val_data_price",
+    @staticmethod
+    def _set_series_data(
+        array_plot_data: ArrayPlotData,
+        series: str,
+        columns: Dict[str, np.ndarray],
+        update_only: bool = False,
+    ):
+        """
+        Set the plot data fields of one series from DataSource query columns.
+
+        Args:
+            array_plot_data (ArrayPlotData): The array plot data class for a symbol.
+            series (str): name of the series.
+            columns (Dict[str, np.ndarray]): query result for the series.
+            update_only (bool): only update fields already set (renderers exist). Default = False.
+        """
+
+        for prefix, fields in series_fields(series, columns).items():
+            if update_only and prefix + "_timestamp" not in array_plot_data.arrays:
+                continue
+            array_plot_data.update_data(fields)
+
+    def _is_visible(self, renderer) -> bool:
+        """
+        Visibility of a renderer as set by the toggles (see RedrawScheduler.is_visible).
+        """
+        return renderer.visible if self._scheduler is None else self._scheduler.is_visible(renderer)
+
+    def _set_visible(self, renderer, visible: bool):
+        """
+        Show or hide a renderer, through the scheduler: the preview may be hiding it.
+        """
+        if self._scheduler is None:
+            renderer.visible = visible
+        else:
+            self._scheduler.set_visible(renderer, visible)
+
+    def toggle_derived(self, name: str, visible: Optional[bool] = None):
+        """
+        Show or hide a derived series (see microplot.derived) on every subplot.
+
+        A derived series is computed (and memoized on the PlotterDataClass) the first
+        time it is shown; toggling one series never recomputes the others.
+
+        Args:
+            name (str): derived series name (see PlotterDataClass.derived_series).
+            visible (Optional[bool]): show (True) or hide (False). Default = toggle.
+
+        Raises:
+            Exception: plotter built from a DataSource, or the derived series is not available.
+        """
+        if self._data is None:
+            raise Exception("derived series require a PlotterDataClass")
+        if name not in self._data.derived_series():
+            raise Exception(f"derived series:{name} is not available (inputs not set)")
+
+        # subplots are built on first access of the container
+        container = self.container
+        for symbol, plot in self._symbol_plots.items():
+            if name in plot.plots:
+                renderer = plot.plots[name][0]
+                self._set_visible(renderer, not self._is_visible(renderer) if visible is None else visible)
+            elif visible is not False:
+                self._render_derived(plot, symbol, name)
+        container.invalidate_and_redraw()
+
+    def _render_derived(self, plot: Plot, symbol: str, name: str):
+        """
+        Render a derived series on a subplot.
+
+        Args:
+            plot (Plot): The Plot class (for a given symbol).
+            symbol (str): The symbol of interest.
+            name (str): derived series name.
+        """
+        spec = DERIVED_SERIES[name]
+        columns = self._data.derived(name, symbol)
+
+        # plot data fields: derived_<name>_<column>
+        prefix = "derived_" + name
+        self._plot_data[symbol].update_data(
+            {f"{prefix}_{column}": values for column, values in columns.items()}
+        )
+        index = plot._get_or_create_datasource(prefix + "_timestamp")
+        plot.index_range.add(index)
+        index_mapper = LinearMapper(range=plot.index_range)
+
+        if spec.style == BAND:
+            low = plot._get_or_create_datasource(prefix + "_low")
+            high = plot._get_or_create_datasource(prefix + "_high")
+            plot.value_range.add(low, high)
+            renderer = StepBandPlot(
+                index=index,
+                value=low,
+                upper=high,
+                index_mapper=index_mapper,
+                value_mapper=LinearMapper(range=plot.value_range),
+                face_color=spec.color,
+                orientation=plot.orientation,
+                origin=plot.default_origin,
+            )
+            renderer.face_color = renderer.face_color_[:3] + (0.2,)
+            # bands go beneath the other renderers
+            plot.insert(0, renderer)
+        else:
+            value = plot._get_or_create_datasource(prefix + "_value")
+            if spec.style == OFFSET:
+                value_mapper = self._offset_mapper(plot, symbol)
+                value_mapper.range.add(value)
+            else:
+                plot.value_range.add(value)
+                value_mapper = LinearMapper(range=plot.value_range)
+            renderer = LinePlot(
+                index=index,
+                value=value,
+                index_mapper=index_mapper,
+                value_mapper=value_mapper,
+                color=spec.color,
                 line_width=1,
                 render_style="connectedhold",
+                orientation=plot.orientation,
+                origin=plot.default_origin,
             )
+            plot.add(renderer)
 
-    def _set_plot_data_array(self, symbol: str) -> ArrayPlotData:
+        plot.plots[name] = [renderer]
+
+    def _offset_mapper(self, plot: Plot, symbol: str) -> LinearMapper:
         """
-        Instantiate ArrayPlotData class for Plot object.
+        Secondary value mapper (and right-hand axis) of a subplot, shared by its OFFSET derived series.
 
         Args:
+            plot (Plot): The Plot class (for a given symbol).
             symbol (str): The symbol of interest.
 
         Returns:
-            ArrayPlotData: The array plot data class with required data fields set.
+            LinearMapper: the secondary value mapper.
         """
+        if symbol not in self._offset_mappers:
+            mapper = LinearMapper(range=DataRange1D())
+            plot.overlays.append(PlotAxis(plot, orientation="right", mapper=mapper))
+            self._offset_mappers[symbol] = mapper
+        return self._offset_mappers[symbol]
 
-        array_plot_data = ArrayPlotData()
+    def toggle_order_ladder(self, visible: Optional[bool] = None):
+        """
+        Show or hide the working-order ladder (see microplot.ladder) on every subplot:
+        a horizontal segment per order, at its price, while it rests in the book.
 
-        # quote data
-        quote_data = self._data.quote_data
-        if quote_data is not None:
-            quote_data = self._data.quote_data[
-                self._data.quote_data["symbol"] == symbol
-            ]
-            array_plot_data.set_data("quote_timestamp", quote_data.timestamp.ravel())
-            array_plot_data.set_data("quote_bid_price", quote_data.bid_price.ravel())
-            array_plot_data.set_data("quote_ask_price", quote_data.ask_price.ravel())
-            array_plot_data.set_data(
-                "quote_micro_price", quote_data.micro_price.ravel()
-            )
+        Args:
+            visible (Optional[bool]): show (True) or hide (False). Default = toggle.
 
-        # trade data
-        trade_data = self._data.trade_data
-        if trade_data is not None:
-            trade_data = self._data.trade_data[
-                self._data.trade_data["symbol"] == symbol
-            ]
-            array_plot_data.set_data("trade_timestamp", trade_data.timestamp.ravel())
-            array_plot_data.set_data("trade_price", trade_data.price.ravel())
-
-        # fill data - sim
-        (
-            buy_aggressive_fills,
-            buy_passive_fills,
-            sell_aggressive_fills,
-            sell_passive_fills,
-        ) = self._data.fill_data_sim
-        # aggr_buy
-        if not (buy_aggressive_fills is None or buy_aggressive_fills.empty):
-            buy_aggressive_fills = buy_aggressive_fills[
-                buy_aggressive_fills["symbol"] == symbol
-            ]
-            array_plot_data.set_data(
-                "sim_aggr_buy_timestamp", buy_aggressive_fills.timestamp.ravel()
-            )
-            array_plot_data.set_data(
-                "sim_aggr_buy_price", buy_aggressive_fills.price.ravel()
-            )
-        # pass_buy
-        if not (buy_passive_fills is None or buy_passive_fills.empty):
-            buy_passive_fills = buy_passive_fills[buy_passive_fills["symbol"] == symbol]
-            array_plot_data.set_data(
-                "sim_pass_buy_timestamp", buy_passive_fills.timestamp.ravel()
-            )
-            array_plot_data.set_data(
-                "sim_pass_buy_price", buy_passive_fills.price.ravel()
-            )
-        # aggr_sell
-        if not (sell_aggressive_fills is None or sell_aggressive_fills.empty):
-            sell_aggressive_fills = sell_aggressive_fills[
-                sell_aggressive_fills["symbol"] == symbol
-            ]
-            array_plot_data.set_data(
-                "sim_aggr_sell_timestamp", sell_aggressive_fills.timestamp.ravel()
-            )
-            array_plot_data.set_data(
-                "sim_aggr_sell_price", sell_aggressive_fills.price.ravel()
-            )
-        # pass_sell
-        if not (sell_passive_fills is None or sell_passive_fills.empty):
-            sell_passive_fills = sell_passive_fills[
-                sell_passive_fills["symbol"] == symbol
-            ]
-            array_plot_data.set_data(
-                "sim_pass_sell_timestamp", sell_passive_fills.timestamp.ravel()
-            )
-            array_plot_data.set_data(
-                "sim_pass_sell_price", sell_passive_fills.price.ravel()
-            )
+        Raises:
+            Exception: plotter built from a DataSource, or orders without an order_id column.
+        """
+        if self._data is None:
+            raise Exception("the order ladder requires a PlotterDataClass")
+        if self._ladder is None:
+            self._ladder = OrderLadder(self._data)
+
+        # subplots are built on first access of the container
+        container = self.container
+        for symbol, plot in self._symbol_plots.items():
+            if "order_ladder" in plot.plots:
+                renderer = plot.plots["order_ladder"][0]
+                self._set_visible(renderer, not self._is_visible(renderer) if visible is None else visible)
+            elif visible is not False:
+                self._render_order_ladder(plot, symbol)
+        container.invalidate_and_redraw()
+
+    def working_orders(self, symbol: str, t: float) -> Dict[str, np.ndarray]:
+        """
+        Orders of a symbol working at time t (see OrderLadder.working).
 
-        # fill data - prod
-        (
-            buy_aggressive_fills,
-            buy_passive_fills,
-            sell_aggressive_fills,
-            sell_passive_fills,
-        ) = self._data.fill_data_prod
-        # aggr_buy
-        if not (buy_aggressive_fills is None or buy_aggressive_fills.empty):
-            buy_aggressive_fills = buy_aggressive_fills[
-                buy_aggressive_fills["symbol"] == symbol
-            ]
-            array_plot_data.set_data(
-                "prod_aggr_buy_timestamp", buy_aggressive_fills.timestamp.ravel()
-            )
-            array_plot_data.set_data(
-                "prod_aggr_buy_price", buy_aggressive_fills.price.ravel()
-            )
-        # pass_buy
-        if not (buy_passive_fills is None or buy_passive_fills.empty):
-            buy_passive_fills = buy_passive_fills[buy_passive_fills["symbol"] == symbol]
-            array_plot_data.set_data(
-                "prod_pass_buy_timestamp", buy_passive_fills.timestamp.ravel()
-            )
-            array_plot_data.set_data(
-                "prod_pass_buy_price", buy_passive_fills.price.ravel()
-            )
-        # aggr_sell
-        if not (sell_aggressive_fills is None or sell_aggressive_fills.empty):
-            sell_aggressive_fills = sell_aggressive_fills[
-                sell_aggressive_fills["symbol"] == symbol
-            ]
-            array_plot_data.set_data(
-                "prod_aggr_sell_timestamp", sell_aggressive_fills.timestamp.ravel()
-            )
-            array_plot_data.set_data(
-                "prod_aggr_sell_price", sell_aggressive_fills.price.ravel()
-            )
-        # pass_sell
-        if not (sell_passive_fills is None or sell_passive_fills.empty):
-            sell_passive_fills = sell_passive_fills[
-                sell_passive_fills["symbol"] == symbol
-            ]
-            array_plot_data.set_data(
-                "prod_pass_sell_timestamp", sell_passive_fills.timestamp.ravel()
-            )
-            array_plot_data.set_data(
-                "prod_pass_sell_price", sell_passive_fills.price.ravel()
-            )
+        Args:
+            symbol (str): The symbol of interest.
+            t (float): EPOCH seconds.
 
-        # orders
-        self._data.orders
-        (
-            new_orders,
-            new_order_acks,
-            cancel_orders,
-            cancel_order_acks,
-            rejects,
-        ) = self._data.orders
-        # new orders
-        if not (new_orders is None or new_orders.empty):
-            new_orders = new_orders[new_orders["symbol"] == symbol]
-            array_plot_data.set_data(
-                "new_order_timestamp", new_orders.timestamp.ravel()
-            )
-            array_plot_data.set_data("new_order_price", new_orders.price.ravel())
-        # new orders - ack
-        if not (new_order_acks is None or new_order_acks.empty):
-            new_order_acks = new_order_acks[new_order_acks["symbol"] == symbol]
-            array_plot_data.set_data(
-                "new_order_ack_timestamp", new_order_acks.timestamp.ravel()
-            )
-            array_plot_data.set_data(
-                "new_order_ack_price", new_order_acks.price.ravel()
-            )
-        # cancels
-        if not (cancel_orders is None or cancel_orders.empty):
-            cancel_orders = cancel_orders[cancel_orders["symbol"] == symbol]
-            array_plot_data.set_data(
-                "cancel_order_timestamp", cancel_orders.timestamp.ravel()
-            )
-            array_plot_data.set_data("cancel_order_price", cancel_orders.price.ravel())
-        # cancels - ack
-        if not (cancel_order_acks is None or cancel_order_acks.empty):
-            cancel_order_acks = cancel_order_acks[cancel_order_acks["symbol"] == symbol]
-            array_plot_data.set_data(
-                "cancel_order_ack_timestamp", cancel_order_acks.timestamp.ravel()
+        Raises:
+            Exception: plotter built from a DataSource, or orders without an order_id column.
+
+        Returns:
+            Dict[str, np.ndarray]: "order_id", "price", "is_buy", "start", "end" and "end_reason"
+            of the working orders, sorted by start.
+        """
+        if self._data is None:
+            raise Exception("the order ladder requires a PlotterDataClass")
+        if self._ladder is None:
+            self._ladder = OrderLadder(self._data)
+        return self._ladder.working(symbol, t)
+
+    def _render_order_ladder(self, plot: Plot, symbol: str):
+        """
+        Render the working-order ladder of a symbol as one batched segment layer.
+
+        Args:
+            plot (Plot): The Plot class (for a given symbol).
+            symbol (str): The symbol of interest.
+        """
+        self._set_ladder_data(symbol)
+        # open-ended segments must not stretch the index range
+        price = plot._get_or_create_datasource("ladder_price")
+        plot.value_range.add(price)
+        renderer = OrderLadderPlot(
+            index=plot._get_or_create_datasource("ladder_start"),
+            value=price,
+            end=plot._get_or_create_datasource("ladder_end"),
+            is_buy=plot._get_or_create_datasource("ladder_is_buy"),
+            index_mapper=LinearMapper(range=plot.index_range),
+            value_mapper=LinearMapper(range=plot.value_range),
+            orientation=plot.orientation,
+            origin=plot.default_origin,
+        )
+        # segments go beneath the event markers
+        plot.insert(0, renderer)
+        plot.plots["order_ladder"] = [renderer]
+
+    def _set_ladder_data(self, symbol: str):
+        """
+        Set the plot data fields of a symbol's working-order ladder.
+
+        Args:
+            symbol (str): The symbol of interest.
+        """
+        intervals = self._ladder.intervals(symbol)
+        self._plot_data[symbol].update_data(
+            {
+                "ladder_start": intervals["start"],
+                "ladder_price": intervals["price"],
+                "ladder_end": intervals["end"],
+                "ladder_is_buy": intervals["is_buy"],
+            }
+        )
+
+    def toggle_sim_run(self, name: str, visible: Optional[bool] = None):
+        """
+        Show or hide a simulation run (see PlotterDataClass.add_sim_run) on every subplot,
+        without rebuilding them. Runs attached after the subplots were built are drawn on
+        first show.
+
+        Args:
+            name (str): run name.
+            visible (Optional[bool]): show (True) or hide (False). Default = toggle.
+
+        Raises:
+            Exception: plotter built from a DataSource, or unknown run.
+        """
+        if self._data is None:
+            raise Exception("sim runs require a PlotterDataClass")
+        self._data.sim_run(name)
+
+        # subplots are built on first access of the container
+        container = self.container
+        shown = name in self._sim_runs and self._sim_runs[name][3]
+        visible = not shown if visible is None else visible
+        for symbol, plot in self._symbol_plots.items():
+            if (name, symbol) in self._sim_run_renderers:
+                for renderer in self._sim_run_renderers[(name, symbol)]:
+                    self._set_visible(renderer, visible)
+            elif visible:
+                self._render_sim_run(plot, symbol, name)
+        if name in self._sim_runs:
+            self._sim_runs[name] = self._sim_runs[name][:3] + (visible,)
+        container.invalidate_and_redraw()
+
+    def remove_sim_run(self, name: str):
+        """
+        Remove a simulation run from the subplots and detach it from the PlotterDataClass,
+        releasing its events.
+
+        Args:
+            name (str): run name.
+        """
+        if name not in self._sim_runs:
+            if self._data is not None and name in self._data.sim_runs:
+                self._data.remove_sim_run(name)
+            return
+        _, prefix, _, _ = self._sim_runs.pop(name)
+        for symbol, plot in self._symbol_plots.items():
+            for renderer in self._sim_run_renderers.pop((name, symbol), []):
+                plot.remove(renderer)
+            for legend in [legend for legend in plot.plots if legend.startswith(name + ": ")]:
+                del plot.plots[legend]
+            plot_data = self._plot_data[symbol]
+            for field in [field for field in plot_data.arrays if field.startswith(prefix)]:
+                plot_data.del_data(field)
+        self._data.remove_sim_run(name)
+        self.container.invalidate_and_redraw()
+
+    def _render_sim_run(self, plot: Plot, symbol: str, name: str):
+        """
+        Render a simulation run on a subplot: its fills and orders with one batched scatter
+        renderer, and its valuation line, all in the run's color.
+
+        Args:
+            plot (Plot): The Plot class (for a given symbol).
+            symbol (str): The symbol of interest.
+            name (str): run name.
+        """
+        if name not in self._sim_runs:
+            number = self._sim_run_count
+            self._sim_run_count += 1
+            self._sim_runs[name] = (
+                DataFrameDataSource(self._data.sim_run(name)),
+                f"sim_run_{number}_",
+                SIM_RUN_COLORS[number % len(SIM_RUN_COLORS)],
+                True,
             )
-            array_plot_data.set_data(
-                "cancel_order_ack_price", cancel_order_acks.price.ravel()
+        source, prefix, color, _ = self._sim_runs[name]
+
+        fields = {}
+        for series in source.series():
+            for group in series_fields(series, source.query(series, symbol)).values():
+                fields.update(group)
+        # event categories of the run's fills and orders, in EVENT_CATEGORIES order
+        categories = [
+            (category_name, category_prefix, marker, marker_size)
+            for category_name, category_prefix, marker, _, marker_size in EVENT_CATEGORIES
+            if category_prefix + "_timestamp" in fields
+        ]
+        events = event_fields(fields, [category_prefix for _, category_prefix, _, _ in categories])
+
+        # plot data fields: sim_run_<n>_<field>
+        self._plot_data[symbol].update_data(
+            {
+                prefix + field: values
+                for field, values in {**events, **fields}.items()
+                if field.startswith(("event_", "val_data_"))
+            }
+        )
+        renderers = []
+        if events and len(events["event_timestamp"]):
+            index = plot._get_or_create_datasource(prefix + "event_timestamp")
+            plot.index_range.add(index)
+            value = plot._get_or_create_datasource(prefix + "event_price")
+            plot.value_range.add(value)
+            renderer = EventScatterPlot(
+                index=index,
+                value=value,
+                category=plot._get_or_create_datasource(prefix + "event_category"),
+                categories=[
+                    EventCategory(name=category_name, marker=marker, color=color, marker_size=marker_size)
+                    for category_name, _, marker, marker_size in categories
+                ],
+                index_mapper=LinearMapper(range=plot.index_range),
+                value_mapper=LinearMapper(range=plot.value_range),
+                marker="circle",
+                color=color,
+                orientation=plot.orientation,
+                origin=plot.default_origin,
             )
-        # rejects
-        if not (rejects is None or rejects.empty):
-            rejects = rejects[rejects["symbol"] == symbol]
-            array_plot_data.set_data(
-                "reject_orders_timestamp", rejects.timestamp.ravel()
+            plot.add(renderer)
+            plot.plots[f"{name}: events"] = [renderer]
+            renderers.append(renderer)
+        if "val_data_timestamp" in fields and len(fields["val_data_timestamp"]):
+            renderer = plot.plot(
+                (prefix + "val_data_timestamp", prefix + "val_data_price"),
+                color=color,
+                line_style="solid",
+                name=f"{name}: val_data_price",
+                line_width=1,
+                render_style="connectedhold",
+            )[0]
+            renderers.append(renderer)
+        self._sim_run_renderers[(name, symbol)] = renderers
+
+    def add_filter(self, expression: str, color: str = "magenta", only: bool = False) -> EventFilter:
+        """
+        Highlight the events matching a filter expression (see microplot.filters) on every subplot.
+
+        The expression is compiled once and evaluated vectorized per symbol; results are
+        cached by expression, so re-adding a filter does not re-evaluate it.
+
+        Args:
+            expression (str): "<series>: <boolean expression>", e.g. "orders: is_reject & (price > quote.ask_price)".
+            color (str): highlight ring color. Default = "magenta".
+            only (bool): hide the event markers, to see only the matches. Default = False.
+
+        Raises:
+            Exception: plotter built from a DataSource, or invalid expression.
+
+        Returns:
+            EventFilter: the compiled filter.
+        """
+        if self._data is None:
+            raise Exception("filters require a PlotterDataClass")
+        event_filter = compile_filter(expression)
+        if expression in self._filters:
+            self.remove_filter(expression)
+
+        # subplots are built on first access of the container
+        container = self.container
+        name, prefix = f"filter {self._filter_count}: {expression}", f"filter_{self._filter_count}"
+        for symbol, plot in self._symbol_plots.items():
+            self._render_filter(plot, symbol, event_filter, name, prefix, color)
+            if only:
+                for renderers in plot.plots.values():
+                    if isinstance(renderers[0], EventCategory):
+                        renderers[0].visible = False
+        self._filters[expression] = (event_filter, name, prefix)
+        self._filter_count += 1
+        container.invalidate_and_redraw()
+        return event_filter
+
+    def remove_filter(self, expression: str):
+        """
+        Remove a filter highlight, and show the event markers again once no filter is left.
+
+        Args:
+            expression (str): the expression passed to add_filter.
+        """
+        if expression not in self._filters:
+            return
+        _, name, _ = self._filters.pop(expression)
+        for plot in self._symbol_plots.values():
+            if name in plot.plots:
+                # not Plot.delplot: the event categories in plot.plots have no datasources
+                plot.remove(plot.plots.pop(name)[0])
+            if not self._filters:
+                for renderers in plot.plots.values():
+                    if isinstance(renderers[0], EventCategory):
+                        renderers[0].visible = True
+        self.container.invalidate_and_redraw()
+
+    def _render_filter(
+        self,
+        plot: Plot,
+        symbol: str,
+        event_filter: EventFilter,
+        name: str,
+        prefix: str,
+        color: str,
+    ):
+        """
+        Render the matches of a filter on a subplot as hollow rings over the event markers.
+
+        Args:
+            plot (Plot): The Plot class (for a given symbol).
+            symbol (str): The symbol of interest.
+            event_filter (EventFilter): the compiled filter.
+            name (str): legend name.
+            prefix (str): plot data field prefix.
+            color (str): ring color.
+        """
+        events = event_filter.events(self._data, symbol)
+        # plot data fields: filter_<n>_<column>
+        self._plot_data[symbol].update_data(
+            {f"{prefix}_{column}": values for column, values in events.items()}
+        )
+        index = plot._get_or_create_datasource(prefix + "_timestamp")
+        value = plot._get_or_create_datasource(prefix + "_price")
+        renderer = ScatterPlot(
+            index=index,
+            value=value,
+            index_mapper=LinearMapper(range=plot.index_range),
+            value_mapper=LinearMapper(range=plot.value_range),
+            marker="circle",
+            marker_size=12,
+            color="transparent",
+            outline_color=color,
+            line_width=2,
+            orientation=plot.orientation,
+            origin=plot.default_origin,
+        )
+        plot.add(renderer)
+        plot.plots[name] = [renderer]
+
+    def set_clock_correction(
+        self, series: str, correction: Optional[ClockCorrection], symbol: Optional[str] = None
+    ):
+        """
+        Correct the clock of a series, or of one symbol's rows of it (see
+        PlotterDataClass.set_clock_correction), and redraw: the layers reading the series
+        (its own, derived series, filter highlights, the order ladder, activity) are refreshed
+        in place from the loaded data, which is not rewritten. Meant to be tuned interactively.
+
+        Args:
+            series (str): Name of time series.
+            correction (Optional[ClockCorrection]): correction (None = remove it).
+            symbol (Optional[str]): only this symbol's rows. Default = every symbol.
+
+        Raises:
+            Exception: plotter built from a DataSource, or unknown series.
+        """
+        if self._data is None:
+            raise Exception("clock corrections require a PlotterDataClass")
+        self._data.set_clock_correction(series, correction, symbol)
+
+        # subplots are built on first access of the container
+        container = self.container
+        for plot_symbol in self._symbol_plots:
+            if symbol is None or plot_symbol == symbol:
+                self._refresh_series(plot_symbol, series)
+        container.invalidate_and_redraw()
+
+    def _refresh_series(self, symbol: str, series: str):
+        """
+        Refresh the plot data fields of a subplot's layers reading a series.
+
+        Args:
+            symbol (str): The symbol of interest.
+            series (str): Name of time series.
+        """
+        plot, plot_data = self._symbol_plots[symbol], self._plot_data[symbol]
+        if series in self._source.series():
+            t0, t1 = self._query_bounds or (None, None)
+            columns = self._source.query(series, symbol, t0, t1, self._max_points)
+            self._set_series_data(plot_data, series, columns, update_only=True)
+            if series not in ("quote_data", "val_data"):
+                self._set_event_data(plot_data)
+        for name, spec in DERIVED_SERIES.items():
+            if name in plot.plots and series in spec.inputs:
+                plot_data.update_data(
+                    {f"derived_{name}_{column}": values for column, values in self._data.derived(name, symbol).items()}
+                )
+        for event_filter, name, prefix in self._filters.values():
+            # memoized: re-evaluated only if the filter reads the series
+            events = event_filter.events(self._data, symbol)
+            plot_data.update_data({f"{prefix}_{column}": values for column, values in events.items()})
+        if "order_ladder" in plot.plots and series in LADDER_INPUTS:
+            self._set_ladder_data(symbol)
+        if symbol in self._activity and any(series in names for _, names, _ in ACTIVITY_KINDS):
+            self._reset_activity(symbol)
+
+    def _reset_activity(self, symbol: str):
+        """
+        Rebuild a symbol's activity pyramid from the current data, and re-bucket its strip.
+
+        Args:
+            symbol (str): The symbol of interest.
+        """
+        _, strip_data = self._activity[symbol]
+        self._activity[symbol] = (ActivityPyramid(self._activity_timestamps(symbol)), strip_data)
+        self._rebucket_activity(symbol)
+
+    def export_view(
+        self, directory: str, fmt: str = "csv", symbols: Optional[List[str]] = None
+    ) -> Dict[str, str]:
+        """
+        Export the rows of every series in the visible time window, for the plotted symbols
+        (see microplot.export): one file per series, with the original nanosecond timestamps.
+
+        Args:
+            directory (str): output directory (created if needed).
+            fmt (str): "csv" or "parquet" (requires pyarrow). Default = "csv".
+            symbols (Optional[List[str]]): symbols to export. Default = all plotted symbols.
+
+        Raises:
+            Exception: plotter built from a DataSource.
+
+        Returns:
+            Dict[str, str]: series name -> written file path.
+        """
+        if self._data is None:
+            raise Exception("export requires a PlotterDataClass")
+        # subplots are built on first access of the container
+        self.container
+        index_range = self._top_plot_index_range
+        return export_window(
+            self._data,
+            directory,
+            index_range.low,
+            index_range.high,
+            symbols=list(symbols or self._symbols),
+            fmt=fmt,
+        )
+
+    def _on_index_range_updated(self):
+        """
+        Re-query the DataSource for the visible window once the shared index range settles.
+        Queries run off the UI thread; a newer window cancels older queries.
+        """
+        bounds = (self._top_plot_index_range.low, self._top_plot_index_range.high)
+        if bounds == self._query_bounds:
+            return
+        self._query_bounds = bounds
+
+        requests = [
+            (series, symbol) for symbol in self._plot_data for series in self._source.series()
+        ]
+        self._query_runner.submit(
+            requests, bounds[0], bounds[1], self._max_points, self._on_query_result
+        )
+
+    def _on_query_result(self, generation: int, series: str, symbol: str, columns: Dict):
+        """
+        Worker-thread callback: hand the query result to the UI thread.
+        """
+        GUI.invoke_later(self._apply_query_result, generation, series, symbol, columns)
+
+    def _apply_query_result(self, generation: int, series: str, symbol: str, columns: Dict):
+        """
+        UI-thread: update the subplot data, unless a newer window was requested since.
+        """
+        if generation != self._query_runner.generation:
+            return
+        self._set_series_data(self._plot_data[symbol], series, columns, update_only=True)
+        if series not in ("quote_data", "val_data"):
+            self._set_event_data(self._plot_data[symbol])
+
+    def when_loaded(self, callback: Callable[[], None]):
+        """
+        Call back once every series is in: right away, or (on the UI thread) once a
+        progressive load has attached the last one.
+
+        Args:
+            callback (Callable[[], None]): e.g. adding filters over series still loading.
+        """
+        if self._loading_series:
+            self._loaded_callbacks.append(callback)
+        else:
+            callback()
+
+    @property
+    def _loading_series(self) -> List[str]:
+        """
+        Returns:
+            List[str]: series of the progressive load not attached yet (queued or being read).
+        """
+        return [
+            series for series, progress in self._load_progress.items() if progress.state in ("queued", "reading")
+        ]
+
+    def _start_loading(self):
+        """
+        Start the progressive load, if any, once the window is open.
+        """
+        if self._loader is not None:
+            self._loader.start(self._on_series_loaded, self._on_load_progress)
+
+    def _on_series_loaded(self, series: str, part: PlotterDataClass):
+        """
+        Loading-thread callback: build the plot data fields of the new series per symbol
+        here, off the UI thread, and hand them to the UI thread.
+        """
+        # the fields are built with the clock corrections set so far
+        clock_version = self._data._clock_versions.get(series, 0)
+        part._clock_corrections = dict(self._data._clock_corrections)
+        source = DataFrameDataSource(part)
+        fields = {}
+        for symbol in source.symbols():
+            columns = source.query(series, symbol, max_points=self._max_points)
+            fields[symbol] = {}
+            for group in series_fields(series, columns).values():
+                fields[symbol].update(group)
+        GUI.invoke_later(self._attach_series, series, part, fields, clock_version)
+
+    def _on_load_progress(self, progress: SeriesProgress):
+        """
+        Loading-thread callback: hand the loading state to the UI thread.
+        """
+        GUI.invoke_later(self._update_load_progress, progress)
+
+    def _update_load_progress(self, progress: SeriesProgress):
+        """
+        UI-thread: update the progress line; run the when_loaded callbacks once every series is in.
+        """
+        self._load_progress[progress.series] = progress
+        self.load_status = self._format_load_status()
+        if not self._loading_series:
+            callbacks, self._loaded_callbacks = self._loaded_callbacks, []
+            for callback in callbacks:
+                callback()
+
+    def _format_load_status(self) -> str:
+        """
+        Returns:
+            str: progress line of the progressive load ("" once every series is in).
+        """
+        if all(progress.state == "ready" for progress in self._load_progress.values()):
+            return ""
+        states = []
+        for progress in self._load_progress.values():
+            label = SERIES_LABELS[progress.series]
+            if progress.state == "ready":
+                states.append(f"{label}: {progress.rows:,} rows in {progress.seconds:.1f} s")
+            elif progress.state == "failed":
+                states.append(f"{label}: failed ({progress.error})")
+            else:
+                states.append(f"{label}: {progress.state}...")
+        return "  |  ".join(states)
+
+    def _attach_series(
+        self, series: str, part: PlotterDataClass, fields: Dict[str, Dict[str, np.ndarray]], clock_version: int = 0
+    ):
+        """
+        UI-thread: add a series read in the background to the data and the subplots.
+        Existing subplots get the new layers; symbols new to the data get a subplot.
+
+        Args:
+            series (str): name of the series.
+            part (PlotterDataClass): dataclass holding the series (see ProgressiveLoader.start).
+            fields (Dict[str, Dict[str, np.ndarray]]): symbol -> plot data fields of the series.
+            clock_version (int): clock correction version of the series the fields were built with.
+        """
+        self._data.take_series(part, series)
+        if clock_version != self._data._clock_versions.get(series, 0):
+            # re-clocked while loading: rebuild the fields here
+            fields = {symbol: {} for symbol in fields}
+        container = self.container
+        for symbol in list(self._symbol_plots) + [symbol for symbol in fields if symbol not in self._symbol_plots]:
+            if symbol not in self._symbol_plots:
+                self._add_symbol_subplot(container, symbol)
+                continue
+            if fields.get(symbol):
+                symbol_fields = fields[symbol]
+            else:
+                # no rows of the symbol (empty fields, as in a subplot built with the series), or re-clocked
+                symbol_fields = {}
+                columns = self._source.query(series, symbol, max_points=self._max_points)
+                for group in series_fields(series, columns).values():
+                    symbol_fields.update(group)
+            plot_data = self._plot_data[symbol]
+            attributes = set(plot_data.list_data())
+            plot_data.update_data(symbol_fields)
+            if series not in ("quote_data", "val_data"):
+                self._set_event_data(plot_data)
+            self._render_attached(self._symbol_plots[symbol], attributes, set(plot_data.list_data()))
+            if symbol in self._activity:
+                self._reset_activity(symbol)
+        container.invalidate_and_redraw()
+
+    def _render_attached(self, plot: Plot, attributes: set, plot_attributes: set):
+        """
+        Render the layers of plot data fields set since a subplot was drawn.
+
+        Args:
+            plot (Plot): The Plot class (for a given symbol).
+            attributes (set): plot attributes set in data_array object before.
+            plot_attributes (set): plot attributes set in data_array object now.
+        """
+        new_attributes = plot_attributes - attributes
+        self._render_plots(plot, new_attributes)
+        if "event_timestamp" in attributes:
+            # the batched event renderer exists: list the new categories in the legend
+            index = plot.datasources["event_timestamp"]
+            renderer = next(
+                component
+                for component in plot.components
+                if isinstance(component, EventScatterPlot) and component.index is index
             )
-            array_plot_data.set_data("reject_orders_price", rejects.price.ravel())
+            for category, (_, prefix, _, _, _) in zip(renderer.categories, EVENT_CATEGORIES):
+                if prefix + "_timestamp" in new_attributes:
+                    plot.plots[category.name] = [category]
 
-        # val data
-        val_data = self._data.val_data
-        if val_data is not None:
-            val_data = self._data.val_data[self._data.val_data["symbol"] == symbol]
-            array_plot_data.set_data("val_data_timestamp", val_data.timestamp.ravel())
-            array_plot_data.set_data("val_data_price", val_data.theo_price.ravel())
+    def _add_symbol_subplot(self, container: VPlotContainer, symbol: str):
+        """
+        Add a subplot (and activity strip) for a symbol new to the data.
 
-        return array_plot_data
+        Args:
+            container (VPlotContainer): Container object with the subplots.
+            symbol (str): The symbol of interest.
+        """
+        self._symbols.append(symbol)
+        plot = self._generate_subplot(symbol)
+        self._link_subplot(plot)
+        if self._show_activity:
+            self._subplots.insert(-1, self._generate_activity_strip(symbol))
+        for subplot in self._subplots:
+            container.add(subplot)
+        self._subplots = []
 
     def _link_subplot(self, plot: Plot):
         """
@@ -615,6 +1389,10 @@ class MicroPlotter(HasTraits):
             # link other attributes
             bottom_axis.tick_generator = self._top_plot_bottom_axis.tick_generator
             plot.index_range = self._top_plot_index_range
+            # chaco's Plot._handle_range_changed (unlike DataView's) only re-ranges the renderers
+            # in plot.plots: those added with plot.add (the batched event markers) are re-ranged here
+            for renderer in plot.components:
+                renderer.index_range = self._top_plot_index_range
             plot.underlays.append(bottom_axis)
 
         # store to be added to VPlot later
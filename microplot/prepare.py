@@ -0,0 +1,454 @@
+"""
+This module contains the parallel per-symbol preparation of the subplots' data.
+
+The loaded columns are put in shared memory once, with each series' rows grouped by
+symbol. A process pool then prepares batches of symbols: the rows of each series, the
+quote run-length collapse, decimation, the plot fields (event categories split, and merged
+into the batched event arrays), the activity event timestamps and the derived series.
+Each symbol's results are appended to its batch's shared buffer, which this process maps
+and wraps as NumPy views: nothing is copied back.
+
+Shared buffers are files in the POSIX shared-memory directory (/dev/shm, else the temp
+directory), mapped with np.memmap: a view keeps its mapping alive for as long as it is
+referenced (a multiprocessing.shared_memory segment is unmapped with its handle, under
+any views still using it).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import os
+import shutil
+import tempfile
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from microplot.activity import ACTIVITY_KINDS, ActivityPyramid
+from microplot.clock import ClockCorrection, correction_for
+from microplot.data import PLOTTED_QUOTE_COLUMNS, CollapseReport, PlotterDataClass
+from microplot.datasource import _decimate, _value_columns
+from microplot.derived import DERIVED_SERIES
+from microplot.schema import SERIES_COLUMNS
+
+# directory of the shared buffers
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+# buffer offsets are aligned for any dtype
+ALIGN = 64
+# batches per worker: small batches balance uneven symbols
+BATCHES_PER_WORKER = 4
+# below this many loaded rows, the subplots are prepared serially: starting the pool and
+# sharing the columns costs more than it saves (about the rows of a PARALLEL_MIN_BYTES csv)
+PARALLEL_MIN_ROWS = 2**20
+
+
+def use_pool(data: PlotterDataClass, symbols: List[str], workers: int) -> bool:
+    """
+    Whether preparing the subplots of a dataset in a process pool pays off.
+
+    Args:
+        data (PlotterDataClass): dataclass for plotting object.
+        symbols (List[str]): symbols to prepare.
+        workers (int): number of worker processes.
+
+    Returns:
+        bool: true with several workers and symbols, and at least PARALLEL_MIN_ROWS loaded rows.
+    """
+    if workers <= 1 or len(symbols) <= 1:
+        return False
+    frames = [getattr(data, "_" + series) for series in SERIES_COLUMNS]
+    return sum(len(frame) for frame in frames if frame is not None) >= PARALLEL_MIN_ROWS
+
+
+def series_fields(series: str, columns: Dict[str, np.ndarray]) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Plot data fields of one series from DataSource query columns: fills and orders are
+    split into their event categories.
+
+    Args:
+        series (str): name of the series.
+        columns (Dict[str, np.ndarray]): query result for the series.
+
+    Returns:
+        Dict[str, Dict[str, np.ndarray]]: field prefix -> plot data fields
+        ("<prefix>_timestamp", "<prefix>_price", ...).
+    """
+    timestamp = columns["timestamp"]
+
+    def event(prefix: str, price: np.ndarray, mask: np.ndarray = None) -> Dict[str, np.ndarray]:
+        if mask is None:
+            return {prefix + "_timestamp": timestamp, prefix + "_price": price}
+        return {prefix + "_timestamp": timestamp[mask], prefix + "_price": price[mask]}
+
+    # quote data
+    if series == "quote_data":
+        return {
+            "quote": {
+                "quote_timestamp": timestamp,
+                "quote_bid_price": columns["bid_price"],
+                "quote_ask_price": columns["ask_price"],
+                "quote_micro_price": columns["micro_price"],
+            }
+        }
+
+    # trade data
+    if series == "trade_data":
+        return {"trade": event("trade", columns["price"])}
+
+    # fill data - sim / prod
+    if series in ("fill_data_sim", "fill_data_prod"):
+        prefix = "sim" if series == "fill_data_sim" else "prod"
+        is_buy, is_aggressive = columns["is_buy"], columns["is_aggressive"]
+        return {
+            prefix + "_aggr_buy": event(prefix + "_aggr_buy", columns["price"], is_buy & is_aggressive),
+            prefix + "_pass_buy": event(prefix + "_pass_buy", columns["price"], is_buy & ~is_aggressive),
+            prefix + "_aggr_sell": event(prefix + "_aggr_sell", columns["price"], ~is_buy & is_aggressive),
+            prefix + "_pass_sell": event(prefix + "_pass_sell", columns["price"], ~is_buy & ~is_aggressive),
+        }
+
+    # orders: new, new_ack, cxl, cxl_ack, rej
+    if series == "orders":
+        is_new, is_cancel, is_ack = columns["is_new"], columns["is_cancel"], columns["is_ack"]
+        return {
+            "new_order": event("new_order", columns["price"], is_new & ~is_ack),
+            "new_order_ack": event("new_order_ack", columns["price"], is_new & is_ack),
+            "cancel_order": event("cancel_order", columns["price"], is_cancel & ~is_ack),
+            "cancel_order_ack": event("cancel_order_ack", columns["price"], is_cancel & is_ack),
+            "reject_orders": event("reject_orders", columns["price"], columns["is_reject"]),
+        }
+
+    # val data
+    if series == "val_data":
+        return {"val_data": event("val_data", columns["theo_price"])}
+
+    return {}
+
+
+def event_fields(fields: Dict[str, np.ndarray], prefixes: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Merge the event categories present in the plot data fields into the single
+    timestamp-sorted (timestamp, price, category code) arrays of the batched renderer.
+
+    Args:
+        fields (Dict[str, np.ndarray]): plot data fields.
+        prefixes (List[str]): event category field prefixes, in category code order
+            (see microplot.renderers.EVENT_CATEGORIES).
+
+    Returns:
+        Dict[str, np.ndarray]: "event_timestamp", "event_price" and "event_category"
+        (empty if no category is present).
+    """
+    timestamps, prices, codes = [], [], []
+    for code, prefix in enumerate(prefixes):
+        if prefix + "_timestamp" in fields:
+            timestamps.append(fields[prefix + "_timestamp"])
+            prices.append(fields[prefix + "_price"])
+            codes.append(np.full(len(timestamps[-1]), code, dtype=np.int8))
+    if not timestamps:
+        return {}
+
+    timestamp = np.concatenate(timestamps)
+    order = np.argsort(timestamp, kind="stable")
+    return {
+        "event_timestamp": timestamp[order],
+        "event_price": np.concatenate(prices)[order],
+        "event_category": np.concatenate(codes)[order],
+    }
+
+
+def collapse_mask(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Quote rows of one symbol that change a plotted field, and its last row
+    (see PlotterDataClass.collapsed_quote_rows).
+
+    Args:
+        columns (Dict[str, np.ndarray]): the symbol's quote columns, in timestamp order.
+
+    Returns:
+        np.ndarray: boolean mask of the rows kept.
+    """
+    num_rows = len(columns["timestamp"])
+    same = np.ones(max(num_rows - 1, 0), dtype=bool)
+    for column in PLOTTED_QUOTE_COLUMNS:
+        values = columns[column]
+        unchanged = values[1:] == values[:-1]
+        if values.dtype.kind == "f":
+            unchanged |= np.isnan(values[1:]) & np.isnan(values[:-1])
+        same &= unchanged
+    kept = np.ones(num_rows, dtype=bool)
+    kept[1:-1] = ~same[:-1]
+    return kept
+
+
+class _BufferWriter:
+    """
+    Appends arrays to a shared buffer file, at aligned offsets, recording its layout.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "wb")
+        self._offset = 0
+        # key -> (offset, dtype, shape)
+        self.layout: Dict[Hashable, Tuple[int, str, tuple]] = {}
+
+    def write(self, arrays: Dict[Hashable, np.ndarray]):
+        for key, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            self.layout[key] = (self._offset, values.dtype.str, values.shape)
+            self._file.seek(self._offset)
+            self._file.write(values.data)
+            self._offset += -(-values.nbytes // ALIGN) * ALIGN
+
+    def close(self):
+        # a mapping needs at least one byte
+        self._file.truncate(max(self._offset, 1))
+        self._file.close()
+
+
+def _map_buffer(path: str, layout: Dict[Hashable, Tuple[int, str, tuple]]) -> Dict[Hashable, np.ndarray]:
+    """
+    Map a shared buffer file read-only, as one view per array.
+
+    Returns:
+        Dict[Hashable, np.ndarray]: key -> view (each keeps the mapping alive).
+    """
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    return {
+        key: np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer, offset=offset)
+        for key, (offset, dtype, shape) in layout.items()
+    }
+
+
+def _input_columns(data: PlotterDataClass, series: str) -> List[str]:
+    """
+    Columns of a series the workers read: the query columns, the ns timestamps and
+    the derived series' inputs.
+    """
+    frame = getattr(data, "_" + series)
+    columns = _value_columns(series) + ["timestamp_ns"]
+    for spec in DERIVED_SERIES.values():
+        columns += [column for column in spec.inputs.get(series, ()) if column in frame.columns]
+    return list(dict.fromkeys(columns))
+
+
+def _share_inputs(
+    data: PlotterDataClass, series_names: List[str], symbols: List[str], directory: str
+) -> Tuple[Dict[str, Tuple[str, dict]], Dict[str, Dict[str, Tuple[int, int]]]]:
+    """
+    Put the loaded columns of each series in a shared buffer, with a "rows" array
+    holding the series' rows grouped by symbol (in timestamp order within each).
+
+    Returns:
+        Tuple[Dict[str, Tuple[str, dict]], Dict[str, Dict[str, Tuple[int, int]]]]:
+        series -> (buffer path, layout), and series -> symbol -> (start, stop) into "rows".
+    """
+    inputs, bounds = {}, {}
+    for series in series_names:
+        frame = getattr(data, "_" + series)
+        groups = [data._rows(series, symbol) for symbol in symbols]
+        stops = np.cumsum([len(rows) for rows in groups])
+        bounds[series] = {
+            symbol: (int(stop - len(rows)), int(stop))
+            for symbol, rows, stop in zip(symbols, groups, stops)
+            if len(rows)
+        }
+        arrays = {column: np.asarray(frame[column]) for column in _input_columns(data, series)}
+        arrays["rows"] = np.concatenate(groups) if groups else np.empty(0, dtype=np.int64)
+        path = os.path.join(directory, "input_" + series)
+        writer = _BufferWriter(path)
+        writer.write(arrays)
+        writer.close()
+        inputs[series] = (path, writer.layout)
+    return inputs, bounds
+
+
+def _prepare_batch(
+    inputs: Dict[str, Tuple[str, dict]],
+    bounds: Dict[str, Dict[str, Tuple[int, int]]],
+    symbols: List[str],
+    path: str,
+    max_points: Optional[int],
+    collapse_quotes: bool,
+    activity: bool,
+    derived: List[str],
+    event_prefixes: List[str],
+    corrections: Dict[Tuple[str, Optional[str]], ClockCorrection],
+) -> Tuple[dict, Dict[str, Tuple[int, int]]]:
+    """
+    Worker: prepare a batch of symbols into one shared buffer.
+
+    Returns:
+        Tuple[dict, Dict[str, Tuple[int, int]]]: buffer layout, and symbol -> quote (rows, kept).
+    """
+    columns = {series: _map_buffer(*inputs[series]) for series in inputs}
+    writer = _BufferWriter(path)
+    collapsed = {}
+
+    # each symbol's results go straight to the buffer, so a worker holds one symbol at a time
+    for symbol in symbols:
+
+        def gather(series: str, names) -> Dict[str, np.ndarray]:
+            start, stop = bounds[series].get(symbol, (0, 0))
+            rows = columns[series]["rows"][start:stop]
+            gathered = {name: columns[series][name][rows] for name in names}
+            correction = correction_for(corrections, series, symbol)
+            if correction is not None:
+                if "timestamp" in gathered:
+                    gathered["timestamp"] = correction.apply(gathered["timestamp"])
+                if "timestamp_ns" in gathered:
+                    gathered["timestamp_ns"] = correction.apply_ns(gathered["timestamp_ns"])
+            return gathered
+
+        # plot data fields
+        fields = {}
+        for series in inputs:
+            query = gather(series, _value_columns(series))
+            if series == "quote_data" and collapse_quotes:
+                kept = collapse_mask(query)
+                collapsed[symbol] = (len(kept), int(kept.sum()))
+                query = {name: values[kept] for name, values in query.items()}
+            for group in series_fields(series, _decimate(query, max_points)).values():
+                fields.update(group)
+        fields.update(event_fields(fields, event_prefixes))
+        writer.write({(symbol, "fields", name): values for name, values in fields.items()})
+
+        # activity event timestamps (the count pyramids are binned from them on mapping: they
+        # are mostly empty buckets, cheaper to count than to pass)
+        if activity:
+            for kind, series_names, _ in ACTIVITY_KINDS:
+                values = [gather(series, ["timestamp_ns"])["timestamp_ns"] for series in series_names if series in inputs]
+                if values:
+                    writer.write({(symbol, "activity", kind): np.sort(np.concatenate(values), kind="stable")})
+
+        # derived series
+        for name in derived:
+            spec = DERIVED_SERIES[name]
+            result = spec.compute(
+                {series: gather(series, ("timestamp", *names)) for series, names in spec.inputs.items()}
+            )
+            writer.write({(symbol, "derived", name, column): values for column, values in result.items()})
+
+    writer.close()
+    return writer.layout, collapsed
+
+
+def _batches(symbols: List[str], sizes: List[int], count: int) -> List[List[str]]:
+    """
+    Split symbols into batches of similar total size (largest first, onto the smallest batch).
+    """
+    batches = [[] for _ in range(max(min(count, len(symbols)), 1))]
+    totals = [0] * len(batches)
+    for size, symbol in sorted(zip(sizes, symbols), key=lambda item: -item[0]):
+        smallest = totals.index(min(totals))
+        batches[smallest].append(symbol)
+        totals[smallest] += size
+    return [batch for batch in batches if batch]
+
+
+@dataclass
+class PreparedSubplots:
+    """
+    Per-symbol subplot data prepared by prepare_subplots; arrays are views onto shared buffers.
+
+    fields (Dict[str, Dict[str, np.ndarray]]): symbol -> plot data fields.
+    pyramids (Dict[str, ActivityPyramid]): symbol -> activity count pyramid (if prepared).
+    collapse_report (Optional[CollapseReport]): quote rows kept (if collapsed).
+    """
+
+    fields: Dict[str, Dict[str, np.ndarray]] = field(default_factory=dict)
+    pyramids: Dict[str, ActivityPyramid] = field(default_factory=dict)
+    collapse_report: Optional[CollapseReport] = None
+
+
+def prepare_subplots(
+    data: PlotterDataClass,
+    symbols: List[str],
+    workers: int,
+    max_points: Optional[int] = None,
+    collapse_quotes: bool = True,
+    activity: bool = False,
+    derived: Optional[List[str]] = None,
+) -> PreparedSubplots:
+    """
+    Prepare the subplot data of every symbol in a process pool. Derived series computed
+    here are memoized in the dataclass, as if computed by PlotterDataClass.derived.
+
+    Args:
+        data (PlotterDataClass): dataclass for plotting object.
+        symbols (List[str]): symbols to prepare.
+        workers (int): number of worker processes.
+        max_points (Optional[int]): max points per series (None = full fidelity).
+        collapse_quotes (bool): keep only the quote rows that change a plotted field. Default = True.
+        activity (bool): build the activity count pyramids. Default = False.
+        derived (Optional[List[str]]): derived series to compute (see PlotterDataClass.derived_series).
+            Default = none.
+
+    Returns:
+        PreparedSubplots: the prepared data.
+    """
+    # imported here: workers need no plotting toolkit
+    from microplot.renderers import EVENT_CATEGORIES
+
+    series_names = [series for series in SERIES_COLUMNS if getattr(data, "_" + series) is not None]
+    derived = [name for name in derived or [] if name in data.derived_series()]
+    prepared = PreparedSubplots()
+
+    directory = tempfile.mkdtemp(prefix="microplot-", dir=SHARED_DIR)
+    try:
+        inputs, bounds = _share_inputs(data, series_names, symbols, directory)
+        sizes = [
+            sum(stop - start for start, stop in (bounds[series].get(symbol, (0, 0)) for series in series_names))
+            for symbol in symbols
+        ]
+        batches = _batches(symbols, sizes, workers * BATCHES_PER_WORKER)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _prepare_batch,
+                    inputs,
+                    bounds,
+                    batch,
+                    os.path.join(directory, f"batch_{number}"),
+                    max_points,
+                    collapse_quotes,
+                    activity,
+                    derived,
+                    [prefix for _, prefix, _, _, _ in EVENT_CATEGORIES],
+                    data._clock_corrections,
+                )
+                for number, batch in enumerate(batches)
+            ]
+            results = [(future.result(), number) for number, future in enumerate(futures)]
+
+        collapse = CollapseReport() if collapse_quotes and "quote_data" in series_names else None
+        derived_results = {}
+        activity_timestamps = {}
+        for (layout, collapsed), number in results:
+            views = _map_buffer(os.path.join(directory, f"batch_{number}"), layout)
+            for key, values in views.items():
+                symbol, kind = key[:2]
+                if kind == "fields":
+                    prepared.fields.setdefault(symbol, {})[key[2]] = values
+                elif kind == "activity":
+                    activity_timestamps.setdefault(symbol, {})[key[2]] = values
+                elif kind == "derived":
+                    derived_results.setdefault((key[2], symbol), {})[key[3]] = values
+            if collapse is not None:
+                for rows, kept in collapsed.values():
+                    collapse.rows += rows
+                    collapse.kept += kept
+        prepared.collapse_report = collapse
+        if activity:
+            prepared.pyramids = {
+                symbol: ActivityPyramid(activity_timestamps.get(symbol, {})) for symbol in symbols
+            }
+        for (name, symbol), result in derived_results.items():
+            versions = data._input_versions(list(DERIVED_SERIES[name].inputs))
+            data._derived_cache[(name, symbol)] = (versions, result)
+    finally:
+        # mapped buffers stay valid once their files are removed
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for symbol in symbols:
+        prepared.fields.setdefault(symbol, {})
+    return prepared
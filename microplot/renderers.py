@@ -0,0 +1,290 @@
+"""
+This module contains the custom chaco renderers used by the plotter.
+"""
+
+import numpy as np
+from chaco.api import ArrayDataSource, BaseXYPlot, ScatterPlot
+from chaco.plots.scatterplot import render_markers
+from enable.api import ColorTrait, MarkerTrait, black_color_trait, transparent_color_trait
+from traits.api import Any, Array, Bool, Float, HasTraits, Instance, List, Str
+
+# event categories drawn by the batched EventScatterPlot, in drawing order:
+# (legend name, plot data prefix, marker, color, marker size)
+EVENT_CATEGORIES = [
+    ("trade_price", "trade", "circle", "red", 8),
+    ("sim_aggr_buy_price", "sim_aggr_buy", "triangle", "blue", 12),
+    ("sim_pass_buy_price", "sim_pass_buy", "circle", "blue", 12),
+    ("sim_aggr_sell_price", "sim_aggr_sell", "triangle", "gold", 12),
+    ("sim_pass_sell_price", "sim_pass_sell", "circle", "gold", 12),
+    ("prod_aggr_buy_price", "prod_aggr_buy", "triangle", "purple", 12),
+    ("prod_pass_buy_price", "prod_pass_buy", "circle", "purple", 12),
+    ("prod_aggr_sell_price", "prod_aggr_sell", "triangle", "green", 12),
+    ("prod_pass_sell_price", "prod_pass_sell", "circle", "green", 12),
+    ("new_order_price", "new_order", "diamond", "green", 6),
+    ("new_order_ack_price", "new_order_ack", "diamond", "lightgreen", 6),
+    ("cancel_order_price", "cancel_order", "diamond", "red", 6),
+    ("cancel_order_ack_price", "cancel_order_ack", "diamond", "pink", 6),
+    ("reject_orders_price", "reject_orders", "diamond", "black", 6),
+]
+
+# simulation run colors, in the order runs are drawn (markers keep their category shape)
+SIM_RUN_COLORS = ["darkorange", "darkviolet", "teal", "crimson", "olive", "navy", "hotpink", "sienna"]
+
+
+class EventCategory(HasTraits):
+    """
+    Marker style of one event category of an EventScatterPlot.
+
+    Registered in Plot.plots under the category name, so the legend draws its icon
+    and Plot.hideplot()/showplot() toggle the category like a regular renderer.
+    """
+
+    name = Str
+    marker = MarkerTrait
+    marker_size = Float(4.0)
+    color = ColorTrait("black")
+    outline_color = black_color_trait
+    line_width = Float(1.0)
+    visible = Bool(True)
+
+    # the EventScatterPlot drawing this category
+    renderer = Any
+
+    def _visible_changed(self):
+        if self.renderer is not None:
+            self.renderer.invalidate_and_redraw()
+
+    def _render_icon(self, gc, x, y, width, height):
+        point = np.array([[x + width / 2, y + height / 2]])
+        render_markers(
+            gc,
+            point,
+            self.marker,
+            self.marker_size,
+            self.color_,
+            self.line_width,
+            self.outline_color_,
+        )
+
+
+class EventScatterPlot(ScatterPlot):
+    """
+    Batched scatter renderer: draws every event category of a subplot in one pass,
+    from a single timestamp-sorted (timestamp, price, category code) set of arrays.
+    Category code i is drawn with the style categories[i].
+    """
+
+    # category code per point
+    category = Instance(ArrayDataSource)
+
+    # style per category code
+    categories = List(Instance(EventCategory))
+
+    _cached_codes = Array(transient=True)
+
+    def _gather_points(self):
+        if self._cache_valid and self._selection_cache_valid:
+            return
+        super()._gather_points()
+
+        codes = self.category.get_data() if self.category is not None else np.empty(0)
+        point_mask = np.asarray(self._cached_point_mask, dtype=bool)
+        if len(point_mask) == len(codes):
+            self._cached_codes = codes[point_mask]
+        else:
+            self._cached_codes = np.empty(0, dtype=np.int8)
+
+    def _render(self, gc, points, icon_mode=False):
+        if icon_mode:
+            return super()._render(gc, points, icon_mode)
+
+        gc.save_state()
+        gc.clip_to_rect(self.x, self.y, self.width, self.height)
+
+        codes = self._cached_codes
+        if len(codes) == len(points):
+            for code, style in enumerate(self.categories):
+                if not style.visible:
+                    continue
+                category_points = points[codes == code]
+                if len(category_points):
+                    render_markers(
+                        gc,
+                        category_points,
+                        style.marker,
+                        style.marker_size,
+                        style.color_,
+                        style.line_width,
+                        style.outline_color_,
+                    )
+
+        self._draw_default_axes(gc)
+        gc.restore_state()
+
+    def _category_changed(self, old, new):
+        if old is not None:
+            old.observe(self._either_data_updated, "data_changed", remove=True)
+        if new is not None:
+            new.observe(self._either_data_updated, "data_changed")
+        self._either_data_updated()
+
+
+class StepBandPlot(BaseXYPlot):
+    """
+    Filled step region between two series sharing an index (e.g. bid/ask edge bands).
+
+    Each (low, high) pair holds until the next index value, like a "connectedhold" line.
+    The visible region is drawn as a single filled polygon, not per point.
+    """
+
+    # upper edge of the band; `value` is the lower edge
+    upper = Instance(ArrayDataSource)
+
+    face_color = ColorTrait((0.0, 0.5, 0.0, 0.2))
+    edge_color = transparent_color_trait
+    line_width = Float(1.0)
+
+    _cached_upper = Array(transient=True)
+
+    def _gather_points(self):
+        if self._cache_valid:
+            return
+        index = self.index.get_data()
+        low = self.value.get_data()
+        high = self.upper.get_data() if self.upper is not None else low
+        if not len(index) or len(index) != len(low) or len(low) != len(high):
+            self._cached_data_pts = np.empty((0, 2))
+            self._cached_upper = np.empty(0)
+            self._cache_valid = True
+            return
+
+        # visible window, plus the step in force at its start
+        index_range = self.index_mapper.range
+        start = max(np.searchsorted(index, index_range.low, side="right") - 1, 0)
+        stop = np.searchsorted(index, index_range.high, side="right") + 1
+        self._cached_data_pts = np.column_stack([index[start:stop], low[start:stop]])
+        self._cached_upper = np.asarray(high[start:stop])
+        self._cache_valid = True
+
+    def _render(self, gc, points, icon_mode=False):
+        if len(points) == 0:
+            return
+        x = points[:, 0]
+        low = points[:, 1]
+        high = self.value_mapper.map_screen(self._cached_upper)
+        # the last step runs to the right edge of the plot
+        end = max(self.x2, x[-1])
+
+        def step_path(y):
+            path = np.column_stack([np.repeat(x, 2)[1:], np.repeat(y, 2)[:-1]])
+            return np.vstack([path, [end, y[-1]]])
+
+        # step outline: along the upper edge forward, the lower edge back
+        polygon = np.vstack([step_path(high), step_path(low)[::-1]])
+
+        with gc:
+            gc.clip_to_rect(self.x, self.y, self.width, self.height)
+            gc.set_fill_color(self.face_color_)
+            gc.set_stroke_color(self.edge_color_)
+            gc.set_line_width(self.line_width)
+            gc.lines(polygon)
+            gc.close_path()
+            gc.draw_path()
+
+    def _render_icon(self, gc, x, y, width, height):
+        with gc:
+            gc.set_fill_color(self.face_color_)
+            gc.set_stroke_color(self.edge_color_)
+            gc.rect(x, y, width, height)
+            gc.draw_path()
+
+    def _upper_changed(self, old, new):
+        if old is not None:
+            old.observe(self._either_data_updated, "data_changed", remove=True)
+        if new is not None:
+            new.observe(self._either_data_updated, "data_changed")
+        self._either_data_updated()
+
+
+class OrderLadderPlot(BaseXYPlot):
+    """
+    Working-order ladder: one horizontal segment per order, at its price, from its
+    start (`index`) to its end (`end`; inf while still working).
+
+    Segments are culled to the visible window and drawn with one line_set call per side.
+    """
+
+    # segment ends; `index` holds the starts (sorted), `value` the prices
+    end = Instance(ArrayDataSource)
+    # order side (True = buy); all orders are drawn as sells when not set
+    is_buy = Instance(ArrayDataSource)
+
+    buy_color = ColorTrait("green")
+    sell_color = ColorTrait("red")
+    line_width = Float(2.0)
+
+    _cached_end = Array(transient=True)
+    _cached_is_buy = Array(transient=True)
+
+    def _gather_points(self):
+        if self._cache_valid:
+            return
+        start = self.index.get_data()
+        price = self.value.get_data()
+        end = self.end.get_data() if self.end is not None else start
+        if not len(start) or len(start) != len(price) or len(price) != len(end):
+            self._cached_data_pts = np.empty((0, 2))
+            self._cached_end = np.empty(0)
+            self._cached_is_buy = np.empty(0, dtype=bool)
+            self._cache_valid = True
+            return
+
+        # started before the window closes, and not ended before it opens
+        index_range = self.index_mapper.range
+        stop = np.searchsorted(start, index_range.high, side="right")
+        rows = np.flatnonzero(end[:stop] >= index_range.low)
+        self._cached_data_pts = np.column_stack([start[rows], price[rows]])
+        self._cached_end = np.asarray(end[rows])
+        if self.is_buy is not None and len(self.is_buy.get_data()) == len(start):
+            self._cached_is_buy = np.asarray(self.is_buy.get_data(), dtype=bool)[rows]
+        else:
+            self._cached_is_buy = np.zeros(len(rows), dtype=bool)
+        self._cache_valid = True
+
+    def _render(self, gc, points, icon_mode=False):
+        if len(points) == 0:
+            return
+        # open-ended segments run to the right edge of the window
+        index_range = self.index_mapper.range
+        x0 = np.maximum(points[:, 0], self.x)
+        x1 = self.index_mapper.map_screen(np.minimum(self._cached_end, index_range.high))
+        y = points[:, 1]
+
+        with gc:
+            gc.clip_to_rect(self.x, self.y, self.width, self.height)
+            gc.set_line_width(self.line_width)
+            for is_buy, color in ((False, self.sell_color_), (True, self.buy_color_)):
+                side = self._cached_is_buy == is_buy
+                if not side.any():
+                    continue
+                gc.set_stroke_color(color)
+                gc.begin_path()
+                gc.line_set(
+                    np.column_stack([x0[side], y[side]]), np.column_stack([x1[side], y[side]])
+                )
+                gc.stroke_path()
+
+    def _render_icon(self, gc, x, y, width, height):
+        with gc:
+            gc.set_stroke_color(self.buy_color_)
+            gc.set_line_width(self.line_width)
+            gc.move_to(x, y + height / 2)
+            gc.line_to(x + width, y + height / 2)
+            gc.stroke_path()
+
+    def _end_changed(self, old, new):
+        if old is not None:
+            old.observe(self._either_data_updated, "data_changed", remove=True)
+        if new is not None:
+            new.observe(self._either_data_updated, "data_changed")
+        self._either_data_updated()
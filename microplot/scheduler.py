@@ -0,0 +1,302 @@
+"""
+This module contains the redraw scheduler for pan/zoom interaction, and frame-time counters.
+"""
+
+from dataclasses import dataclass
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+from chaco.api import LinePlot, Plot, ScatterPlot, VPlotContainer
+from pyface.timer.api import CallbackTimer, do_after
+
+from microplot.datasource import _window
+from microplot.renderers import OrderLadderPlot
+
+
+@dataclass
+class FrameStats:
+    """
+    Frame-time counters for one render pass ("preview" or "full").
+    """
+
+    frames: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def add(self, elapsed_ms: float):
+        self.frames += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.frames if self.frames else 0.0
+
+
+class TimedVPlotContainer(VPlotContainer):
+    """
+    VPlotContainer that records how long each frame takes to draw, per render pass.
+    """
+
+    def __init__(self, *args, **kws):
+        super().__init__(*args, **kws)
+        # set by the RedrawScheduler
+        self.render_pass = "full"
+        self.frame_stats = {"preview": FrameStats(), "full": FrameStats()}
+
+    def draw(self, gc, view_bounds=None, mode="default"):
+        start = time.perf_counter()
+        super().draw(gc, view_bounds, mode)
+        self.frame_stats[self.render_pass].add((time.perf_counter() - start) * 1e3)
+
+
+class RedrawScheduler:
+    """
+    Coalesces index range changes into at most one redraw per frame budget.
+
+    While the range keeps changing, subplots are drawn in a cheap preview pass:
+    line renderers get the rows in view, stride-decimated, and scatter renderers (and order
+    ladders) with too many markers are hidden. Once no change has arrived for idle_ms, the full
+    data is restored (or the data set meanwhile kept), the hidden renderers are shown again
+    (unless hidden meanwhile, see set_visible), the idle callbacks run (e.g. on-demand
+    re-queries) and a full-fidelity pass is drawn.
+    """
+
+    def __init__(
+        self,
+        container: TimedVPlotContainer,
+        preview: bool = True,
+        frame_ms: int = 16,
+        idle_ms: int = 150,
+        preview_points: int = 2000,
+        marker_cap: int = 500,
+    ):
+        """
+        Args:
+            container (TimedVPlotContainer): container holding the linked subplots.
+            preview (bool): draw a decimated preview pass during interaction. Default = True.
+            frame_ms (int): frame budget; range changes are coalesced to one redraw per frame.
+            idle_ms (int): input idle time before the full-fidelity pass.
+            preview_points (int): max points per line renderer in the preview pass.
+            marker_cap (int): scatter renderers with more markers (order ladders with more segments)
+                are hidden in the preview pass.
+        """
+        self._container = container
+        self._preview = preview
+        self._frame_ms = frame_ms
+        self._idle_ms = idle_ms
+        self._preview_points = preview_points
+        self._marker_cap = marker_cap
+
+        # run before every coalesced frame (cheap view updates, e.g. re-bucketing)
+        self.frame_callbacks: List[Callable[[], None]] = []
+        # run once input goes idle, before the full-fidelity pass
+        self.idle_callbacks: List[Callable[[], None]] = []
+
+        self._frame_pending = False
+        # restarted on every range change; fires once input has been idle for idle_ms
+        self._idle_timer = None
+        self._in_preview = False
+        # plot -> index data name -> value data names of the decimated line renderers, while in preview
+        self._groups: Dict[Plot, Dict[str, Set[str]]] = {}
+        # (plot, data name) -> full array, while in preview
+        self._full_data = {}
+        # renderer hidden by the preview -> visibility to restore (the user's), while in preview
+        self._hidden = {}
+        # set while the scheduler itself updates plot data or visibility
+        self._updating = False
+
+    def range_changed(self, event=None):
+        """
+        Index range change handler: schedule a (coalesced) frame, and (re)start the idle timer.
+        """
+        if not self._frame_pending:
+            self._frame_pending = True
+            do_after(self._frame_ms, self._on_frame)
+        if self._idle_timer is None:
+            self._idle_timer = CallbackTimer(interval=self._idle_ms / 1000.0, callback=self._on_idle)
+        # one timer for the whole interaction: restarting it pushes the idle pass back
+        self._idle_timer.stop()
+        self._idle_timer.start()
+
+    def _on_frame(self):
+        self._frame_pending = False
+        if self._preview:
+            if not self._in_preview:
+                self._enter_preview()
+            else:
+                self._update_previews()
+        for callback in self.frame_callbacks:
+            callback()
+        self._container.request_redraw()
+
+    def _on_idle(self):
+        self._idle_timer.stop()
+        if self._in_preview:
+            self._exit_preview()
+        for callback in self.idle_callbacks:
+            callback()
+        self._container.request_redraw()
+
+    def _enter_preview(self):
+        self._in_preview = True
+        self._container.render_pass = "preview"
+
+        for plot in self._container.components:
+            if not isinstance(plot, Plot):
+                continue
+            names = {id(source): name for name, source in plot.datasources.items()}
+
+            # index data name -> value data names of the line renderers drawn against it
+            line_groups = {}
+            for renderer in plot.components:
+                if isinstance(renderer, (ScatterPlot, OrderLadderPlot)):
+                    if renderer.visible and len(renderer.index.get_data()) > self._marker_cap:
+                        self._hidden[renderer] = True
+                        self._updating = True
+                        try:
+                            renderer.visible = False
+                        finally:
+                            self._updating = False
+                        renderer.observe(self._on_visible_changed, "visible")
+                elif isinstance(renderer, LinePlot):
+                    index_name = names.get(id(renderer.index))
+                    value_name = names.get(id(renderer.value))
+                    if index_name is not None and value_name is not None:
+                        line_groups.setdefault(index_name, set()).add(value_name)
+
+            groups = {}
+            for index_name, value_names in line_groups.items():
+                if len(plot.data.get_data(index_name)) <= self._preview_points:
+                    continue
+                groups[index_name] = value_names
+                for name in [index_name, *value_names]:
+                    self._full_data[(plot, name)] = plot.data.get_data(name)
+            if groups:
+                self._groups[plot] = groups
+                plot.data.observe(self._on_data_changed, "data_changed")
+        self._update_previews()
+
+    def _update_previews(self, plots: Optional[List[Plot]] = None):
+        """
+        Decimate the saved full data of the line renderers to the rows in the current index range.
+
+        Args:
+            plots (Optional[List[Plot]]): plots to update. Default = None (every plot in preview).
+        """
+        for plot in self._groups if plots is None else plots:
+            index_range = plot.index_range
+            previews = {}
+            for index_name, value_names in self._groups[plot].items():
+                timestamps = self._full_data[(plot, index_name)]
+                # rows in view (and the one before it, for "hold" lines), stride-decimated
+                window = _window(timestamps, index_range.low, index_range.high)
+                rows = np.arange(window.start, window.stop)
+                if len(rows) > self._preview_points:
+                    rows = rows[np.unique(np.linspace(0, len(rows) - 1, self._preview_points).astype(np.int64))]
+                for name in [index_name, *value_names]:
+                    previews[name] = self._full_data[(plot, name)][rows]
+            if not previews:
+                continue
+            self._updating = True
+            try:
+                plot.data.update_data(previews)
+            finally:
+                self._updating = False
+
+    def is_visible(self, renderer) -> bool:
+        """
+        Visibility of a renderer as set by the user, whether or not the preview hides it.
+
+        Args:
+            renderer: plot renderer.
+
+        Returns:
+            bool: true if shown outside the preview.
+        """
+        return self._hidden.get(renderer, renderer.visible)
+
+    def set_visible(self, renderer, visible: bool):
+        """
+        Show or hide a renderer; one the preview hides takes the visibility once the preview ends.
+
+        Args:
+            renderer: plot renderer.
+            visible (bool): show (True) or hide (False).
+        """
+        if renderer in self._hidden:
+            self._hidden[renderer] = visible
+        else:
+            renderer.visible = visible
+
+    def _on_visible_changed(self, event):
+        """
+        A renderer the preview hides was shown or hidden directly: keep that, not the preview's restore.
+        """
+        if self._updating:
+            return
+        event.object.observe(self._on_visible_changed, "visible", remove=True)
+        self._hidden.pop(event.object, None)
+
+    def _on_data_changed(self, event):
+        """
+        Plot data set while in preview (e.g. a loaded series, a clock correction): the new
+        arrays are the full data to restore; the preview is re-decimated from them.
+        """
+        if self._updating:
+            return
+        data = event.object
+        for plot in [plot for plot in self._groups if plot.data is data]:
+            changed = set(event.new.get("changed", []))
+            for index_name, value_names in list(self._groups[plot].items()):
+                names = [index_name, *value_names]
+                if changed.isdisjoint(names):
+                    continue
+                for name in changed.intersection(names):
+                    self._full_data[(plot, name)] = data.get_data(name)
+                if len({len(self._full_data[(plot, name)]) for name in names}) > 1:
+                    # partly set: leave the group to its owner, at full data
+                    self._restore(plot, {index_name: value_names}, changed)
+                    del self._groups[plot][index_name]
+            self._update_previews([plot])
+
+    def _restore(self, plot: Plot, groups: Dict[str, Set[str]], skip: Set[str] = frozenset()):
+        """
+        Put the saved full data of line renderer groups back (but the skip names, already set anew).
+        """
+        full_data = {}
+        for index_name, value_names in groups.items():
+            for name in [index_name, *value_names]:
+                values = self._full_data.pop((plot, name))
+                if name not in skip:
+                    full_data[name] = values
+        if full_data:
+            self._updating = True
+            try:
+                plot.data.update_data(full_data)
+            finally:
+                self._updating = False
+
+    def _exit_preview(self):
+        self._in_preview = False
+        self._container.render_pass = "full"
+
+        for renderer, visible in self._hidden.items():
+            renderer.observe(self._on_visible_changed, "visible", remove=True)
+            renderer.visible = visible
+        self._hidden = {}
+
+        for plot, groups in self._groups.items():
+            plot.data.observe(self._on_data_changed, "data_changed", remove=True)
+            self._restore(plot, groups)
+        self._groups = {}
+        self._full_data = {}
+
+    @property
+    def frame_stats(self) -> Dict[str, FrameStats]:
+        """
+        Returns:
+            Dict[str, FrameStats]: render pass -> frame-time counters.
+        """
+        return self._container.frame_stats
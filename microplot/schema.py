@@ -15,3 +15,24 @@ ORDERS_DATA_COLUMNS = [
     "is_ack",
 ]
 VAL_DATA_COLUMNS = ["timestamp", "symbol", "theo_price"]
+
+# required columns keyed by PlotterDataClass series name
+SERIES_COLUMNS = {
+    "quote_data": QUOTE_DATA_COLUMNS,
+    "trade_data": TRADE_DATA_COLUMNS,
+    "fill_data_sim": FILL_DATA_COLUMNS,
+    "fill_data_prod": FILL_DATA_COLUMNS,
+    "orders": ORDERS_DATA_COLUMNS,
+    "val_data": VAL_DATA_COLUMNS,
+}
+
+# optional columns, read when present, keyed by PlotterDataClass series name.
+# quote sizes let micro_price be derived when absent (see microplot.derived).
+# order_id links order events (and fills) into working-order intervals (see microplot.ladder).
+OPTIONAL_COLUMNS = {
+    "quote_data": ["bid_size", "ask_size"],
+    "fill_data_sim": ["order_id"],
+    "fill_data_prod": ["order_id"],
+    "orders": ["order_id", "is_buy"],
+    "val_data": ["bid_edge", "ask_edge"],
+}
@@ -1,3 +1,3 @@
 # pylint: disable=C0111
 
-__all__ = ["plot_csv"]
+__all__ = ["plot_csv","serve_csv"]
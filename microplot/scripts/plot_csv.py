@@ -2,59 +2,25 @@
 Command-line script to load a csv and generate a microstructure plot.
 """
 
+from microplot.clock import ClockCorrection, parse_duration
 from microplot.data import PlotterDataClass
-from microplot.plotter import MicroPlotter
-from microplot.schema import (
-    QUOTE_DATA_COLUMNS,
-    TRADE_DATA_COLUMNS,
-    FILL_DATA_COLUMNS,
-    ORDERS_DATA_COLUMNS,
-    VAL_DATA_COLUMNS,
-)
+from microplot.filters import compile_filter
+from microplot.loaders import ProgressiveLoader, load_csv_data, load_sim_run
+from microplot.planner import load_planned, log_actual, peak_rss_bytes, plan_memory
+from microplot.schema import SERIES_COLUMNS
 import logging
 import argparse
-import os.path
-import pandas as pd
+import os
 import sys
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Tuple
 
-def _check_file_path(file_path: str) -> bool:
-    """
-    Check the file_path before trying to open.
-
-    Args:
-        file_path (str): file path.
-
-    Returns:
-        bool: Boolean whether file path is valid.
-    """
-    
-    if not file_path.endswith(".csv"):
-        return False
-
-    return os.path.isfile(file_path)
 
-def _check(file_path: str):
+def get_logger() -> logging.Logger:
     """
-    Red-face test the file.
-
-    Args:
-        file_path (str): file path.
-
-    Raises:
-        Exception: file path either does not exist or is not a csv.
-    """
-
-    if not _check_file_path(file_path):
-        raise Exception(f"{file_path} either does not exist or is not a csv file.")
-
+    Console logger for the command-line scripts.
 
-def run_plotter_csv(command_args:List[Any]):
-    """
-    Main function for creating plotter via csv.
-
-    Args:
-        command_args (List[Any]): command-line args.
+    Returns:
+        logging.Logger: "microplotter" logger.
     """
     # logger
     logger = logging.getLogger("microplotter")
@@ -71,7 +37,16 @@ def run_plotter_csv(command_args:List[Any]):
     # add ch to logger
     logger.addHandler(console_handler)
 
-    parser = argparse.ArgumentParser()
+    return logger
+
+
+def add_data_arguments(parser: argparse.ArgumentParser):
+    """
+    Add the input data file arguments to a command-line parser.
+
+    Args:
+        parser (argparse.ArgumentParser): command-line parser.
+    """
     parser.add_argument(
         "-quote_data_file",
         "--quote_data_file",
@@ -114,63 +89,239 @@ def run_plotter_csv(command_args:List[Any]):
         type=str,
         required=False
     )
+    parser.add_argument(
+        "-workers",
+        "--workers",
+        help="worker processes for parsing large csv files, and preparing the subplots, in parallel",
+        type=int,
+        default=os.cpu_count() or 1,
+        required=False
+    )
+    parser.add_argument(
+        "-clock_offset",
+        "--clock_offset",
+        help="SERIES[:SYMBOL]=OFFSET added to the timestamps of a series (or of one symbol in it), "
+        "e.g. orders=-250us (repeatable)",
+        type=str,
+        action="append",
+        default=[],
+        required=False
+    )
+    parser.add_argument(
+        "-clock_drift",
+        "--clock_drift",
+        help="SERIES[:SYMBOL]=FILE of a csv drift table (timestamp and offset columns, in ns) "
+        "interpolated over the timestamps of a series (repeatable)",
+        type=str,
+        action="append",
+        default=[],
+        required=False
+    )
+
+
+def clock_corrections(args: argparse.Namespace) -> Dict[Tuple[str, Optional[str]], ClockCorrection]:
+    """
+    Clock corrections given in the parsed command-line args (an offset and a drift table
+    for the same series and symbol add up).
+
+    Args:
+        args (argparse.Namespace): parsed command-line args.
+
+    Raises:
+        Exception: malformed argument, unknown series, bad offset or drift table.
+
+    Returns:
+        Dict[Tuple[str, Optional[str]], ClockCorrection]: (series, symbol or None) -> correction.
+    """
+    offsets, drifts = {}, {}
+    for values, target in ((args.clock_offset, offsets), (args.clock_drift, drifts)):
+        for value in values:
+            key, separator, setting = value.partition("=")
+            series, _, symbol = key.partition(":")
+            if not separator or series not in SERIES_COLUMNS:
+                raise Exception(f"expected SERIES[:SYMBOL]=VALUE with a series in {list(SERIES_COLUMNS)}, got {value!r}")
+            target[(series, symbol or None)] = setting
+    corrections = {}
+    for key in {**offsets, **drifts}:
+        offset_ns = parse_duration(offsets[key]) if key in offsets else 0
+        if key in drifts:
+            corrections[key] = ClockCorrection.from_csv(drifts[key], offset_ns)
+        else:
+            corrections[key] = ClockCorrection(offset_ns)
+    return corrections
+
+
+def data_file_paths(args: argparse.Namespace) -> Dict[str, Optional[str]]:
+    """
+    Input data files named in the parsed command-line args.
+
+    Args:
+        args (argparse.Namespace): parsed command-line args.
+
+    Returns:
+        Dict[str, Optional[str]]: series name -> file path (None = not given).
+    """
+    return {
+        "quote_data": args.quote_data_file,
+        "trade_data": args.trade_data_file,
+        "fill_data_sim": args.fill_data_sim_file,
+        "fill_data_prod": args.fill_data_prod_file,
+        "orders": args.orders_data_file,
+        "val_data": args.valuation_data_file,
+    }
+
+
+def load_data(args: argparse.Namespace, logger: logging.Logger) -> PlotterDataClass:
+    """
+    Load the input data files named in the parsed command-line args.
+
+    Args:
+        args (argparse.Namespace): parsed command-line args.
+        logger (logging.Logger): progress logger.
+
+    Returns:
+        PlotterDataClass: dataclass for plotting object.
+    """
+    corrections = clock_corrections(args)
+    data = load_csv_data(data_file_paths(args), logger, workers=args.workers)
+    for (series, symbol), correction in corrections.items():
+        data.set_clock_correction(series, correction, symbol)
+    return data
+
+
+def run_plotter_csv(command_args:List[Any]):
+    """
+    Main function for creating plotter via csv.
+
+    Args:
+        command_args (List[Any]): command-line args.
+    """
+    # logger
+    logger = get_logger()
+
+    parser = argparse.ArgumentParser()
+    add_data_arguments(parser)
+    parser.add_argument(
+        "-activity",
+        "--activity",
+        help="show an event-rate strip under each symbol's plot",
+        action="store_true",
+        required=False
+    )
+    parser.add_argument(
+        "-filter",
+        "--filter",
+        help='highlight events matching a filter expression, e.g. "orders: is_reject & (price > quote.ask_price)" (repeatable)',
+        type=str,
+        action="append",
+        default=[],
+        required=False
+    )
+    parser.add_argument(
+        "-filter_only",
+        "--filter_only",
+        help="hide the event markers not matching a filter",
+        action="store_true",
+        required=False
+    )
+    parser.add_argument(
+        "-sim_run",
+        "--sim_run",
+        help="[NAME=]DIRECTORY of a simulation run (fill_data.csv, order_data.csv, val_data.csv) "
+        "overlaid on the market data (repeatable)",
+        type=str,
+        action="append",
+        default=[],
+        required=False
+    )
+    parser.add_argument(
+        "-ladder",
+        "--ladder",
+        help="draw the working-order ladder (needs an order_id column in the orders file)",
+        action="store_true",
+        required=False
+    )
+    parser.add_argument(
+        "-memory_budget",
+        "--memory_budget",
+        "--memory-budget",
+        help="memory budget, e.g. 8G: the loading strategy (in memory, decimated overview, "
+        "out-of-core store) is picked to fit it",
+        type=str,
+        required=False
+    )
+    parser.add_argument(
+        "-store_dir",
+        "--store_dir",
+        help="columnar store directory, if the memory budget calls for out-of-core loading "
+        "(default: a temporary directory)",
+        type=str,
+        required=False
+    )
     # read in command-line args
     args = parser.parse_args(command_args)
+    # check filter expressions and clock corrections before reading in data
+    for expression in args.filter:
+        compile_filter(expression)
+    corrections = clock_corrections(args)
+
+    # read in data: with no memory plan, only the quotes before the window opens
+    plan = None
+    loader = None
+    if args.memory_budget:
+        baseline_bytes = peak_rss_bytes() or 0
+        plan = plan_memory(data_file_paths(args), args.memory_budget)
+        data = load_planned(data_file_paths(args), plan, logger, args.workers, args.store_dir)
+    else:
+        loader = ProgressiveLoader(data_file_paths(args), logger, args.workers)
+        data = loader.load_first()
+    if corrections and not isinstance(data, PlotterDataClass):
+        logger.warning("Clock corrections need the data in memory: ignored with an out-of-core memory plan")
+        corrections = {}
+    for (series, symbol), correction in corrections.items():
+        data.set_clock_correction(series, correction, symbol)
+    if args.sim_run and not isinstance(data, PlotterDataClass):
+        logger.warning("Sim runs need the data in memory: ignored with an out-of-core memory plan")
+        args.sim_run = []
+    for sim_run in args.sim_run:
+        name, _, directory = sim_run.rpartition("=")
+        name = name or os.path.basename(os.path.normpath(directory))
+        logger.info(f"Reading in sim run {name}....")
+        data.add_sim_run(name, load_sim_run(directory, logger, args.workers))
 
-    # data class
-    data = PlotterDataClass()
-
-    # read in quote data
-    if args.quote_data_file is not None:
-        _check(args.quote_data_file)
-        logger.info("Reading in quote data....")
-        with open(args.quote_data_file) as file:
-            data.quote_data = pd.read_csv(file, usecols=QUOTE_DATA_COLUMNS)
-        logger.info("Done")
-
-    # read in trade data
-    if args.trade_data_file is not None:
-        _check(args.trade_data_file)
-        logger.info("Reading in trade data....")
-        with open(args.trade_data_file) as file:
-            data.trade_data = pd.read_csv(file, usecols=TRADE_DATA_COLUMNS)
-        logger.info("Done")
-
-    # read in fill data -- sim
-    if args.fill_data_sim_file is not None:
-        _check(args.fill_data_sim_file)
-        logger.info("Reading in fill data sim....")
-        with open(args.fill_data_sim_file) as file:
-            data.fill_data_sim = pd.read_csv(file, usecols=FILL_DATA_COLUMNS)
-        logger.info("Done")
-
-    # read in fill data -- prod
-    if args.fill_data_prod_file is not None:
-        _check(args.fill_data_prod_file)
-        logger.info("Reading in fill data prod....")
-        with open(args.fill_data_prod_file) as file:
-            data.fill_data_prod = pd.read_csv(file, usecols=FILL_DATA_COLUMNS)
-        logger.info("Done")
-
-    # read in orders
-    if args.orders_data_file is not None:
-        _check(args.orders_data_file)
-        logger.info("Reading in orders data....")
-        with open(args.orders_data_file) as file:
-            data.orders = pd.read_csv(file, usecols=ORDERS_DATA_COLUMNS)
-        logger.info("Done")
-
-    # read in valuation data
-    if args.valuation_data_file is not None:
-        _check(args.valuation_data_file)
-        logger.info("Reading in valuation data....")
-        with open(args.valuation_data_file) as file:
-            data.val_data = pd.read_csv(file, usecols=VAL_DATA_COLUMNS)
-        logger.info("Done")
+    # GUI toolkit is only imported once a window is opened
+    from microplot.plotter import MicroPlotter
 
     # plotter
     logger.info("Creating plotter....")
-    plotter = MicroPlotter(data)
+    plotter = MicroPlotter(
+        data,
+        max_points=plan.max_points if plan else None,
+        show_activity=args.activity,
+        workers=args.workers,
+        loader=loader,
+    )
+    if args.filter and not isinstance(data, PlotterDataClass):
+        logger.warning("Filters need the data in memory: ignored with an out-of-core memory plan")
+        args.filter = []
+    if args.ladder and not isinstance(data, PlotterDataClass):
+        logger.warning("The order ladder needs the data in memory: ignored with an out-of-core memory plan")
+        args.ladder = False
+
+    def add_layers():
+        # filters and the ladder read every series: added once all are loaded
+        for expression in args.filter:
+            event_filter = plotter.add_filter(expression, only=args.filter_only)
+            matches = sum(int(event_filter.evaluate(data, symbol).sum()) for symbol in data.get_symbols())
+            logger.info(f"Filter {expression!r}: {matches} matching events")
+        if args.ladder:
+            plotter.toggle_order_ladder(True)
+
+    plotter.when_loaded(add_layers)
+    if plan is not None:
+        # build the subplots, to count their memory too
+        plotter.container
+        log_actual(plan, logger, baseline_bytes)
     logger.info("Done")
     # call plot() method
     logger.info("Rendering plots....")
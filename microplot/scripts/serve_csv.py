@@ -0,0 +1,73 @@
+"""
+Command-line script to load a csv and serve microstructure plot tiles over local HTTP.
+"""
+
+from microplot.scripts.plot_csv import add_data_arguments, get_logger, load_data
+from microplot.server import TileServer
+import argparse
+import os
+import sys
+from typing import Any, List
+
+
+def run_server_csv(command_args:List[Any]):
+    """
+    Main function for serving plot tiles via csv.
+
+    Args:
+        command_args (List[Any]): command-line args.
+    """
+    # logger
+    logger = get_logger()
+
+    parser = argparse.ArgumentParser()
+    add_data_arguments(parser)
+    parser.add_argument(
+        "-host",
+        "--host",
+        help="interface to bind (default: local only)",
+        type=str,
+        default="127.0.0.1",
+        required=False
+    )
+    parser.add_argument(
+        "-port",
+        "--port",
+        help="port to bind",
+        type=int,
+        default=8050,
+        required=False
+    )
+    parser.add_argument(
+        "-render_workers",
+        "--render_workers",
+        help="worker processes rendering tiles",
+        type=int,
+        default=os.cpu_count() or 1,
+        required=False
+    )
+    parser.add_argument(
+        "-cache_tiles",
+        "--cache_tiles",
+        help="rendered tiles kept in the LRU cache",
+        type=int,
+        default=4096,
+        required=False
+    )
+    # read in command-line args
+    args = parser.parse_args(command_args)
+
+    # read in data
+    data = load_data(args, logger)
+
+    # server
+    logger.info("Starting tile server....")
+    server = TileServer(
+        data, workers=args.render_workers, cache_tiles=args.cache_tiles, logger=logger
+    )
+    server.serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    # set up this way to be able to import function
+    run_server_csv(sys.argv[1:])
@@ -0,0 +1,589 @@
+"""
+This module contains the tile server: rendered plot tiles over local HTTP, for remote viewing.
+
+A dataset is loaded once; tiles (time x price, per symbol) are rendered on demand
+in a process pool and kept in an LRU cache shared by every connected browser.
+
+NOTE: the GUI toolkit is never started; tiles are rendered offscreen with Kiva.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import unquote
+
+import numpy as np
+
+from microplot.data import PlotterDataClass
+from microplot.datasource import DataFrameDataSource, DataSource
+
+# tile edge length, in pixels
+TILE_SIZE = 256
+# deepest zoom level served, per axis
+MAX_ZOOM = 20
+# margin rendered around each tile, outside its canvas, so markers are not cut at tile edges
+TILE_GUTTER = 16
+
+# price columns of each series, used to size the price axis of a symbol
+PRICE_COLUMNS = {
+    "quote_data": ["bid_price", "ask_price", "micro_price"],
+    "trade_data": ["price"],
+    "fill_data_sim": ["price"],
+    "fill_data_prod": ["price"],
+    "orders": ["price"],
+    "val_data": ["theo_price"],
+}
+
+_TILE_PATH = re.compile(r"^/tile/(?P<dataset>[^/]+)/(?P<symbol>[^/]+)/(?P<zx>\d+)/(?P<zy>\d+)/(?P<x>\d+)/(?P<y>\d+)\.png$")
+
+
+def value_bounds(source: DataSource, symbol: str, pad: float = 0.05) -> Tuple[float, float]:
+    """
+    Price axis bounds of a symbol: the range of its price columns, padded.
+
+    Args:
+        source (DataSource): data source.
+        symbol (str): The symbol of interest.
+        pad (float): padding, as a fraction of the range. Default = 0.05.
+
+    Returns:
+        Tuple[float, float]: (low, high) price.
+    """
+    lows, highs = [], []
+    for series in source.series():
+        columns = source.query(series, symbol, max_points=source.default_max_points)
+        for column in PRICE_COLUMNS[series]:
+            values = np.asarray(columns[column], dtype=np.float64)
+            values = values[np.isfinite(values)]
+            if len(values):
+                lows.append(values.min())
+                highs.append(values.max())
+    if not lows:
+        return 0.0, 1.0
+    low, high = min(lows), max(highs)
+    margin = (high - low) * pad or max(abs(high) * pad, 1.0)
+    return float(low - margin), float(high + margin)
+
+
+def tile_bounds(
+    bounds: Tuple[float, float], zoom: int, index: int
+) -> Tuple[float, float]:
+    """
+    Data interval covered by tile `index` at zoom level `zoom` along one axis.
+
+    Args:
+        bounds (Tuple[float, float]): full (low, high) interval of the axis.
+        zoom (int): zoom level; the axis is split into 2**zoom tiles.
+        index (int): tile index, from the low end.
+
+    Returns:
+        Tuple[float, float]: (low, high) interval of the tile.
+    """
+    low, high = bounds
+    span = (high - low) / 2**zoom
+    return low + index * span, low + (index + 1) * span
+
+
+class TileCache:
+    """
+    Thread-safe LRU cache of rendered tiles.
+    """
+
+    def __init__(self, max_tiles: int = 4096):
+        """
+        Args:
+            max_tiles (int): tiles kept before the least recently used are evicted. Default = 4096.
+        """
+        self._max_tiles = max_tiles
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is None:
+                self.misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+    def put(self, key, tile: bytes):
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self._max_tiles:
+                self._tiles.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+
+class TileRenderer:
+    """
+    Renders PNG tiles of the subplot of a symbol, offscreen.
+
+    One subplot per symbol is built on first use and re-ranged for each tile.
+    On-demand sources (default_max_points set) are re-queried for each tile window.
+    """
+
+    def __init__(
+        self,
+        source: DataSource,
+        time_bounds: Tuple[float, float],
+        price_bounds: Dict[str, Tuple[float, float]],
+        tile_size: int = TILE_SIZE,
+    ):
+        """
+        Args:
+            source (DataSource): data source.
+            time_bounds (Tuple[float, float]): full (first, last) timestamp.
+            price_bounds (Dict[str, Tuple[float, float]]): symbol -> full (low, high) price.
+            tile_size (int): tile edge length, in pixels. Default = TILE_SIZE.
+        """
+        # imported here: workers set the toolkit before chaco is first imported
+        from microplot.plotter import MicroPlotter
+
+        self._source = source
+        self._time_bounds = time_bounds
+        self._price_bounds = price_bounds
+        self._tile_size = tile_size
+        self._plotter = MicroPlotter(source)
+        # symbol -> Plot
+        self._plots = {}
+
+    def _plot(self, symbol: str):
+        if symbol not in self._plots:
+            plot = self._plotter._generate_subplot(symbol)
+            # tiles carry data only: no title, legend, axes or tools
+            plot.overlays = []
+            plot.tools = []
+            plot.padding = 0
+            plot.bgcolor = "white"
+            size = self._tile_size + 2 * TILE_GUTTER
+            plot.outer_bounds = [size, size]
+            self._plots[symbol] = plot
+        return self._plots[symbol]
+
+    def render(self, symbol: str, zx: int, zy: int, x: int, y: int) -> bytes:
+        """
+        Render one tile.
+
+        Args:
+            symbol (str): The symbol of interest.
+            zx (int): time zoom level.
+            zy (int): price zoom level.
+            x (int): time tile index, from the first timestamp.
+            y (int): price tile index, from the highest price (top).
+
+        Returns:
+            bytes: PNG image.
+        """
+        from chaco.api import PlotGraphicsContext
+
+        plot = self._plot(symbol)
+        t0, t1 = tile_bounds(self._time_bounds, zx, x)
+        low, high = self._price_bounds[symbol]
+        p1, p0 = tile_bounds((high, low), zy, y)
+
+        # the mapper spans (size - 1) pixels; extend by the gutter on both sides
+        size = self._tile_size + 2 * TILE_GUTTER
+        dt = (t1 - t0) / self._tile_size
+        dp = (p1 - p0) / self._tile_size
+        t0, t1 = t0 - TILE_GUTTER * dt, t0 + (size - TILE_GUTTER - 1) * dt
+        p0, p1 = p0 - TILE_GUTTER * dp, p0 + (size - TILE_GUTTER - 1) * dp
+
+        if self._source.default_max_points is not None:
+            array_plot_data = self._plotter._plot_data[symbol]
+            for series in self._source.series():
+                columns = self._source.query(series, symbol, t0, t1, max_points=size * 4)
+                self._plotter._set_series_data(array_plot_data, series, columns, update_only=True)
+            self._plotter._set_event_data(array_plot_data)
+
+        plot.index_range.set_bounds(t0, t1)
+        plot.value_range.set_bounds(p0, p1)
+        plot.do_layout(force=True)
+
+        # draw the gutter outside the tile canvas
+        gc = PlotGraphicsContext((self._tile_size, self._tile_size))
+        gc.translate_ctm(-TILE_GUTTER, -TILE_GUTTER)
+        gc.render_component(plot)
+        buffer = io.BytesIO()
+        gc.save(buffer, file_format="png")
+        return buffer.getvalue()
+
+
+# per-worker-process renderer, built by _init_worker
+_renderer = None
+
+
+def _init_worker(source, time_bounds, price_bounds, tile_size):
+    global _renderer
+    os.environ.setdefault("ETS_TOOLKIT", "null")
+    _renderer = TileRenderer(source, time_bounds, price_bounds, tile_size)
+
+
+def _render_tile(symbol: str, zx: int, zy: int, x: int, y: int) -> bytes:
+    return _renderer.render(symbol, zx, zy, x, y)
+
+
+class TileServer:
+    """
+    Serves the tiles of one loaded dataset, and a browser client, over HTTP.
+
+    Routes:
+        GET /                                    browser client (linked time zoom across symbols)
+        GET /meta                                          dataset token, symbols, time and price bounds, tile size
+        GET /tile/<dataset>/<symbol>/<zx>/<zy>/<x>/<y>.png tile
+
+    Tile URLs carry the dataset token (the load time), so browsers can cache tiles for long
+    without showing those of another dataset served later on the same port.
+    """
+
+    def __init__(
+        self,
+        data: Union[PlotterDataClass, DataSource],
+        workers: int = 1,
+        cache_tiles: int = 4096,
+        tile_size: int = TILE_SIZE,
+        logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Args:
+            data (Union[PlotterDataClass, DataSource]): dataclass for plotting object, or a DataSource.
+            workers (int): tile rendering processes. Default = 1.
+            cache_tiles (int): rendered tiles kept in the LRU cache. Default = 4096.
+            tile_size (int): tile edge length, in pixels. Default = TILE_SIZE.
+            logger (Optional[logging.Logger]): request logger. Default = "microplotter" logger.
+        """
+        self._source = (
+            data if isinstance(data, DataSource) else DataFrameDataSource(data, collapse_quotes=True)
+        )
+        self._tile_size = tile_size
+        self._logger = logger or logging.getLogger("microplotter")
+        # identifies this dataset in tile URLs
+        self.dataset = f"{time.time_ns():x}"
+        self._symbols = self._source.symbols()
+        self._time_bounds = tuple(float(bound) for bound in self._source.time_bounds())
+        if self._time_bounds[0] == self._time_bounds[1]:
+            self._time_bounds = (self._time_bounds[0], self._time_bounds[0] + 1.0)
+        self._price_bounds = {
+            symbol: value_bounds(self._source, symbol) for symbol in self._symbols
+        }
+
+        self.cache = TileCache(cache_tiles)
+        # tiles being rendered: key -> Future, so concurrent requests render once
+        self._pending: Dict[tuple, Future] = {}
+        self._pending_lock = threading.Lock()
+
+        os.environ.setdefault("ETS_TOOLKIT", "null")
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self._source, self._time_bounds, self._price_bounds, tile_size),
+        )
+        self._httpd = None
+
+    @property
+    def meta(self) -> Dict:
+        """
+        Returns:
+            Dict: dataset token, symbols, time bounds, per-symbol price bounds, tile size and max zoom.
+        """
+        return {
+            "dataset": self.dataset,
+            "symbols": [str(symbol) for symbol in self._symbols],
+            "time_bounds": list(self._time_bounds),
+            "price_bounds": {
+                str(symbol): list(bounds) for symbol, bounds in self._price_bounds.items()
+            },
+            "tile_size": self._tile_size,
+            "max_zoom": MAX_ZOOM,
+        }
+
+    def has_tile(self, symbol: str, zx: int, zy: int, x: int, y: int) -> bool:
+        """
+        Args:
+            symbol (str): The symbol of interest.
+            zx (int): time zoom level.
+            zy (int): price zoom level.
+            x (int): time tile index, from the first timestamp.
+            y (int): price tile index, from the highest price (top).
+
+        Returns:
+            bool: true if the symbol is served and the tile is in range.
+        """
+        return symbol in self._price_bounds and (
+            0 <= zx <= MAX_ZOOM and 0 <= zy <= MAX_ZOOM and 0 <= x < 2**zx and 0 <= y < 2**zy
+        )
+
+    def tile(self, symbol: str, zx: int, zy: int, x: int, y: int) -> bytes:
+        """
+        Get a tile from the cache, rendering it in the worker pool on a miss.
+
+        Args:
+            symbol (str): The symbol of interest.
+            zx (int): time zoom level.
+            zy (int): price zoom level.
+            x (int): time tile index, from the first timestamp.
+            y (int): price tile index, from the highest price (top).
+
+        Raises:
+            Exception: unknown symbol, or tile out of range (see has_tile); or rendering failed.
+
+        Returns:
+            bytes: PNG image.
+        """
+        if symbol not in self._price_bounds:
+            raise Exception(f"unknown symbol: {symbol}")
+        if not self.has_tile(symbol, zx, zy, x, y):
+            raise Exception(f"tile out of range: {(zx, zy, x, y)}")
+
+        key = (symbol, zx, zy, x, y)
+        tile = self.cache.get(key)
+        if tile is not None:
+            return tile
+
+        with self._pending_lock:
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._executor.submit(_render_tile, *key)
+                self._pending[key] = future
+        try:
+            tile = future.result()
+        finally:
+            if owner:
+                with self._pending_lock:
+                    self._pending.pop(key, None)
+        if owner:
+            self.cache.put(key, tile)
+        return tile
+
+    def warm_up(self):
+        """
+        Start the worker processes (and build their renderers) before serving requests.
+        """
+        futures = [
+            self._executor.submit(_render_tile, self._symbols[0], 0, 0, 0, 0)
+            for _ in range(self._executor._max_workers)
+        ]
+        for future in futures:
+            future.result()
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8050):
+        """
+        Serve until interrupted.
+
+        Args:
+            host (str): interface to bind. Default = "127.0.0.1" (local only).
+            port (int): port to bind. Default = 8050.
+        """
+        self.warm_up()
+        self._httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self._logger.info(f"Serving {len(self._symbols)} symbols on http://{host}:{port}/")
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """
+        Stop serving and shut down the worker pool.
+        """
+        if self._httpd is not None:
+            self._httpd.server_close()
+            self._httpd = None
+        self._executor.shutdown(cancel_futures=True)
+        self._logger.info(f"Tile cache: {self.cache.hits} hits, {self.cache.misses} misses")
+
+
+def _handler(server: TileServer):
+    """
+    Request handler class bound to a TileServer.
+    """
+
+    class TileRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path in ("/", "/index.html"):
+                self._send(200, "text/html; charset=utf-8", CLIENT_HTML.encode())
+            elif path == "/meta":
+                self._send(200, "application/json", json.dumps(server.meta).encode())
+            else:
+                match = _TILE_PATH.match(path)
+                key = match and (
+                    unquote(match["symbol"]),
+                    int(match["zx"]),
+                    int(match["zy"]),
+                    int(match["x"]),
+                    int(match["y"]),
+                )
+                # bad path, another dataset's tile, unknown symbol or out of range
+                if match is None or match["dataset"] != server.dataset or not server.has_tile(*key):
+                    self._send(404, "text/plain", b"not found")
+                    return
+                try:
+                    tile = server.tile(*key)
+                except Exception as error:
+                    server._logger.error(f"Rendering tile {key} failed: {error}")
+                    self._send(500, "text/plain", str(error).encode())
+                    return
+                self._send(200, "image/png", tile, cache=True)
+
+        def _send(self, status: int, content_type: str, body: bytes, cache: bool = False):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if cache:
+                # tiles of a loaded dataset never change, and their URLs name the dataset
+                self.send_header("Cache-Control", "max-age=86400")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            server._logger.debug(format % args)
+
+    return TileRequestHandler
+
+
+# browser client: one panel per symbol. Wheel zooms time (linked across panels),
+# shift+wheel zooms price; drag pans time (linked) and price (per panel).
+CLIENT_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Microstructure Plotter</title>
+<style>
+  body { margin: 0; font: 12px sans-serif; background: #f4f4f4; }
+  header { padding: 6px 10px; }
+  .panel { position: relative; margin: 4px 10px; background: white; }
+  .panel canvas { display: block; width: 100%; height: 260px; cursor: grab; }
+  .label { position: absolute; left: 6px; top: 4px; font-weight: bold; }
+</style>
+</head>
+<body>
+<header><span id="window"></span> &mdash; wheel: zoom time, shift+wheel: zoom price, drag: pan, double-click: reset</header>
+<div id="panels"></div>
+<script>
+(async function () {
+  const meta = await (await fetch("meta")).json();
+  const T = meta.tile_size;
+  const [T0, T1] = meta.time_bounds;
+  const tiles = new Map();
+  let view = { t0: T0, t1: T1 };
+  const panels = [];
+
+  function tile(url, redraw) {
+    let img = tiles.get(url);
+    if (!img) {
+      img = new Image();
+      img.onload = redraw;
+      img.src = url;
+      tiles.set(url, img);
+    }
+    return img;
+  }
+
+  function level(full, shown, pixels) {
+    const z = Math.ceil(Math.log2((full / shown) * pixels / T));
+    return Math.min(Math.max(z, 0), meta.max_zoom);
+  }
+
+  function draw(panel) {
+    const canvas = panel.canvas, ctx = canvas.getContext("2d");
+    const w = canvas.width = canvas.clientWidth, h = canvas.height = canvas.clientHeight;
+    const [P0, P1] = meta.price_bounds[panel.symbol];
+    ctx.clearRect(0, 0, w, h);
+    const zx = level(T1 - T0, view.t1 - view.t0, w), zy = level(P1 - P0, panel.p1 - panel.p0, h);
+    const tw = (T1 - T0) / 2 ** zx, th = (P1 - P0) / 2 ** zy;
+    const x0 = Math.max(Math.floor((view.t0 - T0) / tw), 0), x1 = Math.min(Math.floor((view.t1 - T0) / tw), 2 ** zx - 1);
+    const y0 = Math.max(Math.floor((P1 - panel.p1) / th), 0), y1 = Math.min(Math.floor((P1 - panel.p0) / th), 2 ** zy - 1);
+    for (let x = x0; x <= x1; x++) {
+      for (let y = y0; y <= y1; y++) {
+        const img = tile(`tile/${meta.dataset}/${encodeURIComponent(panel.symbol)}/${zx}/${zy}/${x}/${y}.png`, () => draw(panel));
+        if (!img.complete || !img.naturalWidth) continue;
+        const sx = (T0 + x * tw - view.t0) / (view.t1 - view.t0) * w;
+        const sy = (panel.p1 - (P1 - y * th)) / (panel.p1 - panel.p0) * h;
+        ctx.drawImage(img, sx, sy, tw / (view.t1 - view.t0) * w + 0.5, th / (panel.p1 - panel.p0) * h + 0.5);
+      }
+    }
+    ctx.fillStyle = "black";
+    ctx.fillText(panel.p1.toFixed(4), 4, 24);
+    ctx.fillText(panel.p0.toFixed(4), 4, h - 4);
+  }
+
+  function drawAll() {
+    const fmt = (t) => new Date(t * 1000).toISOString().replace("T", " ").replace("Z", "");
+    document.getElementById("window").textContent = `${fmt(view.t0)} \\u2192 ${fmt(view.t1)}`;
+    panels.forEach(draw);
+  }
+
+  for (const symbol of meta.symbols) {
+    const div = document.createElement("div");
+    div.className = "panel";
+    div.innerHTML = `<span class="label"></span><canvas></canvas>`;
+    div.querySelector(".label").textContent = `Symbol: ${symbol}`;
+    document.getElementById("panels").appendChild(div);
+    const [P0, P1] = meta.price_bounds[symbol];
+    const panel = { symbol, canvas: div.querySelector("canvas"), p0: P0, p1: P1 };
+    panels.push(panel);
+
+    panel.canvas.addEventListener("wheel", (event) => {
+      event.preventDefault();
+      const factor = Math.exp(event.deltaY * 0.002), rect = panel.canvas.getBoundingClientRect();
+      if (event.shiftKey) {
+        const p = panel.p1 - (event.clientY - rect.top) / rect.height * (panel.p1 - panel.p0);
+        panel.p0 = p - (p - panel.p0) * factor;
+        panel.p1 = p + (panel.p1 - p) * factor;
+      } else {
+        const t = view.t0 + (event.clientX - rect.left) / rect.width * (view.t1 - view.t0);
+        view = { t0: t - (t - view.t0) * factor, t1: t + (view.t1 - t) * factor };
+      }
+      drawAll();
+    }, { passive: false });
+
+    panel.canvas.addEventListener("mousedown", (event) => {
+      const start = { x: event.clientX, y: event.clientY, view, p0: panel.p0, p1: panel.p1 };
+      const rect = panel.canvas.getBoundingClientRect();
+      const move = (e) => {
+        const dt = (e.clientX - start.x) / rect.width * (start.view.t1 - start.view.t0);
+        const dp = (e.clientY - start.y) / rect.height * (start.p1 - start.p0);
+        view = { t0: start.view.t0 - dt, t1: start.view.t1 - dt };
+        panel.p0 = start.p0 + dp;
+        panel.p1 = start.p1 + dp;
+        drawAll();
+      };
+      const up = () => {
+        window.removeEventListener("mousemove", move);
+        window.removeEventListener("mouseup", up);
+      };
+      window.addEventListener("mousemove", move);
+      window.addEventListener("mouseup", up);
+    });
+
+    panel.canvas.addEventListener("dblclick", () => {
+      view = { t0: T0, t1: T1 };
+      [panel.p0, panel.p1] = meta.price_bounds[symbol];
+      drawAll();
+    });
+  }
+  window.addEventListener("resize", drawAll);
+  drawAll();
+})();
+</script>
+</body>
+</html>
+"""